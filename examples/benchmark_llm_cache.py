@@ -0,0 +1,72 @@
+"""
+Compares reads/writes per second of the sqlite llm cache with and without the sqlite tuning profile.
+Answers are written one by one (write_batch_size=1), which is the worst case for the journal.
+"""
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from llm_docstring_generator.llm.cache_database import SQLITE_ENGINE_KWARGS, LLMCache
+from llm_docstring_generator.llm.cache_key import get_cache_key
+
+num_answers = 2000
+num_threads = 8
+system_prompt = "You are a helpful assistant. " * 20
+model = "benchmark"
+
+
+def benchmark_llm_cache(llm_cache: LLMCache) -> tuple[float, float]:
+    prompts = [f"def function_{i}():\n    pass\n" * 50 for i in range(num_answers)]
+
+    def save_answer(prompt: str) -> None:
+        llm_cache.save_llm_answer(
+            prompt=prompt,
+            prompt_truncated=prompt,
+            answer=prompt[:200],
+            system_prompt=system_prompt,
+            model=model,
+        )
+
+    def load_answer(prompt: str) -> None:
+        llm_cache.get_llm_answer(
+            prompt=prompt,
+            prompt_truncated=prompt,
+            system_prompt=system_prompt,
+            model=model,
+        )
+
+    with ThreadPoolExecutor(num_threads) as executor:
+        start_time = time.perf_counter()
+        list(executor.map(save_answer, prompts))
+        writes_per_second = num_answers / (time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        list(executor.map(load_answer, prompts))
+        reads_per_second = num_answers / (time.perf_counter() - start_time)
+
+    # sanity check, all answers must have been written
+    keys = [get_cache_key(prompt, prompt, system_prompt, model) for prompt in prompts]
+    assert len(llm_cache.get_llm_answers(keys)) == num_answers
+    return reads_per_second, writes_per_second
+
+
+if __name__ == "__main__":
+    profiles = {
+        # previous default: rollback journal, synchronous=FULL
+        "default": dict(
+            engine_kwargs=dict(pool_size=50, max_overflow=0),
+            use_sqlite_profile=False,
+        ),
+        "tuned": dict(engine_kwargs=SQLITE_ENGINE_KWARGS, use_sqlite_profile=True),
+    }
+    for profile_name, llm_cache_kwargs in profiles.items():
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_name = f"sqlite:///{Path(tmp_dir) / 'llm_cache.db'}"
+            reads_per_second, writes_per_second = benchmark_llm_cache(
+                LLMCache(db_name=db_name, **llm_cache_kwargs)  # type: ignore[arg-type]
+            )
+        print(
+            f"{profile_name:>8}: {reads_per_second:8.0f} reads/s, "
+            f"{writes_per_second:8.0f} writes/s"
+        )
@@ -1,14 +1,19 @@
+import importlib
+from typing import TYPE_CHECKING
+
 from llm_docstring_generator.llm.prompts import (
     CODE_REVIEW_SYSTEM_PROMPT,
     DEFAULT_DOCSTRING_SYSTEM_PROMPT,
     DEFAULT_EXPLAIN_SYSTEM_PROMPT,
 )
-from llm_docstring_generator.pipelines.code_graph import run_code_graph_generation
-from llm_docstring_generator.pipelines.run_code_annotation_pipeline import (
-    run_code_annotation_pipeline,
-)
 from llm_docstring_generator.utils.base_config import DEFAULT_DATA_DIR
 
+if TYPE_CHECKING:
+    from llm_docstring_generator.pipelines.code_graph import run_code_graph_generation
+    from llm_docstring_generator.pipelines.run_code_annotation_pipeline import (
+        run_code_annotation_pipeline,
+    )
+
 __all__ = [
     "DEFAULT_DATA_DIR",
     "DEFAULT_DOCSTRING_SYSTEM_PROMPT",
@@ -18,5 +23,16 @@ __all__ = [
     "run_code_graph_generation",
 ]
 
-
 __version__ = "1.0.0"
+
+# the pipelines import heavy dependencies (sqlalchemy, networkx, openai, ...), they are only imported on first use
+_lazy_imports = {
+    "run_code_annotation_pipeline": "llm_docstring_generator.pipelines.run_code_annotation_pipeline",
+    "run_code_graph_generation": "llm_docstring_generator.pipelines.code_graph",
+}
+
+
+def __getattr__(name: str):
+    if name in _lazy_imports:
+        return getattr(importlib.import_module(_lazy_imports[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,225 @@
+"""
+Dependency graph of all annotation tasks of a repository.
+Allows to annotate code objects concurrently while keeping the guarantees of the sequential annotation order.
+"""
+import heapq
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set
+
+from llm_docstring_generator.python_files.function_and_classes import Class, Function
+from llm_docstring_generator.python_files.python_file import PythonFile
+from llm_docstring_generator.sorters.sort_functions_and_classes import (
+    get_sorted_functions_and_classes_and_methods,
+)
+from loguru import logger
+from tqdm import tqdm
+
+
+@dataclass
+class AnnotationNode:
+    """
+    A single annotation task, i.e. a function/class/method or a complete python file.
+    index is the position of the task in the sequential annotation order.
+    """
+
+    index: int
+    python_file: PythonFile
+    # None if the node annotates the complete python file
+    code_object: Optional[Function | Class] = None
+    # indices of the nodes that need to be annotated before this node
+    dependencies: List[int] = field(default_factory=list)
+    # unique key of the node, see get_annotation_keys
+    key: str = ""
+
+    @property
+    def name(self) -> str:
+        if self.code_object is None:
+            return self.python_file.import_name
+        return self.code_object.complete_import_name
+
+
+def get_annotation_keys(python_files: List[PythonFile]) -> Dict[int, str]:
+    """
+    Unique key of each annotation unit (code object or python file), by id of the annotated object.
+    The key is the name of the unit (see AnnotationNode.name). Units that share their name with an earlier unit,
+    e.g. the setter of a property or a redefined function, get the suffix "#<n>" for the n-th repetition.
+    Thus, the keys are stable across runs as long as the order of the same named units does not change.
+    """
+    keys: Dict[int, str] = dict()
+    num_occurrences: Dict[str, int] = defaultdict(int)
+    for python_file in python_files:
+        if python_file.codestring == "":
+            continue
+        annotated_objects: List[PythonFile | Function | Class] = [
+            *get_sorted_functions_and_classes_and_methods(python_file),
+            python_file,
+        ]
+        for annotated_object in annotated_objects:
+            name = (
+                annotated_object.import_name
+                if isinstance(annotated_object, PythonFile)
+                else annotated_object.complete_import_name
+            )
+            keys[id(annotated_object)] = (
+                f"{name}#{num_occurrences[name]}" if num_occurrences[name] else name
+            )
+            num_occurrences[name] += 1
+    return keys
+
+
+def build_annotation_graph(python_files: List[PythonFile]) -> List[AnnotationNode]:
+    """
+    Build the annotation graph for the (already sorted) python_files.
+    The nodes are returned in the sequential annotation order of BaseAnnotator.
+
+    A node reads the llm_response of the code objects it uses (and a file node additionally reads
+    the responses of its own code objects and of its parent files). For every such pair, the node that comes
+    later in the sequential order depends on the node that comes first.
+    Thus, each node sees exactly the same annotations as in the sequential order, independent of the
+    order in which the nodes are executed.
+    """
+    nodes: List[AnnotationNode] = []
+    name2indices: Dict[str, List[int]] = defaultdict(list)
+    reads: List[Set[int]] = []
+    # references to nodes that come later in the sequential order (e.g. cyclic dependencies)
+    forward_references: Dict[str, List[int]] = defaultdict(list)
+    file_name2index: Dict[str, int] = dict()
+    forward_file_references: Dict[str, List[int]] = defaultdict(list)
+    keys = get_annotation_keys(python_files)
+
+    for python_file in python_files:
+        if python_file.codestring == "":
+            continue
+        code_object_indices = set()
+        for function_or_class in get_sorted_functions_and_classes_and_methods(
+            python_file
+        ):
+            index = len(nodes)
+            read_indices = set()
+            for import_dependency in function_or_class.import_dependencies:
+                name = import_dependency.complete_import_name
+                if name in name2indices:
+                    read_indices.update(name2indices[name])
+                else:
+                    forward_references[name].append(index)
+            # nodes that were added earlier and use this code object
+            read_indices.update(
+                forward_references.get(function_or_class.complete_import_name, [])
+            )
+            nodes.append(
+                AnnotationNode(
+                    index=index,
+                    python_file=python_file,
+                    code_object=function_or_class,
+                    key=keys[id(function_or_class)],
+                )
+            )
+            reads.append(read_indices)
+            name2indices[function_or_class.complete_import_name].append(index)
+            code_object_indices.add(index)
+
+        index = len(nodes)
+        read_indices = set(code_object_indices)
+        for import_dependency in python_file.import_dependencies:
+            if import_dependency.import_name in file_name2index:
+                read_indices.add(file_name2index[import_dependency.import_name])
+            else:
+                forward_file_references[import_dependency.import_name].append(index)
+        read_indices.update(forward_file_references.get(python_file.import_name, []))
+        nodes.append(
+            AnnotationNode(
+                index=index, python_file=python_file, key=keys[id(python_file)]
+            )
+        )
+        reads.append(read_indices)
+        file_name2index[python_file.import_name] = index
+
+    for node, read_indices in zip(nodes, reads):
+        node.dependencies = sorted(
+            read_index for read_index in read_indices if read_index < node.index
+        )
+    return nodes
+
+
+def run_annotation_graph(
+    nodes: List[AnnotationNode],
+    annotate_node: Callable[[AnnotationNode], bool],
+    max_workers: int,
+    description: Callable[[], str] = lambda: "Annotating",
+    retry_failed_nodes: Callable[[], None] = lambda: None,
+) -> None:
+    """
+    Run annotate_node for all nodes using a thread pool with at most max_workers tasks in flight.
+    A node is dispatched as soon as all its dependencies have been annotated.
+    Ready nodes are dispatched in their sequential order.
+    annotate_node returns False if the annotation of the node failed and is retried later. The dependents of
+    failed nodes are held back until no other node is ready, then retry_failed_nodes is called and the dependents
+    are released, so that they see the annotations of the failed nodes if the retry succeeded.
+    """
+    dependents: List[List[int]] = [[] for _ in nodes]
+    num_pending_dependencies = [len(node.dependencies) for node in nodes]
+    for node in nodes:
+        for dependency in node.dependencies:
+            dependents[dependency].append(node.index)
+    ready = [node.index for node in nodes if len(node.dependencies) == 0]
+    heapq.heapify(ready)
+    # indices of the failed nodes whose dependents are held back
+    failed: List[int] = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, tqdm(
+        total=len(nodes)
+    ) as progress:
+        futures: Dict[Future, int] = dict()
+        while ready or futures or failed:
+            if not ready and not futures:
+                logger.debug(
+                    f"Retrying {len(failed)} failed nodes before annotating their dependents"
+                )
+                retry_failed_nodes()
+                for index in failed:
+                    release_dependents(
+                        index, dependents, num_pending_dependencies, ready
+                    )
+                failed = []
+                continue
+            # keep at most max_workers tasks in flight, so that newly ready nodes that come
+            # earlier in the sequential order are not queued behind later ones
+            while ready and len(futures) < max_workers:
+                index = heapq.heappop(ready)
+                futures[executor.submit(annotate_node, nodes[index])] = index
+
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=lambda f: futures[f]):
+                index = futures.pop(future)
+                try:
+                    annotated = future.result()
+                except Exception:
+                    for pending_future in futures:
+                        pending_future.cancel()
+                    logger.error(f"Annotating {nodes[index].name} failed")
+                    raise
+                progress.update(1)
+                if annotated:
+                    release_dependents(
+                        index, dependents, num_pending_dependencies, ready
+                    )
+                else:
+                    failed.append(index)
+            progress.set_description(description())
+
+
+def release_dependents(
+    index: int,
+    dependents: List[List[int]],
+    num_pending_dependencies: List[int],
+    ready: List[int],
+) -> None:
+    """
+    Mark the node as done and push the dependents without other pending dependencies onto the ready heap.
+    """
+    for dependent in dependents[index]:
+        num_pending_dependencies[dependent] -= 1
+        if num_pending_dependencies[dependent] == 0:
+            heapq.heappush(ready, dependent)
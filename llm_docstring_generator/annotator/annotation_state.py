@@ -0,0 +1,349 @@
+"""
+Persistent annotation state for incremental and resumed runs, stored in config.cache_path / "annotation_state.db".
+
+For each annotation unit (a function/class/method or a complete python file, see AnnotationNode.key),
+the state stores the hash of its code, the hash of the names it reads while being annotated and its llm_response.
+A unit has to be annotated again if
+    - it is new, its code changed or the code objects it reads changed (e.g. a new dependency)
+    - its python file changed since config.base_commit (if set)
+    - it reads a unit that has to be annotated again (transitively), as its prompt contains that unit's annotation
+All other units reuse their stored llm_response.
+Resumed (but not incremental) runs only reuse the stored llm_responses if the last run was interrupted, i.e. a
+resumed run after a completed run annotates all units again.
+"""
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+import sqlalchemy
+import sqlalchemy.orm as sqlalchemy_orm
+from llm_docstring_generator.annotator.annotation_graph import get_annotation_keys
+from llm_docstring_generator.llm.cache_database import _create_scoped_session
+from llm_docstring_generator.parser.parse_cache import get_hash
+from llm_docstring_generator.python_files.function_and_classes import Class, Function
+from llm_docstring_generator.python_files.python_file import PythonFile
+from llm_docstring_generator.sorters.sort_functions_and_classes import (
+    get_sorted_functions_and_classes_and_methods,
+)
+from llm_docstring_generator.utils.base_config import BaseConfig
+from loguru import logger
+from sqlalchemy import Boolean, Column, String, Text
+from sqlalchemy.orm import declarative_base
+
+Base = declarative_base()
+
+# maximum number of names per IN clause
+CHUNK_SIZE = 500
+
+
+class AnnotationStateEntry(Base):  # type: ignore
+    __tablename__ = "annotation_state"
+
+    # fingerprint of the annotator, see BaseAnnotator.get_fingerprint
+    fingerprint = Column(String, primary_key=True)
+    # unique key of the unit, see get_annotation_keys
+    name = Column(String, primary_key=True)
+    import_name = Column(String)
+    code_hash = Column(String)
+    reads_hash = Column(String)
+    llm_response = Column(Text)
+
+
+class AnnotationRun(Base):  # type: ignore
+    __tablename__ = "annotation_runs"
+
+    fingerprint = Column(String, primary_key=True)
+    # whether the last run with this fingerprint annotated all units
+    completed = Column(Boolean)
+
+
+@dataclass
+class AnnotationUnit:
+    # unique key of the unit, see get_annotation_keys
+    key: str
+    name: str
+    # import name of the python file of the unit
+    import_name: str
+    code_hash: str
+    # names of the units whose llm_response is used to annotate this unit
+    reads: List[str]
+    annotated_object: PythonFile | Function | Class
+
+    @property
+    def reads_hash(self) -> str:
+        return get_hash(*self.reads)
+
+
+def get_annotation_units(python_files: List[PythonFile]) -> Dict[str, AnnotationUnit]:
+    """
+    Same units and reads as in build_annotation_graph, by unique key.
+    """
+    keys = get_annotation_keys(python_files)
+    units: Dict[str, AnnotationUnit] = dict()
+    for python_file in python_files:
+        if python_file.codestring == "":
+            continue
+        code_object_names = []
+        for function_or_class in get_sorted_functions_and_classes_and_methods(
+            python_file
+        ):
+            key = keys[id(function_or_class)]
+            units[key] = AnnotationUnit(
+                key=key,
+                name=function_or_class.complete_import_name,
+                import_name=python_file.import_name,
+                code_hash=get_hash(function_or_class.codestring),
+                reads=sorted(
+                    {
+                        import_dependency.complete_import_name
+                        for import_dependency in function_or_class.import_dependencies
+                    }
+                ),
+                annotated_object=function_or_class,
+            )
+            code_object_names.append(function_or_class.complete_import_name)
+        key = keys[id(python_file)]
+        units[key] = AnnotationUnit(
+            key=key,
+            name=python_file.import_name,
+            import_name=python_file.import_name,
+            code_hash=get_hash(python_file.codestring),
+            reads=sorted(
+                set(code_object_names)
+                | {
+                    import_dependency.import_name
+                    for import_dependency in python_file.import_dependencies
+                }
+            ),
+            annotated_object=python_file,
+        )
+    return units
+
+
+def get_changed_import_names(repository_path: Path, base_commit: str) -> Set[str]:
+    """
+    Import names of the python files that were changed or added since base_commit (including uncommitted changes).
+    """
+    changed_filepaths = subprocess.run(
+        ["git", "diff", "--name-only", "--relative", base_commit],
+        cwd=repository_path,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.splitlines()
+    changed_filepaths += subprocess.run(
+        ["git", "ls-files", "--others", "--exclude-standard"],
+        cwd=repository_path,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.splitlines()
+    return {
+        ".".join(Path(filepath).with_suffix("").parts)
+        for filepath in changed_filepaths
+        if filepath.endswith(".py")
+    }
+
+
+def get_invalidated_names(
+    units: Dict[str, AnnotationUnit], changed_names: Set[str]
+) -> Set[str]:
+    """
+    changed_names and all units that (transitively) read one of them, by unique key.
+    A unit reads all units with the read name, e.g. both the getter and the setter of a property.
+    """
+    readers: Dict[str, List[str]] = defaultdict(list)
+    for unit in units.values():
+        for read_name in unit.reads:
+            readers[read_name].append(unit.key)
+    invalidated_names = set(changed_names)
+    stack = list(changed_names)
+    while stack:
+        key = stack.pop()
+        for reader in readers.get(units[key].name, []):
+            if reader not in invalidated_names:
+                invalidated_names.add(reader)
+                stack.append(reader)
+    return invalidated_names
+
+
+class AnnotationState:
+    """
+    Besides incremental runs, the state is used to checkpoint a run: annotated units are stored every
+    checkpoint_interval seconds (and when the run ends or fails), so that an interrupted run can be resumed.
+    """
+
+    def __init__(
+        self,
+        config: BaseConfig,
+        base_commit: Optional[str] = None,
+        restore_completed_runs: bool = True,
+        checkpoint_interval: float = 60.0,
+    ):
+        self.config = config
+        self.base_commit = base_commit
+        # whether to reuse the annotations of completed runs (incremental runs). Otherwise, the annotations are
+        # only reused if the last run was interrupted (resumed runs) and the stored state is reset otherwise
+        self.restore_completed_runs = restore_completed_runs
+        self.checkpoint_interval = checkpoint_interval
+        db_path = config.cache_path / "annotation_state.db"
+        self.engine = sqlalchemy.engine.create_engine(f"sqlite:///{db_path}")
+        self.scoped_session = sqlalchemy_orm.scoped_session(
+            sqlalchemy_orm.sessionmaker(bind=self.engine)
+        )
+        Base.metadata.create_all(self.engine)
+
+        self.fingerprint = ""
+        self.units: Dict[str, AnnotationUnit] = dict()
+        # unique keys of the units annotated since the last checkpoint
+        self.pending_names: Set[str] = set()
+        self.last_checkpoint_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def load_entries(self, fingerprint: str) -> Dict[str, AnnotationStateEntry]:
+        with _create_scoped_session(self.scoped_session) as session:
+            entries = (
+                session.query(AnnotationStateEntry)
+                .filter(AnnotationStateEntry.fingerprint == fingerprint)
+                .all()
+            )
+            session.expunge_all()
+        return {str(entry.name): entry for entry in entries}
+
+    def delete_entries(self, session: sqlalchemy_orm.Session, names: List[str]) -> None:
+        for chunk_start in range(0, len(names), CHUNK_SIZE):
+            session.query(AnnotationStateEntry).filter(
+                AnnotationStateEntry.fingerprint == self.fingerprint,
+                AnnotationStateEntry.name.in_(
+                    names[chunk_start : chunk_start + CHUNK_SIZE]
+                ),
+            ).delete(synchronize_session=False)
+
+    def start_run(self, python_files: List[PythonFile], fingerprint: str) -> Set[str]:
+        """
+        Start a run of the annotator with the given fingerprint.
+        Set the stored llm_response of all units that don't need to be annotated again, unless the stored state
+        is reset (see restore_completed_runs).
+        :return: the unique keys of the restored units
+        """
+        self.fingerprint = fingerprint
+        self.units = get_annotation_units(python_files)
+        self.pending_names = set()
+        self.last_checkpoint_time = time.monotonic()
+        restore = self.restore_completed_runs or not self.is_last_run_completed()
+        self.set_run_completed(False)
+        if not restore:
+            with _create_scoped_session(self.scoped_session) as session:
+                session.query(AnnotationStateEntry).filter(
+                    AnnotationStateEntry.fingerprint == fingerprint
+                ).delete()
+            return set()
+
+        entries = self.load_entries(fingerprint)
+        changed_import_names: Set[str] = set()
+        if self.base_commit is not None:
+            changed_import_names = get_changed_import_names(
+                self.config.repository_path, self.base_commit
+            )
+
+        changed_names = set()
+        for key, unit in self.units.items():
+            entry = entries.get(key)
+            if (
+                entry is None
+                or entry.code_hash != unit.code_hash
+                or entry.reads_hash != unit.reads_hash
+                or unit.import_name in changed_import_names
+            ):
+                changed_names.add(key)
+        invalidated_names = get_invalidated_names(self.units, changed_names)
+
+        restored_names = set(self.units) - invalidated_names
+        for key in restored_names:
+            self.units[key].annotated_object.llm_response = str(
+                entries[key].llm_response
+            )
+        # remove outdated annotations, so that they are not restored if this run is interrupted
+        with _create_scoped_session(self.scoped_session) as session:
+            self.delete_entries(session, sorted(set(entries) - restored_names))
+        logger.info(
+            f"Restored annotation state: {len(changed_names)} changed units, "
+            f"annotating {len(invalidated_names)} units, reusing {len(restored_names)} annotations"
+        )
+        return restored_names
+
+    def is_last_run_completed(self) -> bool:
+        with _create_scoped_session(self.scoped_session) as session:
+            run = session.get(AnnotationRun, self.fingerprint)
+            return run is not None and bool(run.completed)
+
+    def set_run_completed(self, completed: bool) -> None:
+        with _create_scoped_session(self.scoped_session) as session:
+            session.merge(
+                AnnotationRun(fingerprint=self.fingerprint, completed=completed)
+            )
+
+    def finish_run(self) -> None:
+        """
+        Mark the run as completed, so that a resumed run starts from scratch.
+        """
+        self.checkpoint()
+        self.set_run_completed(True)
+
+    def record_annotated(self, key: str) -> None:
+        """
+        Mark the unit with the unique key as annotated, it is stored with the next checkpoint.
+        """
+        with self.lock:
+            self.pending_names.add(key)
+            checkpoint_due = (
+                time.monotonic() - self.last_checkpoint_time >= self.checkpoint_interval
+            )
+        if checkpoint_due:
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        """
+        Store all units annotated since the last checkpoint.
+        Units without llm_response (e.g. failed annotations) are not stored, so that they are annotated again.
+        """
+        with self.lock:
+            pending_names, self.pending_names = sorted(self.pending_names), set()
+            self.last_checkpoint_time = time.monotonic()
+        if len(pending_names) == 0:
+            return
+        entries = [
+            AnnotationStateEntry(
+                fingerprint=self.fingerprint,
+                name=name,
+                import_name=self.units[name].import_name,
+                code_hash=self.units[name].code_hash,
+                reads_hash=self.units[name].reads_hash,
+                llm_response=self.units[name].annotated_object.llm_response,
+            )
+            for name in pending_names
+            if name in self.units and self.units[name].annotated_object.llm_response
+        ]
+        with _create_scoped_session(self.scoped_session) as session:
+            self.delete_entries(session, pending_names)
+            session.add_all(entries)
+        logger.debug(f"Checkpointed {len(entries)} annotations")
+
+
+def create_annotation_state(config: BaseConfig) -> Optional[AnnotationState]:
+    """
+    The annotation state of an annotator for the repository of config.
+    None if neither config.incremental nor config.resume is set, i.e. the annotations are not checkpointed.
+    """
+    if not (config.incremental or config.resume):
+        return None
+    return AnnotationState(
+        config,
+        base_commit=config.base_commit,
+        restore_completed_runs=config.incremental,
+        checkpoint_interval=config.checkpoint_interval,
+    )
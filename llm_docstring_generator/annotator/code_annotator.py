@@ -1,10 +1,20 @@
-from typing import List, Type
+from functools import partial
+from typing import Callable, Dict, List, Optional, Set, Tuple, Type
 
+from llm_docstring_generator.annotator.annotation_graph import (
+    AnnotationNode,
+    build_annotation_graph,
+    get_annotation_keys,
+    run_annotation_graph,
+)
+from llm_docstring_generator.annotator.annotation_state import AnnotationState
 from llm_docstring_generator.annotator.metadata_provider import (
     BaseMetaDataProvider,
     DefaultMetaDataProvider,
 )
 from llm_docstring_generator.llm.llm import BaseLLM, DebugLLM
+from llm_docstring_generator.llm.resilience import LLMCallFailed
+from llm_docstring_generator.parser.parse_cache import get_hash
 from llm_docstring_generator.python_files.function_and_classes import Class, Function
 from llm_docstring_generator.python_files.python_file import PythonFile
 from llm_docstring_generator.sorters.sort_functions_and_classes import (
@@ -19,12 +29,67 @@ class BaseAnnotator:
         self,
         llm: BaseLLM,
         metadata_provider_class: Type[BaseMetaDataProvider] = DefaultMetaDataProvider,
+        annotation_state: Optional[AnnotationState] = None,
     ):
         self.llm = llm
         self.metadata_provider_class = metadata_provider_class
+        # if set, annotations are checkpointed and only the code objects that changed since the last run
+        # are annotated, see AnnotationState
+        self.annotation_state = annotation_state
+        # (key, annotate) of the annotations whose llm call failed, retried at the end of the run
+        self.failed_annotations: List[Tuple[str, Callable[[], None]]] = []
+        # unique keys of the failed annotations that were retried, each annotation is only retried once
+        self.retried_names: Set[str] = set()
+        # unique keys of the annotations (see get_annotation_keys) that were restored from the annotation state
+        self.restored_names: Set[str] = set()
+        # unique keys of the annotations that were prefetched from the llm cache
+        self.prefetched_names: Set[str] = set()
+        # id of a code object or python file -> its unique key, see get_annotation_keys
+        self.annotation_keys: Dict[int, str] = dict()
 
     def __call__(self, python_files: List[PythonFile]) -> List[PythonFile]:
         metadata_provider = self.metadata_provider_class(python_files=python_files)
+        self.failed_annotations = []
+        self.retried_names = set()
+        self.restored_names = set()
+        self.prefetched_names = set()
+        self.annotation_keys = get_annotation_keys(python_files)
+        if self.annotation_state is not None:
+            self.restored_names = self.annotation_state.start_run(
+                python_files, self.get_fingerprint()
+            )
+        try:
+            self.prefetch_cached_annotations(python_files, metadata_provider)
+            self.annotate_python_files(python_files, metadata_provider)
+        finally:
+            # keep the annotations so far if the run is interrupted
+            if self.annotation_state is not None:
+                self.annotation_state.checkpoint()
+        # a run with failed annotations can be resumed to annotate them
+        if self.annotation_state is not None and len(self.failed_annotations) == 0:
+            self.annotation_state.finish_run()
+        logger.info("Annotated all python files")
+        logger.info(self.llm.cache_stats)
+        # even though python_files are mutated in place, we return them to be able to use the
+        # run method in a pipeline
+        return python_files
+
+    def annotate_python_files(
+        self, python_files: List[PythonFile], metadata_provider: BaseMetaDataProvider
+    ) -> None:
+        """
+        Annotate all python files and retry the failed annotations once.
+        The concurrent annotation retries them before annotating their dependents, see run_annotation_graph.
+        """
+        if self.llm.config.max_concurrent_requests > 1:
+            self.annotate_concurrently(python_files, metadata_provider)
+        else:
+            self.annotate_sequentially(python_files, metadata_provider)
+            self.retry_failed_annotations()
+
+    def annotate_sequentially(
+        self, python_files: List[PythonFile], metadata_provider: BaseMetaDataProvider
+    ) -> None:
         iterator = tqdm(python_files)
         for python_file in iterator:
             iterator.set_description(
@@ -39,10 +104,141 @@ class BaseAnnotator:
             # that have been annotated so far are available for current python_file
             logger.debug(f"Annotating {python_file.import_name}")
             self.annotate_python_file(python_file, metadata_provider=metadata_provider)
-        logger.info("Annotated all python files")
-        # even though python_files are mutated in place, we return them to be able to use the
-        # run method in a pipeline
-        return python_files
+
+    def annotate_concurrently(
+        self, python_files: List[PythonFile], metadata_provider: BaseMetaDataProvider
+    ) -> None:
+        """
+        Annotate all functions, classes and files of the repository using up to
+        llm.config.max_concurrent_requests parallel llm calls.
+        Each node sees the same annotations as in the sequential order, see build_annotation_graph.
+        """
+        nodes = build_annotation_graph(python_files)
+        logger.debug(
+            f"Annotating {len(nodes)} nodes with "
+            f"{self.llm.config.max_concurrent_requests} concurrent requests"
+        )
+
+        def annotate_node(node: AnnotationNode) -> bool:
+            if node.code_object is None:
+                python_file = node.python_file
+                return self.try_annotate(
+                    node.key,
+                    lambda: self.annotate_complete_file(
+                        python_file,
+                        metadata_provider.get_python_file_metadata(python_file),
+                    ),
+                )
+            code_object = node.code_object
+            return self.try_annotate(
+                node.key,
+                lambda: self.annotate_function_or_class(code_object, metadata_provider),
+            )
+
+        run_annotation_graph(
+            nodes,
+            annotate_node=annotate_node,
+            max_workers=self.llm.config.max_concurrent_requests,
+            description=lambda: f"Annotating: {self.llm.token_count_stats}",
+            retry_failed_nodes=self.retry_failed_annotations,
+        )
+
+    @property
+    def supports_prefetch(self) -> bool:
+        """
+        Cached answers can only be prefetched if the annotations are created via the get_*_prompt methods.
+        """
+        return all(
+            getattr(type(self), method_name) is getattr(BaseAnnotator, method_name)
+            for method_name in [
+                "annotate_function",
+                "annotate_class",
+                "annotate_complete_file",
+            ]
+        )
+
+    def prefetch_cached_annotations(
+        self, python_files: List[PythonFile], metadata_provider: BaseMetaDataProvider
+    ) -> None:
+        """
+        Set the llm_response of all nodes whose prompt is already in the llm cache, without calling the llm.
+
+        The prompt of a node depends on the annotations of its dependencies, so the annotation graph is
+        processed in waves: the prompts of all nodes whose dependencies are annotated are looked up with a
+        single batched query. Nodes that are not in the cache (and the nodes that depend on them) are annotated
+        as usual afterwards.
+        """
+        if self.llm.llm_cache is None or not self.supports_prefetch:
+            return
+        nodes = build_annotation_graph(python_files)
+        dependents: List[List[int]] = [[] for _ in nodes]
+        num_pending_dependencies = [0 for _ in nodes]
+        for node in nodes:
+            for dependency in node.dependencies:
+                if nodes[dependency].key not in self.restored_names:
+                    dependents[dependency].append(node.index)
+                    num_pending_dependencies[node.index] += 1
+        wave = [
+            node
+            for node in nodes
+            if num_pending_dependencies[node.index] == 0
+            and node.key not in self.restored_names
+        ]
+        while wave:
+            prompts = [self.get_node_prompt(node, metadata_provider) for node in wave]
+            lookups = [
+                (node, prompt)
+                for node, prompt in zip(wave, prompts)
+                if prompt is not None
+            ]
+            answers = self.llm.get_cached_answers([prompt for _, prompt in lookups])
+            # nodes without prompt are not annotated at all
+            annotated_nodes = [
+                node for node, prompt in zip(wave, prompts) if prompt is None
+            ]
+            for (node, _), answer in zip(lookups, answers):
+                if answer is None:
+                    continue
+                if node.code_object is None:
+                    node.python_file.llm_response = answer
+                else:
+                    node.code_object.llm_response = answer
+                annotated_nodes.append(node)
+
+            next_wave_indices = []
+            for node in annotated_nodes:
+                self.prefetched_names.add(node.key)
+                self.on_annotated(node.key)
+                for dependent in dependents[node.index]:
+                    num_pending_dependencies[dependent] -= 1
+                    if num_pending_dependencies[dependent] == 0:
+                        next_wave_indices.append(dependent)
+            wave = [nodes[index] for index in sorted(next_wave_indices)]
+        logger.info(
+            f"Prefetched {len(self.prefetched_names)} annotations from the llm cache"
+        )
+
+    def get_node_prompt(
+        self, node: AnnotationNode, metadata_provider: BaseMetaDataProvider
+    ) -> Optional[str]:
+        """
+        :return: None if the node is not annotated, i.e. nothing to look up in the llm cache
+        """
+        if node.code_object is not None and node.code_object.skip_reason is not None:
+            return None
+        if node.code_object is None:
+            return self.get_file_prompt(
+                node.python_file,
+                metadata_provider.get_python_file_metadata(node.python_file),
+            )
+        if isinstance(node.code_object, Function):
+            return self.get_function_prompt(
+                node.code_object,
+                metadata_provider.get_function_metadata(node.code_object),
+            )
+        return self.get_class_prompt(
+            node.code_object, metadata_provider.get_class_metadata(node.code_object)
+        )
 
     def annotate_python_file(
         self, python_file: PythonFile, metadata_provider: BaseMetaDataProvider
@@ -50,70 +246,171 @@ class BaseAnnotator:
         for function_or_class in get_sorted_functions_and_classes_and_methods(
             python_file
         ):
-            if isinstance(function_or_class, Function):
-                metadata = metadata_provider.get_function_metadata(function_or_class)
-                self.annotate_function(function_or_class, metadata)
-            elif isinstance(function_or_class, Class):
-                metadata = metadata_provider.get_class_metadata(function_or_class)
-                self.annotate_class(function_or_class, metadata)
+            self.try_annotate(
+                self.annotation_keys[id(function_or_class)],
+                partial(
+                    self.annotate_function_or_class,
+                    function_or_class,
+                    metadata_provider,
+                ),
+            )
+        self.try_annotate(
+            self.annotation_keys[id(python_file)],
+            lambda: self.annotate_complete_file(
+                python_file, metadata_provider.get_python_file_metadata(python_file)
+            ),
+        )
+
+    def get_fingerprint(self) -> str:
+        """
+        Annotations stored in the annotation state are only reused by annotators with the same fingerprint.
+        """
+        return get_hash(
+            type(self).__name__,
+            self.metadata_provider_class.__name__,
+            self.llm.config.model,
+            self.llm.config.system_prompt,
+            str(self.llm.config.max_prompt_token_length),
+        )
+
+    def try_annotate(self, key: str, annotate: Callable[[], None]) -> bool:
+        """
+        Run annotate and record it for a later retry if the llm call failed,
+        so that a single failing node does not abort the annotation of the repository.
+        :param key: unique key of the annotation, see get_annotation_keys
+        :return: False if the llm call failed
+        """
+        if key in self.restored_names or key in self.prefetched_names:
+            return True
+        try:
+            annotate()
+        except LLMCallFailed as e:
+            logger.warning(f"Annotating {key} failed, retrying at the end: {e}")
+            self.failed_annotations.append((key, annotate))
+            return False
+        self.on_annotated(key)
+        return True
+
+    def on_annotated(self, key: str) -> None:
+        if self.annotation_state is not None:
+            self.annotation_state.record_annotated(key)
+
+    def retry_failed_annotations(self) -> None:
+        """
+        Retry the failed annotations that were not retried yet.
+        """
+        failed_annotations = [
+            (key, annotate)
+            for key, annotate in self.failed_annotations
+            if key not in self.retried_names
+        ]
+        self.failed_annotations = [
+            (key, annotate)
+            for key, annotate in self.failed_annotations
+            if key in self.retried_names
+        ]
+        if len(failed_annotations) == 0:
+            return
+        logger.info(f"Retrying {len(failed_annotations)} failed annotations")
+        for key, annotate in failed_annotations:
+            self.retried_names.add(key)
+            try:
+                annotate()
+            except LLMCallFailed as e:
+                logger.error(f"Annotating {key} failed: {e}")
+                self.failed_annotations.append((key, annotate))
             else:
-                raise ValueError(f"Unknown type {type(function_or_class)}")
-        metadata = metadata_provider.get_python_file_metadata(python_file)
-        self.annotate_complete_file(python_file, metadata)
+                self.on_annotated(key)
+        if len(self.failed_annotations) > 0:
+            logger.error(
+                f"{len(self.failed_annotations)} annotations failed: "
+                + ", ".join(key for key, _ in self.failed_annotations)
+            )
+
+    def annotate_function_or_class(
+        self,
+        function_or_class: Function | Class,
+        metadata_provider: BaseMetaDataProvider,
+    ) -> None:
+        if function_or_class.skip_reason is not None:
+            # skipped by the triage, its docstring is used as annotation by the metadata providers
+            return
+        if isinstance(function_or_class, Function):
+            metadata = metadata_provider.get_function_metadata(function_or_class)
+            self.annotate_function(function_or_class, metadata)
+        elif isinstance(function_or_class, Class):
+            metadata = metadata_provider.get_class_metadata(function_or_class)
+            self.annotate_class(function_or_class, metadata)
+        else:
+            raise ValueError(f"Unknown type {type(function_or_class)}")
 
     def annotate_function(self, function: Function, metadata: str) -> None:
-        raise NotImplementedError
+        function.llm_response = self.llm(
+            prompt=self.get_function_prompt(function, metadata)
+        )
 
     def annotate_class(self, class_: Class, metadata: str) -> None:
-        raise NotImplementedError
+        class_.llm_response = self.llm(prompt=self.get_class_prompt(class_, metadata))
 
     def annotate_complete_file(self, python_file: PythonFile, metadata: str) -> None:
+        prompt = self.get_file_prompt(python_file, metadata)
+        if prompt is not None:
+            python_file.llm_response = self.llm(prompt=prompt)
+
+    def get_function_prompt(self, function: Function, metadata: str) -> str:
+        raise NotImplementedError
+
+    def get_class_prompt(self, class_: Class, metadata: str) -> str:
+        raise NotImplementedError
+
+    def get_file_prompt(self, python_file: PythonFile, metadata: str) -> Optional[str]:
+        """
+        :return: None if the complete file should not be annotated
+        """
         raise NotImplementedError
 
 
 class DefaultAnnotator(BaseAnnotator):
-    def annotate_function(self, function: Function, metadata: str) -> None:
+    def get_function_prompt(self, function: Function, metadata: str) -> str:
         code = "\n```python\n" + function.codestring + "\n```"
-        prompt = f"{metadata}{code}"
-        function.llm_response = self.llm(prompt=prompt)
+        return f"{metadata}{code}"
 
-    def annotate_class(self, class_: Class, metadata: str) -> None:
+    def get_class_prompt(self, class_: Class, metadata: str) -> str:
         code = "\n```python\n" + class_.codestring + "\n```"
-        prompt = f"{metadata}{code}"
-        class_.llm_response = self.llm(prompt=prompt)
+        return f"{metadata}{code}"
 
-    def annotate_complete_file(self, python_file: PythonFile, metadata: str) -> None:
+    def get_file_prompt(self, python_file: PythonFile, metadata: str) -> Optional[str]:
         # do not annotate the whole file by default
-        pass
+        return None
 
 
 class DefaultFileAnnotator(DefaultAnnotator):
-    def annotate_complete_file(self, python_file: PythonFile, metadata: str) -> None:
+    def get_file_prompt(self, python_file: PythonFile, metadata: str) -> Optional[str]:
         if len(python_file.codestring) < 1000:
             code = "\n```python\n" + python_file.codestring + "\n```"
-            prompt = f"{metadata}{code}"
-        else:
-            prompt = (
-                "The original code is too long, here is some important information:\n\n"
+            return f"{metadata}{code}"
+
+        prompt = (
+            "The original code is too long, here is some important information:\n\n"
+        )
+        prompt += metadata
+        if len(python_file.functions):
+            prompt += "\n\nFunction annotations:\n"
+            prompt += "\n".join(
+                [
+                    f"{function_annotation.complete_import_name}:{function_annotation.llm_response}"
+                    for function_annotation in python_file.functions
+                ]
             )
-            prompt += metadata
-            if len(python_file.functions):
-                prompt += "\n\nFunction annotations:\n"
-                prompt += "\n".join(
-                    [
-                        f"{function_annotation.complete_import_name}:{function_annotation.llm_response}"
-                        for function_annotation in python_file.functions
-                    ]
-                )
-            if len(python_file.classes):
-                prompt += "\n\nClass annotations:\n"
-                prompt += "\n".join(
-                    [
-                        class_annotation.llm_response
-                        for class_annotation in python_file.classes
-                    ]
-                )
-        python_file.llm_response = self.llm(prompt)
+        if len(python_file.classes):
+            prompt += "\n\nClass annotations:\n"
+            prompt += "\n".join(
+                [
+                    class_annotation.llm_response
+                    for class_annotation in python_file.classes
+                ]
+            )
+        return prompt
 
 
 class DebugAnnotator(BaseAnnotator):
@@ -121,21 +418,19 @@ class DebugAnnotator(BaseAnnotator):
         self,
         llm: BaseLLM,
         metadata_provider_class: Type[BaseMetaDataProvider],
+        annotation_state: Optional[AnnotationState] = None,
     ):
-        super().__init__(llm, metadata_provider_class)
+        super().__init__(llm, metadata_provider_class, annotation_state)
         assert isinstance(llm, DebugLLM), (
             "DebugAnnotator can only be used with DebugLLM model"
             " (otherwise can lead to inference costs)."
         )
 
-    def annotate_function(self, function: Function, metadata: str) -> None:
-        prompt = f"Import: {function.import_} \n Metadata: {metadata}"
-        function.llm_response = self.llm(prompt=prompt)
+    def get_function_prompt(self, function: Function, metadata: str) -> str:
+        return f"Import: {function.import_} \n Metadata: {metadata}"
 
-    def annotate_class(self, class_: Class, metadata) -> None:
-        prompt = f"Import name: {class_.import_} \n Metadata: {metadata}"
-        class_.llm_response = self.llm(prompt=prompt)
+    def get_class_prompt(self, class_: Class, metadata: str) -> str:
+        return f"Import name: {class_.import_} \n Metadata: {metadata}"
 
-    def annotate_complete_file(self, python_file: PythonFile, metadata) -> None:
-        prompt = f"Import name: {python_file.import_name} \n Metadata: {metadata}"
-        python_file.llm_response = self.llm(prompt=prompt)
+    def get_file_prompt(self, python_file: PythonFile, metadata: str) -> Optional[str]:
+        return f"Import name: {python_file.import_name} \n Metadata: {metadata}"
@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import Dict, List, Optional, Union
 
 from llm_docstring_generator.python_files.function_and_classes import (
     Class,
@@ -11,10 +11,50 @@ from llm_docstring_generator.sorters.sort_functions_and_classes import (
 )
 from loguru import logger
 
+# complete_import_name -> all code objects with this name, in the order of the python files
+CodeObjectIndex = Dict[str, List[CodeObject]]
+
 
 class BaseMetaDataProvider:
     def __init__(self, python_files: List[PythonFile]):
         self.python_files = python_files
+        # the indices reference the code objects and python files themselves, so annotations
+        # that are added later on are visible via the indices
+        self.code_object_index = build_code_object_index(python_files)
+        self.import_name2python_files: Dict[str, List[PythonFile]] = dict()
+        for python_file in python_files:
+            self.import_name2python_files.setdefault(
+                python_file.import_name, []
+            ).append(python_file)
+        self.python_file_positions = {
+            id(python_file): position
+            for position, python_file in enumerate(python_files)
+        }
+
+    def get_functions_and_classes_used(
+        self, code_object: CodeObject
+    ) -> List[CodeObject]:
+        return get_functions_and_classes_used(
+            code_object=code_object,
+            python_files=self.python_files,
+            code_object_index=self.code_object_index,
+        )
+
+    def get_parent_python_files(self, python_file: PythonFile) -> List[PythonFile]:
+        """
+        Get all python files imported by python_file, in the order of self.python_files
+        """
+        import_names = {
+            import_.import_name for import_ in python_file.import_dependencies
+        }
+        parent_python_files = [
+            parent_python_file
+            for import_name in import_names
+            for parent_python_file in self.import_name2python_files.get(import_name, [])
+        ]
+        return sorted(
+            parent_python_files, key=lambda pf: self.python_file_positions[id(pf)]
+        )
 
     def get_function_metadata(self, function: Union[Function | Class]) -> str:
         raise NotImplementedError
@@ -33,15 +73,13 @@ class DefaultMetaDataProvider(BaseMetaDataProvider):
         :param function: Function to get metadata for
         :return: Metadata string
         """
-        functions_and_classes_used = get_functions_and_classes_used(
-            code_object=function, python_files=self.python_files
-        )
+        functions_and_classes_used = self.get_functions_and_classes_used(function)
         if len(functions_and_classes_used) == 0:
             return ""
 
         metainfo = f"{function.complete_import_name} uses the following {len(functions_and_classes_used)} functions:\n"
         for idx, function_imported in enumerate(functions_and_classes_used):
-            llm_response = function_imported.llm_response
+            llm_response = get_annotation(function_imported)
             if llm_response == "":
                 logger.warning(
                     f"Function {function_imported.complete_import_name} that is used by {function.complete_import_name} "
@@ -59,11 +97,7 @@ class DefaultMetaDataProvider(BaseMetaDataProvider):
 
     def get_python_file_metadata(self, python_file: PythonFile) -> str:
         metainfo = f"Repository name: {python_file.repository_name}\n"
-        parent_python_files = [
-            pf
-            for pf in self.python_files
-            if pf.import_name in python_file.import_dependencies
-        ]
+        parent_python_files = self.get_parent_python_files(python_file)
         if len(parent_python_files) == 0:
             return metainfo
 
@@ -102,9 +136,7 @@ class ShortMetaDataProvider(BaseMetaDataProvider):
 
 class DebugMetaDataProvider(BaseMetaDataProvider):
     def get_function_metadata(self, function: Union[Function | Class]) -> str:
-        functions_used = get_functions_and_classes_used(
-            code_object=function, python_files=self.python_files
-        )
+        functions_used = self.get_functions_and_classes_used(function)
         with_annotations = "\n".join(
             [str(f.import_) for f in functions_used if f.llm_response != ""]
         )
@@ -119,12 +151,7 @@ class DebugMetaDataProvider(BaseMetaDataProvider):
         return self.get_function_metadata(class_)
 
     def get_python_file_metadata(self, python_file: PythonFile) -> str:
-        parent_python_files = [
-            pf
-            for pf in self.python_files
-            if pf.import_name
-            in [import_.import_name for import_ in python_file.import_dependencies]
-        ]
+        parent_python_files = self.get_parent_python_files(python_file)
         metainfo = f"Parent python files with annotations: {[pf.import_name for pf in parent_python_files if pf.llm_response != '']}\n"
         metainfo += f"Parent python files without annotations: {[pf.import_name for pf in parent_python_files if pf.llm_response == '']}\n"
         return metainfo
@@ -141,29 +168,49 @@ class NoMetaDataProvider(BaseMetaDataProvider):
         return ""
 
 
+def get_annotation(code_object: CodeObject) -> str:
+    """
+    The llm annotation of the code object or, if it was not annotated (e.g. skipped by the triage),
+    its existing docstring.
+    """
+    return code_object.llm_response or (code_object.docstring or "").strip()
+
+
+def build_code_object_index(python_files: List[PythonFile]) -> CodeObjectIndex:
+    code_object_index: CodeObjectIndex = dict()
+    for python_file in python_files:
+        for function_or_class in get_sorted_functions_and_classes_and_methods(
+            python_file
+        ):
+            code_object_index.setdefault(
+                function_or_class.complete_import_name, []
+            ).append(function_or_class)
+    return code_object_index
+
+
 def get_functions_and_classes_used(
-    code_object: CodeObject, python_files: List
+    code_object: CodeObject,
+    python_files: List,
+    code_object_index: Optional[CodeObjectIndex] = None,
 ) -> List[CodeObject]:
     """
     Get all functions used by code_object
     :param code_object: CodeObject to get functions used by
     :param python_files: List of all python files in the repository
-    :return: List of functions/methods used by this class
+    :param code_object_index: Prebuilt index of python_files (see build_code_object_index).
+        Built on the fly if not provided.
+    :return: List of functions/methods used by this class, sorted by their complete import name
     """
-    all_code_objects = [
-        function_or_class
-        for python_file in python_files
-        for function_or_class in get_sorted_functions_and_classes_and_methods(
-            python_file
-        )
-    ]
-    complete_import_dependencies = [
-        import_dependency.complete_import_name
-        for import_dependency in code_object.import_dependencies
-    ]
-    code_objects_used = [
-        code_object
-        for code_object in all_code_objects
-        if code_object.complete_import_name in complete_import_dependencies
+    if code_object_index is None:
+        code_object_index = build_code_object_index(python_files)
+    complete_import_dependencies = sorted(
+        {
+            import_dependency.complete_import_name
+            for import_dependency in code_object.import_dependencies
+        }
+    )
+    return [
+        code_object_used
+        for complete_import_name in complete_import_dependencies
+        for code_object_used in code_object_index.get(complete_import_name, [])
     ]
-    return sorted(code_objects_used, key=lambda x: x.complete_import_name)
@@ -0,0 +1,262 @@
+"""
+Annotator that annotates several small code objects in a single llm request.
+"""
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Tuple, Type
+
+from llm_docstring_generator.annotator.annotation_graph import (
+    AnnotationNode,
+    build_annotation_graph,
+    release_dependents,
+)
+from llm_docstring_generator.annotator.annotation_state import AnnotationState
+from llm_docstring_generator.annotator.code_annotator import DefaultAnnotator
+from llm_docstring_generator.annotator.metadata_provider import (
+    BaseMetaDataProvider,
+    DefaultMetaDataProvider,
+)
+from llm_docstring_generator.llm.llm import BaseLLM
+from llm_docstring_generator.llm.prompts import PACKED_PROMPT_INSTRUCTIONS
+from llm_docstring_generator.llm.resilience import LLMCallFailed
+from llm_docstring_generator.python_files.python_file import PythonFile
+from loguru import logger
+from tqdm import tqdm
+
+# (node, prompt of the node)
+PackItem = Tuple[AnnotationNode, str]
+
+
+class PackingAnnotator(DefaultAnnotator):
+    """
+    Annotates the small code objects of the same dependency wave (see build_annotation_graph) together,
+    so that the system prompt is sent once per pack instead of once per code object.
+    The llm answers a pack with a json object (name -> answer), code objects that are missing in the answer
+    are annotated one by one.
+
+    max_pack_tokens: Token budget of a packed prompt, capped at llm.config.max_prompt_token_length.
+    max_packed_object_tokens: Only prompts up to this number of tokens are packed, larger ones are sent alone.
+    max_pack_size: Maximum number of code objects per packed prompt.
+    """
+
+    def __init__(
+        self,
+        llm: BaseLLM,
+        metadata_provider_class: Type[BaseMetaDataProvider] = DefaultMetaDataProvider,
+        annotation_state: Optional[AnnotationState] = None,
+        max_pack_tokens: int = 2048,
+        max_packed_object_tokens: int = 256,
+        max_pack_size: int = 16,
+    ):
+        super().__init__(llm, metadata_provider_class, annotation_state)
+        self.max_pack_tokens = max_pack_tokens
+        self.max_packed_object_tokens = max_packed_object_tokens
+        self.max_pack_size = max_pack_size
+        # number of packed requests and of the code objects annotated by them
+        self.num_packed_requests = 0
+        self.num_packed_annotations = 0
+        self._pack_stats_lock = threading.Lock()
+
+    def annotate_python_files(
+        self, python_files: List[PythonFile], metadata_provider: BaseMetaDataProvider
+    ) -> None:
+        """
+        Annotate the annotation graph wave by wave. A wave contains all nodes whose dependencies are annotated,
+        its packs are sent with up to llm.config.max_concurrent_requests parallel llm calls.
+        As in run_annotation_graph, the dependents of failed nodes are held back until no other node is left,
+        then the failed annotations are retried and the dependents are released.
+        """
+        nodes = build_annotation_graph(python_files)
+        dependents: List[List[int]] = [[] for _ in nodes]
+        num_pending_dependencies = [len(node.dependencies) for node in nodes]
+        for node in nodes:
+            for dependency in node.dependencies:
+                dependents[dependency].append(node.index)
+        wave = [node for node in nodes if num_pending_dependencies[node.index] == 0]
+        # indices of the failed nodes whose dependents are held back
+        failed: List[int] = []
+
+        progress_bar = tqdm(total=len(nodes))
+        with ThreadPoolExecutor(
+            max_workers=self.llm.config.max_concurrent_requests
+        ) as executor:
+            while wave or failed:
+                next_wave_indices: List[int] = []
+                if not wave:
+                    logger.debug(
+                        f"Retrying {len(failed)} failed nodes before annotating their dependents"
+                    )
+                    self.retry_failed_annotations()
+                    for index in failed:
+                        release_dependents(
+                            index,
+                            dependents,
+                            num_pending_dependencies,
+                            next_wave_indices,
+                        )
+                    failed = []
+                    wave = [nodes[index] for index in sorted(next_wave_indices)]
+                    continue
+                progress_bar.set_description(
+                    f"Annotating: {self.llm.token_count_stats}"
+                )
+                packs = self.get_packs(wave, metadata_provider)
+                failed_indices = {
+                    index
+                    for pack_failed_indices in executor.map(self.annotate_pack, packs)
+                    for index in pack_failed_indices
+                }
+                progress_bar.update(len(wave))
+
+                for node in wave:
+                    if node.index in failed_indices:
+                        failed.append(node.index)
+                    else:
+                        release_dependents(
+                            node.index,
+                            dependents,
+                            num_pending_dependencies,
+                            next_wave_indices,
+                        )
+                wave = [nodes[index] for index in sorted(next_wave_indices)]
+        progress_bar.close()
+        logger.info(
+            f"Annotated {self.num_packed_annotations} code objects "
+            f"with {self.num_packed_requests} packed requests"
+        )
+
+    def get_packs(
+        self, wave: List[AnnotationNode], metadata_provider: BaseMetaDataProvider
+    ) -> List[List[PackItem]]:
+        """
+        Group the nodes of a wave into packs of up to max_pack_size small prompts within the token budget.
+        Large prompts get a pack of their own.
+        """
+        # header of the largest pack
+        max_pack_tokens = min(
+            self.max_pack_tokens, self.llm.config.max_prompt_token_length
+        ) - self.llm.tokenizer.count_tokens(
+            get_packed_prompt_header(self.max_pack_size)
+        )
+        packs: List[List[PackItem]] = []
+        pack: List[PackItem] = []
+        num_pack_tokens = 0
+        for node in wave:
+            if node.key in self.restored_names or node.key in self.prefetched_names:
+                continue
+            prompt = self.get_node_prompt(node, metadata_provider)
+            if prompt is None:
+                # nothing to annotate, e.g. files by default
+                self.on_annotated(node.key)
+                continue
+            num_tokens = self.llm.tokenizer.count_tokens(
+                get_pack_item_text(node, prompt)
+            )
+            # the answer of a pack is keyed by name, so same named nodes are not packed together
+            if num_tokens > self.max_packed_object_tokens or node.name in {
+                packed_node.name for packed_node, _ in pack
+            }:
+                packs.append([(node, prompt)])
+                continue
+            if pack and (
+                num_pack_tokens + num_tokens > max_pack_tokens
+                or len(pack) >= self.max_pack_size
+            ):
+                packs.append(pack)
+                pack, num_pack_tokens = [], 0
+            pack.append((node, prompt))
+            num_pack_tokens += num_tokens
+        if pack:
+            packs.append(pack)
+        return packs
+
+    def annotate_pack(self, pack: List[PackItem]) -> List[int]:
+        """
+        :return: the indices of the nodes whose annotation failed, they are retried later
+        """
+        if len(pack) == 1:
+            node, prompt = pack[0]
+            if self.try_annotate(node.key, partial(self.annotate_node, node, prompt)):
+                return []
+            return [node.index]
+        try:
+            answer = self.llm(prompt=get_packed_prompt(pack))
+        except LLMCallFailed as e:
+            logger.warning(
+                f"Annotating a pack of {len(pack)} code objects failed, "
+                f"retrying them one by one at the end: {e}"
+            )
+            for node, prompt in pack:
+                self.failed_annotations.append(
+                    (node.key, partial(self.annotate_node, node, prompt))
+                )
+            return [node.index for node, _ in pack]
+
+        answers = parse_packed_answer(answer, [node.name for node, _ in pack])
+        with self._pack_stats_lock:
+            self.num_packed_requests += 1
+            self.num_packed_annotations += len(answers)
+        if len(answers) < len(pack):
+            logger.debug(
+                f"Packed answer contained {len(answers)} of {len(pack)} code objects, "
+                f"annotating the others one by one"
+            )
+        failed_indices = []
+        for node, prompt in pack:
+            if node.name in answers:
+                set_llm_response(node, answers[node.name])
+                self.on_annotated(node.key)
+            elif not self.try_annotate(
+                node.key, partial(self.annotate_node, node, prompt)
+            ):
+                failed_indices.append(node.index)
+        return failed_indices
+
+    def annotate_node(self, node: AnnotationNode, prompt: str) -> None:
+        set_llm_response(node, self.llm(prompt=prompt))
+
+
+def set_llm_response(node: AnnotationNode, llm_response: str) -> None:
+    if node.code_object is None:
+        node.python_file.llm_response = llm_response
+    else:
+        node.code_object.llm_response = llm_response
+
+
+def get_pack_item_text(node: AnnotationNode, prompt: str) -> str:
+    return f"\n### {node.name}\n{prompt}\n"
+
+
+def get_packed_prompt_header(num_code_objects: int) -> str:
+    return PACKED_PROMPT_INSTRUCTIONS.format(num_code_objects=num_code_objects)
+
+
+def get_packed_prompt(pack: List[PackItem]) -> str:
+    return get_packed_prompt_header(len(pack)) + "".join(
+        get_pack_item_text(node, prompt) for node, prompt in pack
+    )
+
+
+def parse_packed_answer(answer: str, names: List[str]) -> Dict[str, str]:
+    """
+    Parse the json object of a packed answer, possibly wrapped in a markdown code block.
+    Returns the non-empty answers of the requested names, an empty dict if the answer is not valid json.
+    >>> parse_packed_answer('```json\\n{"a.f": "Docstring of f", "a.g": ""}\\n```', ["a.f", "a.g"])
+    {'a.f': 'Docstring of f'}
+    """
+    start, end = answer.find("{"), answer.rfind("}")
+    if start == -1 or end < start:
+        return dict()
+    try:
+        parsed_answer = json.loads(answer[start : end + 1])
+    except json.JSONDecodeError:
+        return dict()
+    if not isinstance(parsed_answer, dict):
+        return dict()
+    return {
+        name: parsed_answer[name]
+        for name in names
+        if isinstance(parsed_answer.get(name), str) and parsed_answer[name].strip()
+    }
@@ -0,0 +1,178 @@
+"""
+Triage of the code objects before the annotation.
+Code objects that don't need an llm annotation (e.g. because they are already documented) are classified with
+cheap static heuristics and marked via CodeObject.skip_reason. The annotators don't send them to the llm,
+their existing docstrings are still used as context for the code objects that use them (see get_annotation).
+"""
+import ast
+import re
+import sys
+import textwrap
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Optional
+
+from llm_docstring_generator.python_files.function_and_classes import (
+    CodeObject,
+    Function,
+)
+from llm_docstring_generator.python_files.python_file import PythonFile
+from llm_docstring_generator.sorters.sort_functions_and_classes import (
+    get_sorted_functions_and_classes_and_methods,
+)
+from loguru import logger
+
+DOCUMENTED = "documented"
+TRIVIAL = "trivial"
+PRIVATE = "private"
+TEST = "test"
+GENERATED = "generated"
+
+# markers of generated files, searched for in the first lines of a file
+GENERATED_FILE_MARKERS = re.compile(
+    r"@generated|do not edit|auto-?generated|generated by", re.IGNORECASE
+)
+GENERATED_FILE_SUFFIXES = ("_pb2", "_pb2_grpc")
+
+
+@dataclass
+class TriageConfig:
+    """
+    Categories of code objects that are not annotated by the llm.
+
+    skip_documented: Skip code objects with a docstring of at least min_docstring_length characters.
+    skip_trivial: Skip functions with at most max_trivial_lines lines of code (excluding signature and docstring),
+                  e.g. getters.
+    skip_private: Skip functions, methods and classes whose name starts with a single underscore.
+    skip_tests: Skip test functions and the code objects of test files.
+    skip_generated: Skip the code objects of generated files (e.g. protobuf files).
+    """
+
+    skip_documented: bool = True
+    min_docstring_length: int = 40
+    skip_trivial: bool = True
+    max_trivial_lines: int = 1
+    skip_private: bool = False
+    skip_tests: bool = True
+    skip_generated: bool = True
+
+
+class CodeTriage:
+    """
+    Pipeline step that sets the skip_reason of all code objects that don't need an llm annotation.
+    """
+
+    def __init__(self, triage_config: Optional[TriageConfig] = None):
+        self.triage_config = triage_config or TriageConfig()
+
+    def __call__(self, python_files: List[PythonFile]) -> List[PythonFile]:
+        skip_reasons: Counter = Counter()
+        num_code_objects = 0
+        for python_file in python_files:
+            file_skip_reason = self.get_file_skip_reason(python_file)
+            for code_object in get_sorted_functions_and_classes_and_methods(
+                python_file
+            ):
+                num_code_objects += 1
+                code_object.skip_reason = file_skip_reason or self.get_skip_reason(
+                    code_object
+                )
+                if code_object.skip_reason is not None:
+                    skip_reasons[code_object.skip_reason] += 1
+        logger.info(
+            f"Triage: skipping {sum(skip_reasons.values())} of {num_code_objects} functions/classes "
+            f"({', '.join(f'{reason}: {count}' for reason, count in skip_reasons.most_common())})"
+        )
+        return python_files
+
+    def get_file_skip_reason(self, python_file: PythonFile) -> Optional[str]:
+        if self.triage_config.skip_generated and is_generated_file(python_file):
+            return GENERATED
+        if self.triage_config.skip_tests and is_test_file(python_file):
+            return TEST
+        return None
+
+    def get_skip_reason(self, code_object: CodeObject) -> Optional[str]:
+        name = get_code_object_name(code_object)
+        if (
+            self.triage_config.skip_documented
+            and len((code_object.docstring or "").strip())
+            >= self.triage_config.min_docstring_length
+        ):
+            return DOCUMENTED
+        if (
+            self.triage_config.skip_tests
+            and isinstance(code_object, Function)
+            and name.startswith("test_")
+        ):
+            return TEST
+        if (
+            self.triage_config.skip_private
+            and name.startswith("_")
+            and not name.startswith("__")
+        ):
+            return PRIVATE
+        if (
+            self.triage_config.skip_trivial
+            and isinstance(code_object, Function)
+            and count_body_lines(code_object) <= self.triage_config.max_trivial_lines
+        ):
+            return TRIVIAL
+        return None
+
+
+def get_code_object_name(code_object: CodeObject) -> str:
+    return (
+        code_object.import_.method_name
+        or code_object.import_.class_or_function_name
+        or ""
+    )
+
+
+def is_generated_file(python_file: PythonFile) -> bool:
+    if python_file.import_name.endswith(GENERATED_FILE_SUFFIXES):
+        return True
+    head = "\n".join(python_file.codestring.split("\n", 10)[:10])
+    return GENERATED_FILE_MARKERS.search(head) is not None
+
+
+def is_test_file(python_file: PythonFile) -> bool:
+    module_names = python_file.import_name.split(".")
+    return (
+        module_names[-1].startswith("test_")
+        or module_names[-1].endswith("_test")
+        or any(module_name in ["test", "tests"] for module_name in module_names)
+    )
+
+
+def count_body_lines(function: Function) -> int:
+    """
+    Number of lines of code in the body of the function, without docstring, comments and blank lines.
+    Functions that can't be parsed on their own count as not trivial.
+    """
+    codestring = textwrap.dedent(function.codestring)
+    try:
+        module = ast.parse(codestring)
+    except SyntaxError:
+        return sys.maxsize
+    if len(module.body) != 1 or not isinstance(
+        module.body[0], (ast.FunctionDef, ast.AsyncFunctionDef)
+    ):
+        return sys.maxsize
+    body = module.body[0].body
+    if (
+        isinstance(body[0], ast.Expr)
+        and isinstance(body[0].value, ast.Constant)
+        and isinstance(body[0].value.value, str)
+    ):
+        body = body[1:]
+    if len(body) == 0:
+        return 0
+    body_lines = codestring.split("\n")[body[0].lineno - 1 : body[-1].end_lineno]
+    return len(
+        [
+            line
+            for line in body_lines
+            if line.strip() and not line.strip().startswith("#")
+        ]
+    )
@@ -0,0 +1,64 @@
+"""
+Interface of the storage of the llm answers.
+Implementations are LLMCache (any SQLAlchemy url, e.g. a local sqlite file or a shared postgresql/mysql database)
+and HTTPCacheBackend (a shared LLMCacheServer).
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Protocol, runtime_checkable
+
+# shared token of an LLMCacheServer, sent by HTTPCacheBackend in the CACHE_TOKEN_HEADER of each request
+CACHE_TOKEN_ENV_VAR = "LLM_CACHE_TOKEN"
+CACHE_TOKEN_HEADER = "X-LLM-Cache-Token"
+
+# fields of the rows of CacheBackend.put_many
+CACHE_ROW_FIELDS = (
+    "key",
+    "prompt",
+    "prompt_truncated",
+    "answer",
+    "system_prompt",
+    "model",
+)
+
+
+@dataclass
+class CacheBackendStats:
+    # None if the backend doesn't know the number of its entries
+    num_entries: Optional[int] = None
+    hits: int = 0
+    misses: int = 0
+
+
+def is_valid_cache_row(row: Any) -> bool:
+    return isinstance(row, dict) and all(
+        isinstance(row.get(field), str) for field in CACHE_ROW_FIELDS
+    )
+
+
+@runtime_checkable
+class CacheBackend(Protocol):
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """
+        :param keys: see get_cache_key
+        :return: key -> answer for all keys that are in the cache
+        """
+        ...
+
+    def put_many(self, rows: List[Dict[str, str]]) -> None:
+        """
+        :param rows: dicts with key, prompt, prompt_truncated, answer, system_prompt and model.
+            The answers may be written asynchronously, but must be returned by get_many immediately.
+        """
+        ...
+
+    def stats(self) -> CacheBackendStats:
+        ...
+
+    def flush(self) -> None:
+        """
+        Write all answers that have not been written yet.
+        """
+        ...
+
+    def close(self) -> None:
+        ...
@@ -3,22 +3,67 @@ Code adapted from https://github.com/optuna/optuna/blob/master/optuna/storages/_
 Allows for potential extensions, i.e. accessing the database from multiple processes using a suitable
 SQLAlchemy engine such as mysql or postgresql.
 """
+import atexit
 import hashlib
+import threading
+import time
+import zlib
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, Generator, Optional
+from typing import Any, Dict, Generator, List, Optional, Set
 
 import sqlalchemy
 import sqlalchemy.exc as sqlalchemy_exc
 import sqlalchemy.orm as sqlalchemy_orm
+from llm_docstring_generator.llm.cache_backend import (
+    CacheBackend,
+    CacheBackendStats,
+    is_valid_cache_row,
+)
+from llm_docstring_generator.llm.cache_key import get_cache_key
+from llm_docstring_generator.llm.cache_retention import RetentionPolicy
 from loguru import logger
-from sqlalchemy import Column, String, Text
+from sqlalchemy import Column, Float, ForeignKey, Integer, LargeBinary, String, Text
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
 
+# maximum number of keys per IN clause, SQLite limits the number of variables per query
+CHUNK_SIZE = 500
+# maximum number of rows per INSERT statement (each row uses one variable per column)
+INSERT_CHUNK_SIZE = 100
+# texts below this size (in bytes) are stored uncompressed, zlib doesn't pay off for them
+COMPRESSION_THRESHOLD = 256
+RAW_PREFIX = b"r"
+ZLIB_PREFIX = b"z"
+
+SQLITE_PRAGMAS = {
+    # readers don't block the writer and vice versa
+    "journal_mode": "WAL",
+    # in WAL mode, NORMAL only syncs at checkpoints and is still safe against application crashes
+    "synchronous": "NORMAL",
+    # negative values are in KiB, i.e. 64 MiB page cache per connection
+    "cache_size": -64 * 1024,
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+    # wait for the lock of another writer instead of failing with "database is locked"
+    "busy_timeout": 30_000,
+}
+
+# connections are handed out to the annotation threads by the pool, writes are serialized by the write lock
+SQLITE_ENGINE_KWARGS: Dict[str, Any] = dict(
+    connect_args=dict(check_same_thread=False, timeout=30),
+    pool_size=8,
+    max_overflow=24,
+)
+
 
 class CacheEntry(Base):  # type: ignore
+    """
+    Legacy storage format, only read until the database is compacted (see LLMCache.compact).
+    """
+
     __tablename__ = "llm_cache"
 
     key = Column(String, primary_key=True)
@@ -29,6 +74,89 @@ class CacheEntry(Base):  # type: ignore
     model = Column(Text)
 
 
+class SystemPrompt(Base):  # type: ignore
+    __tablename__ = "system_prompts"
+
+    id = Column(Integer, primary_key=True)
+    hash = Column(String, unique=True, nullable=False)
+    system_prompt = Column(Text)
+
+
+class CompressedCacheEntry(Base):  # type: ignore
+    """
+    Texts are stored with compress_text, system prompts are interned in the system_prompts table and
+    prompt_truncated is NULL if it equals the prompt.
+    """
+
+    __tablename__ = "llm_cache_v2"
+
+    key = Column(String, primary_key=True)
+    prompt = Column(LargeBinary)
+    prompt_truncated = Column(LargeBinary, nullable=True)
+    answer = Column(LargeBinary)
+    system_prompt_id = Column(Integer, ForeignKey("system_prompts.id"))
+    model = Column(Text)
+    # used by the retention policy, updated when the entry is written or read
+    last_accessed = Column(Float, index=True)
+    last_run_id = Column(Integer, index=True)
+
+
+class CacheRun(Base):  # type: ignore
+    __tablename__ = "cache_runs"
+
+    id = Column(Integer, primary_key=True)
+    started_at = Column(Float)
+
+
+STORAGE_TABLES = [
+    SystemPrompt.__table__,
+    CompressedCacheEntry.__table__,
+    CacheRun.__table__,
+]
+
+
+def compress_text(text: str) -> bytes:
+    data = text.encode()
+    if len(data) < COMPRESSION_THRESHOLD:
+        return RAW_PREFIX + data
+    return ZLIB_PREFIX + zlib.compress(data)
+
+
+def decompress_text(data: bytes) -> str:
+    if data.startswith(ZLIB_PREFIX):
+        return zlib.decompress(data[len(ZLIB_PREFIX) :]).decode()
+    return data[len(RAW_PREFIX) :].decode()
+
+
+def decompress_entry(entry: CompressedCacheEntry, system_prompt: str) -> Dict[str, str]:
+    prompt = decompress_text(bytes(entry.prompt))
+    return dict(
+        key=str(entry.key),
+        prompt=prompt,
+        prompt_truncated=(
+            prompt
+            if entry.prompt_truncated is None
+            else decompress_text(bytes(entry.prompt_truncated))
+        ),
+        answer=decompress_text(bytes(entry.answer)),
+        system_prompt=system_prompt,
+        model=str(entry.model),
+    )
+
+
+def apply_sqlite_profile(engine: sqlalchemy.engine.Engine) -> None:
+    """
+    Set SQLITE_PRAGMAS for every new connection of the engine.
+    """
+
+    @sqlalchemy.event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
 @contextmanager
 def _create_scoped_session(
     scoped_session: sqlalchemy_orm.scoped_session,
@@ -60,21 +188,86 @@ def _create_scoped_session(
 
 
 class LLMCache:
+    """
+    CacheBackend for SQLAlchemy databases, e.g. a local sqlite file or a postgresql database that is shared
+    by several workers.
+
+    Answers are saved with a write-behind queue: save_llm_answer only stages the answer, staged answers are
+    written in a single transaction once write_batch_size answers are staged, every write_interval seconds
+    and when the process exits. Staged answers are visible to get_llm_answer(s) immediately.
+    The default write_batch_size of 1 writes every answer immediately.
+
+    SQLite databases are tuned with SQLITE_PRAGMAS (WAL mode etc.), unless use_sqlite_profile is False.
+
+    Answers are written to the compressed llm_cache_v2 table. Databases created before that format still
+    contain the llm_cache table, which is used as a read-only fallback until compact is called.
+
+    Every LLMCache registers a run (unless register_run is False). Entries remember when and by which run
+    they were last used, so that they can be evicted according to a RetentionPolicy, see evict.
+    If a retention_policy is passed, entries are evicted in the background and when the cache is closed.
+    """
+
     def __init__(
         self,
         db_name: str,
         engine_kwargs: Optional[Dict[str, Any]] = None,
         *,
         skip_table_creation: bool = False,
+        write_batch_size: int = 1,
+        write_interval: float = 1.0,
+        use_sqlite_profile: bool = True,
+        retention_policy: Optional[RetentionPolicy] = None,
+        register_run: bool = True,
     ) -> None:
         self.engine = sqlalchemy.engine.create_engine(
             db_name, **(engine_kwargs or dict())
         )
+        if use_sqlite_profile and self.engine.dialect.name == "sqlite":
+            apply_sqlite_profile(self.engine)
         self.scoped_session = sqlalchemy_orm.scoped_session(
             sqlalchemy_orm.sessionmaker(bind=self.engine)
         )
         if not skip_table_creation:
-            Base.metadata.create_all(self.engine)
+            Base.metadata.create_all(self.engine, tables=STORAGE_TABLES)
+        self.has_legacy_table = sqlalchemy.inspect(self.engine).has_table(
+            CacheEntry.__tablename__
+        )
+        self.run_id = self.get_run_id(register_run)
+
+        self.write_batch_size = write_batch_size
+        self.write_interval = write_interval
+        # key -> row of the answers that are not written yet
+        self.pending_rows: Dict[str, Dict[str, str]] = dict()
+        # keys that have been read, their last access is written with the next flush
+        self.accessed_keys: Set[str] = set()
+        self.pending_lock = threading.Lock()
+        # only one thread writes at a time, so that rows are not written twice
+        self.write_lock = threading.Lock()
+        self.closed = threading.Event()
+        self.lookup_stats = CacheBackendStats()
+        self.retention_policy = (
+            retention_policy
+            if retention_policy is not None and retention_policy.enabled
+            else None
+        )
+        if write_batch_size > 1:
+            threading.Thread(target=self.flush_periodically, daemon=True).start()
+        if self.retention_policy is not None:
+            threading.Thread(target=self.evict_periodically, daemon=True).start()
+        if write_batch_size > 1 or self.retention_policy is not None:
+            atexit.register(self.close)
+
+    def get_run_id(self, register_run: bool) -> Optional[int]:
+        """
+        :return: the id of a newly registered run, or the id of the latest run if register_run is False
+        """
+        with _create_scoped_session(self.scoped_session) as session:
+            if not register_run:
+                return session.query(sqlalchemy.func.max(CacheRun.id)).scalar()
+            result = session.execute(
+                sqlalchemy.insert(CacheRun).values(started_at=time.time())
+            )
+            return result.inserted_primary_key[0]
 
     def get_llm_answer(
         self,
@@ -83,17 +276,65 @@ class LLMCache:
         system_prompt: str,
         model: str,
     ) -> Optional[str]:
+        key = get_cache_key(prompt, prompt_truncated, system_prompt, model)
+        with self.pending_lock:
+            pending_row = self.pending_rows.get(key)
+        if pending_row is not None:
+            logger.debug("Using cached result")
+            return pending_row["answer"]
         with _create_scoped_session(
             self.scoped_session, ignore_integrity_error=False
         ) as session:
-            hash_input = prompt + prompt_truncated + system_prompt + model
-            md5_hash = hashlib.md5(hash_input.encode()).hexdigest()
-            cache_entry = session.query(CacheEntry).get(md5_hash)
-            if cache_entry:
-                logger.debug("Using cached result")
-                return cache_entry.answer
+            answer = self.load_answers(session, [key]).get(key)
+        self.flush_accessed_keys_if_needed()
+        if answer:
+            logger.debug("Using cached result")
+            return answer
         return None
 
+    def get_llm_answers(self, keys: List[str]) -> Dict[str, str]:
+        """
+        Look up many keys (see get_cache_key) at once, using one query per CHUNK_SIZE keys.
+        :return: key -> answer for all keys that are in the cache
+        """
+        answers: Dict[str, str] = dict()
+        with self.pending_lock:
+            for key in keys:
+                if key in self.pending_rows:
+                    answers[key] = self.pending_rows[key]["answer"]
+        unique_keys = sorted(set(keys) - set(answers))
+        with _create_scoped_session(
+            self.scoped_session, ignore_integrity_error=False
+        ) as session:
+            for chunk_start in range(0, len(unique_keys), CHUNK_SIZE):
+                answers.update(
+                    self.load_answers(
+                        session, unique_keys[chunk_start : chunk_start + CHUNK_SIZE]
+                    )
+                )
+        self.flush_accessed_keys_if_needed()
+        return answers
+
+    def load_answers(
+        self, session: sqlalchemy_orm.Session, keys: List[str]
+    ) -> Dict[str, str]:
+        # only load the answers, not the (long) prompts of the entries
+        answers = {
+            key: decompress_text(answer)
+            for key, answer in session.query(
+                CompressedCacheEntry.key, CompressedCacheEntry.answer
+            ).filter(CompressedCacheEntry.key.in_(keys))
+        }
+        with self.pending_lock:
+            self.accessed_keys.update(answers)
+        missing_keys = [key for key in keys if key not in answers]
+        if self.has_legacy_table and len(missing_keys) > 0:
+            for key, answer in session.query(CacheEntry.key, CacheEntry.answer).filter(
+                CacheEntry.key.in_(missing_keys)
+            ):
+                answers[key] = answer
+        return answers
+
     def save_llm_answer(
         self,
         prompt: str,
@@ -102,23 +343,392 @@ class LLMCache:
         system_prompt: str,
         model: str,
     ) -> None:
-        hash_input = prompt + prompt_truncated + system_prompt + model
-        md5_hash = hashlib.md5(hash_input.encode()).hexdigest()
-        with _create_scoped_session(
-            self.scoped_session, ignore_integrity_error=False
-        ) as session:
-            cache_entry = CacheEntry(
-                key=md5_hash,
-                prompt=prompt,
-                prompt_truncated=prompt_truncated,
-                answer=answer,
-                system_prompt=system_prompt,
-                model=model,
+        self.put_many(
+            [
+                dict(
+                    key=get_cache_key(prompt, prompt_truncated, system_prompt, model),
+                    prompt=prompt,
+                    prompt_truncated=prompt_truncated,
+                    answer=answer,
+                    system_prompt=system_prompt,
+                    model=model,
+                )
+            ]
+        )
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        answers = self.get_llm_answers(keys)
+        with self.pending_lock:
+            self.lookup_stats.hits += len(answers)
+            self.lookup_stats.misses += len(set(keys)) - len(answers)
+        return answers
+
+    def put_many(self, rows: List[Dict[str, str]]) -> None:
+        with self.pending_lock:
+            for row in rows:
+                self.pending_rows[row["key"]] = row
+            batch_is_full = len(self.pending_rows) >= self.write_batch_size
+        if batch_is_full:
+            self.flush()
+
+    def stats(self) -> CacheBackendStats:
+        with _create_scoped_session(self.scoped_session) as session:
+            num_entries = session.query(CompressedCacheEntry.key).count()
+            if self.has_legacy_table:
+                num_entries += session.query(CacheEntry.key).count()
+        with self.pending_lock:
+            return CacheBackendStats(
+                num_entries=num_entries + len(self.pending_rows),
+                hits=self.lookup_stats.hits,
+                misses=self.lookup_stats.misses,
+            )
+
+    def flush_accessed_keys_if_needed(self) -> None:
+        with self.pending_lock:
+            num_accessed_keys = len(self.accessed_keys)
+        if num_accessed_keys >= CHUNK_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write all staged answers and the last access of the read keys in a single transaction.
+        Keys that already exist (e.g. written by another process) are skipped.
+        """
+        with self.write_lock:
+            with self.pending_lock:
+                rows = list(self.pending_rows.values())
+                # the access times are best effort, they are lost if the transaction fails
+                accessed_keys = sorted(self.accessed_keys)
+                self.accessed_keys = set()
+                # a malformed row would fail this and all following flushes, it is dropped instead
+                invalid_rows = [row for row in rows if not is_valid_cache_row(row)]
+                for row in invalid_rows:
+                    del self.pending_rows[row["key"]]
+            if len(invalid_rows) > 0:
+                logger.warning(
+                    f"Dropped {len(invalid_rows)} malformed rows from the llm cache"
+                )
+                rows = [row for row in rows if is_valid_cache_row(row)]
+            if len(rows) == 0 and len(accessed_keys) == 0:
+                return
+            with _create_scoped_session(
+                self.scoped_session, ignore_integrity_error=False
+            ) as session:
+                for chunk_start in range(0, len(rows), INSERT_CHUNK_SIZE):
+                    self.insert_rows(
+                        session,
+                        CompressedCacheEntry,
+                        self.compress_rows(
+                            session, rows[chunk_start : chunk_start + INSERT_CHUNK_SIZE]
+                        ),
+                        key_column="key",
+                    )
+                for chunk_start in range(0, len(accessed_keys), CHUNK_SIZE):
+                    session.execute(
+                        sqlalchemy.update(CompressedCacheEntry)
+                        .where(
+                            CompressedCacheEntry.key.in_(
+                                accessed_keys[chunk_start : chunk_start + CHUNK_SIZE]
+                            )
+                        )
+                        .values(last_accessed=time.time(), last_run_id=self.run_id)
+                    )
+            with self.pending_lock:
+                for row in rows:
+                    if self.pending_rows.get(row["key"]) is row:
+                        del self.pending_rows[row["key"]]
+        if len(rows) > 0:
+            logger.debug(f"Wrote {len(rows)} answers to the llm cache")
+
+    def compress_rows(
+        self, session: sqlalchemy_orm.Session, rows: List[Dict[str, str]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Convert rows with the columns of CacheEntry to rows of CompressedCacheEntry.
+        """
+        system_prompt_ids: Dict[str, int] = dict()
+        last_accessed = time.time()
+        compressed_rows = []
+        for row in rows:
+            system_prompt = row["system_prompt"]
+            if system_prompt not in system_prompt_ids:
+                system_prompt_ids[system_prompt] = self.get_system_prompt_id(
+                    session, system_prompt
+                )
+            compressed_rows.append(
+                dict(
+                    key=row["key"],
+                    prompt=compress_text(row["prompt"]),
+                    prompt_truncated=(
+                        None
+                        if row["prompt_truncated"] == row["prompt"]
+                        else compress_text(row["prompt_truncated"])
+                    ),
+                    answer=compress_text(row["answer"]),
+                    system_prompt_id=system_prompt_ids[system_prompt],
+                    model=row["model"],
+                    last_accessed=last_accessed,
+                    last_run_id=self.run_id,
+                )
+            )
+        return compressed_rows
+
+    def get_system_prompt_id(
+        self, session: sqlalchemy_orm.Session, system_prompt: str
+    ) -> int:
+        system_prompt_hash = hashlib.sha256(system_prompt.encode()).hexdigest()
+        self.insert_rows(
+            session,
+            SystemPrompt,
+            [dict(hash=system_prompt_hash, system_prompt=system_prompt)],
+            key_column="hash",
+        )
+        return (
+            session.query(SystemPrompt.id)
+            .filter(SystemPrompt.hash == system_prompt_hash)
+            .scalar()
+        )
+
+    def insert_rows(
+        self,
+        session: sqlalchemy_orm.Session,
+        entry_class: Any,
+        rows: List[Dict[str, Any]],
+        key_column: str,
+    ) -> None:
+        """
+        Insert the rows into the table of entry_class, rows whose key_column already exists are skipped.
+        """
+        dialect_name = self.engine.dialect.name
+        if dialect_name == "sqlite":
+            session.execute(
+                sqlite.insert(entry_class)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=[key_column])
             )
-            session.add(cache_entry)
+        elif dialect_name == "postgresql":
+            session.execute(
+                postgresql.insert(entry_class)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=[key_column])
+            )
+        else:
+            key_attribute = getattr(entry_class, key_column)
+            existing_keys = {
+                key
+                for (key,) in session.query(key_attribute).filter(
+                    key_attribute.in_([row[key_column] for row in rows])
+                )
+            }
+            new_rows = [row for row in rows if row[key_column] not in existing_keys]
+            if len(new_rows) > 0:
+                session.execute(sqlalchemy.insert(entry_class).values(new_rows))
+
+    def iter_entries(self) -> Generator[Dict[str, str], None, None]:
+        """
+        Iterate over all written entries with decompressed texts, e.g. to inspect the prompts.
+        """
+        last_key = ""
+        while True:
+            with _create_scoped_session(self.scoped_session) as session:
+                rows = [
+                    decompress_entry(entry, system_prompt)
+                    for entry, system_prompt in session.query(
+                        CompressedCacheEntry, SystemPrompt.system_prompt
+                    )
+                    .join(
+                        SystemPrompt,
+                        CompressedCacheEntry.system_prompt_id == SystemPrompt.id,
+                    )
+                    .filter(CompressedCacheEntry.key > last_key)
+                    .order_by(CompressedCacheEntry.key)
+                    .limit(CHUNK_SIZE)
+                ]
+            if len(rows) == 0:
+                break
+            yield from rows
+            last_key = rows[-1]["key"]
+        for legacy_rows in self.iter_legacy_row_chunks():
+            yield from legacy_rows
+
+    def iter_legacy_row_chunks(self) -> Generator[List[Dict[str, str]], None, None]:
+        if not self.has_legacy_table:
+            return
+        last_key = ""
+        while True:
+            with _create_scoped_session(self.scoped_session) as session:
+                rows = [
+                    dict(
+                        key=str(entry.key),
+                        prompt=str(entry.prompt or ""),
+                        prompt_truncated=str(entry.prompt_truncated or ""),
+                        answer=str(entry.answer or ""),
+                        system_prompt=str(entry.system_prompt or ""),
+                        model=str(entry.model or ""),
+                    )
+                    for entry in session.query(CacheEntry)
+                    .filter(CacheEntry.key > last_key)
+                    .order_by(CacheEntry.key)
+                    .limit(INSERT_CHUNK_SIZE)
+                ]
+            if len(rows) == 0:
+                break
+            yield rows
+            last_key = rows[-1]["key"]
+
+    def compact(self) -> None:
+        """
+        Migrate the entries of the legacy table to the compressed table, drop the legacy table and
+        VACUUM SQLite databases, so that the freed pages are returned to the file system.
+        """
+        self.flush()
+        if self.has_legacy_table:
+            num_migrated_entries = 0
+            for rows in self.iter_legacy_row_chunks():
+                with _create_scoped_session(self.scoped_session) as session:
+                    self.insert_rows(
+                        session,
+                        CompressedCacheEntry,
+                        self.compress_rows(session, rows),
+                        key_column="key",
+                    )
+                num_migrated_entries += len(rows)
+            logger.info(f"Migrated {num_migrated_entries} entries of the llm cache")
+            CacheEntry.__table__.drop(self.engine)
+            self.has_legacy_table = False
+        if self.engine.dialect.name == "sqlite":
+            with self.engine.connect().execution_options(
+                isolation_level="AUTOCOMMIT"
+            ) as connection:
+                connection.exec_driver_sql("VACUUM")
+                # the WAL file would keep the size of the vacuumed database otherwise
+                connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def flush_periodically(self) -> None:
+        while not self.closed.wait(self.write_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                # the answers stay staged and are written with the next flush
+                logger.error(f"Could not write to the llm cache due to {e}")
+
+    def evict(self, retention_policy: RetentionPolicy) -> int:
+        """
+        Delete all entries that violate the retention policy.
+        Freed pages are reused by SQLite, call compact to shrink the database file.
+        The entries of the legacy table are not evicted, call compact to migrate them.
+        :return: number of evicted entries
+        """
+        self.flush()
+        if self.has_legacy_table:
+            logger.warning(
+                "The entries of the legacy llm cache table are not evicted, compact the database to migrate them"
+            )
+        with self.write_lock:
+            with _create_scoped_session(self.scoped_session) as session:
+                expired_keys = self.get_expired_keys(session, retention_policy)
+                for chunk_start in range(0, len(expired_keys), CHUNK_SIZE):
+                    session.execute(
+                        sqlalchemy.delete(CompressedCacheEntry).where(
+                            CompressedCacheEntry.key.in_(
+                                expired_keys[chunk_start : chunk_start + CHUNK_SIZE]
+                            )
+                        )
+                    )
+        logger.info(f"Evicted {len(expired_keys)} entries from the llm cache")
+        return len(expired_keys)
+
+    def get_expired_keys(
+        self, session: sqlalchemy_orm.Session, retention_policy: RetentionPolicy
+    ) -> List[str]:
+        conditions = []
+        if retention_policy.max_age is not None:
+            conditions.append(
+                CompressedCacheEntry.last_accessed
+                < time.time() - retention_policy.max_age
+            )
+        if retention_policy.keep_last_runs is not None:
+            oldest_kept_run_id = (
+                session.query(CacheRun.id)
+                .order_by(CacheRun.id.desc())
+                .offset(max(retention_policy.keep_last_runs - 1, 0))
+                .limit(1)
+                .scalar()
+            )
+            if oldest_kept_run_id is not None:
+                conditions.append(
+                    sqlalchemy.or_(
+                        CompressedCacheEntry.last_run_id < oldest_kept_run_id,
+                        CompressedCacheEntry.last_run_id.is_(None),
+                    )
+                )
+                session.execute(
+                    sqlalchemy.delete(CacheRun).where(CacheRun.id < oldest_kept_run_id)
+                )
+        expired_keys: List[str] = []
+        if len(conditions) > 0:
+            expired_keys = [
+                key
+                for (key,) in session.query(CompressedCacheEntry.key).filter(
+                    sqlalchemy.or_(*conditions)
+                )
+            ]
+        if retention_policy.max_payload_size is not None:
+            already_expired_keys = set(expired_keys)
+            entry_size = (
+                sqlalchemy.func.length(CompressedCacheEntry.prompt)
+                + sqlalchemy.func.coalesce(
+                    sqlalchemy.func.length(CompressedCacheEntry.prompt_truncated), 0
+                )
+                + sqlalchemy.func.length(CompressedCacheEntry.answer)
+            )
+            total_size = 0
+            # keep the most recently used entries that fit into max_payload_size
+            for key, size in session.query(
+                CompressedCacheEntry.key, entry_size
+            ).order_by(CompressedCacheEntry.last_accessed.desc()):
+                if key in already_expired_keys:
+                    continue
+                total_size += size
+                if total_size > retention_policy.max_payload_size:
+                    expired_keys.append(key)
+        return expired_keys
 
+    def evict_periodically(self) -> None:
+        # the first eviction happens after eviction_interval, so that the entries can be used by this run first
+        assert self.retention_policy is not None
+        while not self.closed.wait(self.retention_policy.eviction_interval):
+            try:
+                self.evict(self.retention_policy)
+            except Exception as e:
+                logger.error(f"Could not evict entries from the llm cache due to {e}")
 
-def create_default_llm_cache(config) -> Optional[LLMCache]:
+    def close(self) -> None:
+        already_closed = self.closed.is_set()
+        self.closed.set()
+        self.flush()
+        if self.retention_policy is not None and not already_closed:
+            self.evict(self.retention_policy)
+
+
+def create_default_llm_cache(config) -> Optional[CacheBackend]:
+    """
+    Use the shared cache at config.cache_url if it is set (an http url of an LLMCacheServer or a
+    SQLAlchemy url), otherwise a sqlite database per model in config.db_root_path.
+    """
+    if config.cache_url is not None:
+        if config.cache_url.startswith(("http://", "https://")):
+            from llm_docstring_generator.llm.http_cache_backend import HTTPCacheBackend
+
+            return HTTPCacheBackend(config.cache_url)
+        return LLMCache(
+            db_name=config.cache_url,
+            engine_kwargs=(
+                SQLITE_ENGINE_KWARGS if config.cache_url.startswith("sqlite") else None
+            ),
+            write_batch_size=100,
+            retention_policy=config.cache_retention,
+        )
     if config.db_root_path is None:
         logger.warning("No cache database path provided. Caching disabled.")
         return None
@@ -128,5 +738,7 @@ def create_default_llm_cache(config) -> Optional[LLMCache]:
         db_name = str(db_path / "llm_cache.db").lstrip("/")
         return LLMCache(
             db_name=f"sqlite:////{db_name}",
-            engine_kwargs=dict(pool_size=50, max_overflow=0),
+            engine_kwargs=SQLITE_ENGINE_KWARGS,
+            write_batch_size=100,
+            retention_policy=config.cache_retention,
         )
@@ -0,0 +1,45 @@
+"""
+Keys of the llm answers in the cache backends.
+"""
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+# bump if the key layout changes, so that old and new keys can't collide
+CACHE_KEY_VERSION = "2"
+
+
+def get_cache_key(
+    prompt: str,
+    prompt_truncated: str,
+    system_prompt: str,
+    model: str,
+    generation_parameters: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Hash the length-prefixed fields, so that e.g. ("ab", "c") and ("a", "bc") get different keys.
+    generation_parameters are the backend-specific settings that change the answer (e.g. the url of the model).
+    """
+    cache_hash = hashlib.blake2b(digest_size=16)
+    for field in [
+        CACHE_KEY_VERSION,
+        prompt,
+        prompt_truncated,
+        system_prompt,
+        model,
+        json.dumps(generation_parameters or dict(), sort_keys=True),
+    ]:
+        data = field.encode()
+        cache_hash.update(len(data).to_bytes(8, "little"))
+        cache_hash.update(data)
+    return cache_hash.hexdigest()
+
+
+def get_legacy_cache_key(
+    prompt: str, prompt_truncated: str, system_prompt: str, model: str
+) -> str:
+    """
+    Key of the answers cached by previous versions, see LLMConfig.legacy_cache_key_fallback.
+    """
+    hash_input = prompt + prompt_truncated + system_prompt + model
+    return hashlib.md5(hash_input.encode()).hexdigest()
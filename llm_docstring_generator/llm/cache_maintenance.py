@@ -0,0 +1,69 @@
+"""
+Maintenance commands for the sqlite llm cache, see run_llm_cache_maintenance_command_line.py.
+"""
+from pathlib import Path
+from typing import Optional
+
+from llm_docstring_generator.llm.cache_database import SQLITE_ENGINE_KWARGS, LLMCache
+from llm_docstring_generator.llm.cache_retention import RetentionPolicy
+from loguru import logger
+
+
+def open_llm_cache(db_path: str) -> LLMCache:
+    path = Path(db_path).expanduser().resolve()
+    if not path.exists():
+        raise FileNotFoundError(f"{path} does not exist")
+    # maintenance commands are not runs, they must not shift the window of RetentionPolicy.keep_last_runs
+    return LLMCache(
+        db_name=f"sqlite:///{path}",
+        engine_kwargs=SQLITE_ENGINE_KWARGS,
+        register_run=False,
+    )
+
+
+def compact_llm_cache(db_path: str) -> None:
+    """
+    Migrate an llm cache database to the compressed storage format and VACUUM it.
+    :param db_path: path to the llm_cache.db file,
+        e.g. ~/.cache/llm_docstring_generator/my_project/llm_cache_gpt-4-turbo/llm_cache.db
+    """
+    llm_cache = open_llm_cache(db_path)
+    path = Path(db_path).expanduser().resolve()
+    size_before = path.stat().st_size
+    llm_cache.compact()
+    llm_cache.engine.dispose()
+    size_after = path.stat().st_size
+    logger.info(
+        f"Compacted {path} from {size_before / 1e6:.1f} MB to {size_after / 1e6:.1f} MB"
+    )
+
+
+def evict_llm_cache(
+    db_path: str,
+    max_payload_mb: Optional[float] = None,
+    max_age_days: Optional[float] = None,
+    keep_last_runs: Optional[int] = None,
+    compact: bool = False,
+) -> None:
+    """
+    Evict the entries of an llm cache database that violate the given retention policy.
+    :param db_path: path to the llm_cache.db file
+    :param max_payload_mb: maximum size of the compressed prompts and answers (not of the database file),
+                           least recently used entries are evicted first
+    :param max_age_days: evict entries that have not been used for max_age_days
+    :param keep_last_runs: evict entries that have not been used by the last keep_last_runs runs
+    :param compact: compact the database afterwards, so that the file shrinks
+    """
+    llm_cache = open_llm_cache(db_path)
+    llm_cache.evict(
+        RetentionPolicy(
+            max_payload_size=(
+                None if max_payload_mb is None else int(max_payload_mb * 1e6)
+            ),
+            max_age=None if max_age_days is None else max_age_days * 24 * 3600,
+            keep_last_runs=keep_last_runs,
+        )
+    )
+    llm_cache.engine.dispose()
+    if compact:
+        compact_llm_cache(db_path)
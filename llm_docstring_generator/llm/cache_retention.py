@@ -0,0 +1,29 @@
+"""
+Retention policy of the llm cache database, see LLMCache.evict.
+Only the compressed entries are evicted. The entries of the legacy table of databases created by older versions
+have no usage information and are kept until the database is compacted, which migrates them.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class RetentionPolicy:
+    # maximum total size in bytes of the compressed prompts and answers, least recently used entries are evicted
+    # first. This is not the size of the database file, which also contains the keys, indexes, interned system
+    # prompts and free pages (see LLMCache.compact)
+    max_payload_size: Optional[int] = None
+    # seconds after which entries that have not been used are evicted
+    max_age: Optional[float] = None
+    # only keep the entries that have been used by the last keep_last_runs runs (each LLMCache is a run)
+    keep_last_runs: Optional[int] = None
+    # seconds between two evictions in the background, entries are also evicted when the cache is closed
+    eviction_interval: float = 3600.0
+
+    @property
+    def enabled(self) -> bool:
+        return (
+            self.max_payload_size is not None
+            or self.max_age is not None
+            or self.keep_last_runs is not None
+        )
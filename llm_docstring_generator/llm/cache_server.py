@@ -0,0 +1,178 @@
+"""
+Minimal http server that shares a CacheBackend (usually an LLMCache on a local sqlite file) with several
+workers, see HTTPCacheBackend. All endpoints use JSON:
+- POST /get_many {"keys": [...]} -> {"answers": {key: answer}}
+- POST /put_many {"rows": [...]} -> {}
+- GET /stats -> {"num_entries": ..., "hits": ..., "misses": ...}
+If the server has a token, all requests must send it in the CACHE_TOKEN_HEADER.
+"""
+import dataclasses
+import functools
+import hmac
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from llm_docstring_generator.llm.cache_backend import (
+    CACHE_TOKEN_ENV_VAR,
+    CACHE_TOKEN_HEADER,
+    CacheBackend,
+    is_valid_cache_row,
+)
+from llm_docstring_generator.llm.cache_database import SQLITE_ENGINE_KWARGS, LLMCache
+from loguru import logger
+
+# maximum size of a request body, HTTPCacheBackend sends at most HTTP_CHUNK_SIZE rows per request
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+
+
+class CacheRequestHandler(BaseHTTPRequestHandler):
+    def __init__(
+        self,
+        *args,
+        backend: CacheBackend,
+        token: Optional[str] = None,
+        max_request_bytes: int = MAX_REQUEST_BYTES,
+        **kwargs,
+    ):
+        self.backend = backend
+        self.token = token
+        self.max_request_bytes = max_request_bytes
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self) -> None:
+        if not self.is_authorized():
+            return
+        if self.path != "/stats":
+            self.send_error(404)
+            return
+        self.send_json(dataclasses.asdict(self.backend.stats()))
+
+    def do_POST(self) -> None:
+        if not self.is_authorized():
+            return
+        if self.path not in ["/get_many", "/put_many"]:
+            self.send_error(404)
+            return
+        try:
+            content_length = int(self.headers["Content-Length"])
+        except (TypeError, ValueError):
+            self.send_error(411)
+            return
+        if not 0 <= content_length <= self.max_request_bytes:
+            self.send_error(413)
+            return
+        try:
+            request = json.loads(self.rfile.read(content_length))
+            if self.path == "/get_many":
+                response = dict(answers=self.backend.get_many(request["keys"]))
+            else:
+                rows = request["rows"]
+                # malformed rows are rejected before they are staged by the backend
+                if not isinstance(rows, list) or not all(
+                    is_valid_cache_row(row) for row in rows
+                ):
+                    raise ValueError("Invalid rows")
+                self.backend.put_many(rows)
+                response = dict()
+        except (KeyError, TypeError, ValueError):
+            self.send_error(400)
+            return
+        self.send_json(response)
+
+    def is_authorized(self) -> bool:
+        """
+        Check the token of the request if the server has a token, responds with 401 otherwise.
+        """
+        if self.token is None or hmac.compare_digest(
+            self.headers.get(CACHE_TOKEN_HEADER, "").encode(), self.token.encode()
+        ):
+            return True
+        self.send_error(401)
+        return False
+
+    def send_json(self, content: Dict[str, Any]) -> None:
+        body = json.dumps(content).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(format % args)
+
+
+class LLMCacheServer:
+    """
+    Serves the backend on host:port. Use port 0 to pick a free port, e.g. to run the server in-process in tests.
+    If token is set, only requests with this token are answered, see HTTPCacheBackend.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        token: Optional[str] = None,
+        max_request_bytes: int = MAX_REQUEST_BYTES,
+    ):
+        self.backend = backend
+        self.host = host
+        self.http_server = ThreadingHTTPServer(
+            (host, port),
+            functools.partial(
+                CacheRequestHandler,
+                backend=backend,
+                token=token,
+                max_request_bytes=max_request_bytes,
+            ),
+        )
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.http_server.server_port}"
+
+    def serve_forever(self) -> None:
+        logger.info(f"Serving the llm cache at {self.url}")
+        self.http_server.serve_forever()
+
+    def serve_in_background(self) -> None:
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def shutdown(self) -> None:
+        self.http_server.shutdown()
+        self.http_server.server_close()
+        self.backend.close()
+
+
+def serve_llm_cache(
+    db_name: str,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    token: Optional[str] = None,
+) -> None:
+    """
+    Serve an llm cache database to several workers, which set LLMConfig.cache_url to http://<host>:<port>.
+    :param db_name: SQLAlchemy url of the database, e.g. sqlite:////path/to/llm_cache.db
+    :param host: Only reachable from this machine by default, use e.g. 0.0.0.0 to serve other machines.
+    :param token: Token the workers must send, defaults to the environment variable LLM_CACHE_TOKEN,
+                  which the workers use as well.
+    """
+    token = token or os.environ.get(CACHE_TOKEN_ENV_VAR)
+    if token is None and host not in ["127.0.0.1", "localhost", "::1"]:
+        logger.warning(
+            f"Serving the llm cache on {host} without a token, set {CACHE_TOKEN_ENV_VAR} to require one"
+        )
+    llm_cache = LLMCache(
+        db_name=db_name,
+        engine_kwargs=SQLITE_ENGINE_KWARGS if db_name.startswith("sqlite") else None,
+        write_batch_size=100,
+    )
+    server = LLMCacheServer(llm_cache, host=host, port=port, token=token)
+    try:
+        server.serve_forever()
+    finally:
+        llm_cache.close()
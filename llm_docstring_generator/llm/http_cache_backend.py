@@ -0,0 +1,90 @@
+"""
+Client of an LLMCacheServer, so that several workers (e.g. CI runners) share their cached llm answers.
+"""
+import os
+import threading
+from typing import Dict, List, Optional
+
+import httpx
+from llm_docstring_generator.llm.cache_backend import (
+    CACHE_TOKEN_ENV_VAR,
+    CACHE_TOKEN_HEADER,
+    CacheBackendStats,
+)
+from loguru import logger
+
+# maximum number of keys/rows per request
+HTTP_CHUNK_SIZE = 500
+
+
+class HTTPCacheBackend:
+    """
+    CacheBackend that talks to an LLMCacheServer.
+    The shared cache is an optimization, so failed requests are logged and treated as cache misses.
+    The token of the server defaults to the environment variable LLM_CACHE_TOKEN.
+    """
+
+    def __init__(self, url: str, timeout: float = 30.0, token: Optional[str] = None):
+        self.url = url.rstrip("/")
+        token = token or os.environ.get(CACHE_TOKEN_ENV_VAR)
+        self.client = httpx.Client(
+            timeout=timeout, headers={CACHE_TOKEN_HEADER: token} if token else None
+        )
+        self.lookup_stats = CacheBackendStats()
+        self.stats_lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        answers: Dict[str, str] = dict()
+        unique_keys = sorted(set(keys))
+        for chunk_start in range(0, len(unique_keys), HTTP_CHUNK_SIZE):
+            try:
+                response = self.client.post(
+                    f"{self.url}/get_many",
+                    json=dict(
+                        keys=unique_keys[chunk_start : chunk_start + HTTP_CHUNK_SIZE]
+                    ),
+                )
+                response.raise_for_status()
+                answers.update(response.json()["answers"])
+            except httpx.HTTPError as e:
+                logger.warning(f"Could not read from the llm cache server due to {e!r}")
+        with self.stats_lock:
+            self.lookup_stats.hits += len(answers)
+            self.lookup_stats.misses += len(unique_keys) - len(answers)
+        return answers
+
+    def put_many(self, rows: List[Dict[str, str]]) -> None:
+        for chunk_start in range(0, len(rows), HTTP_CHUNK_SIZE):
+            try:
+                response = self.client.post(
+                    f"{self.url}/put_many",
+                    json=dict(rows=rows[chunk_start : chunk_start + HTTP_CHUNK_SIZE]),
+                )
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                logger.warning(f"Could not write to the llm cache server due to {e!r}")
+
+    def stats(self) -> CacheBackendStats:
+        """
+        :return: the number of entries of the server and the hits/misses of this client
+        """
+        num_entries = None
+        try:
+            response = self.client.get(f"{self.url}/stats")
+            response.raise_for_status()
+            num_entries = response.json()["num_entries"]
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not read from the llm cache server due to {e!r}")
+        with self.stats_lock:
+            return CacheBackendStats(
+                num_entries=num_entries,
+                hits=self.lookup_stats.hits,
+                misses=self.lookup_stats.misses,
+            )
+
+    def flush(self) -> None:
+        # answers are sent to the server immediately, the server batches the writes
+        pass
+
+    def close(self) -> None:
+        self.client.close()
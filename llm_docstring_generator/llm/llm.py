@@ -1,67 +1,377 @@
+import asyncio
 import os
-from typing import Optional
-
-import tiktoken
-from huggingface_hub import InferenceClient
-from llm_docstring_generator.llm.cache_database import (
-    LLMCache,
-    create_default_llm_cache,
-)
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from llm_docstring_generator.llm.cache_backend import CacheBackend
+from llm_docstring_generator.llm.cache_key import get_cache_key, get_legacy_cache_key
+from llm_docstring_generator.llm.event_loop_thread import EventLoopThread
 from llm_docstring_generator.llm.llm_config import LLMConfig
+from llm_docstring_generator.llm.memory_cache import CacheStats, MemoryCache
+from llm_docstring_generator.llm.rate_limiter import RateLimiter, RateLimitExceeded
+from llm_docstring_generator.llm.resilience import CircuitBreaker, LLMCallFailed
+from llm_docstring_generator.llm.tokenizer import Tokenizer
 from loguru import logger
-from openai import OpenAI
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI
 
 
 class BaseLLM:
     """
     Base class for a language model.
-    Uses a cache database to store the results of the llm calls.
+    Uses a cache backend (see CacheBackend) to store the results of the llm calls.
+    Recently used answers are additionally kept in memory, so that they don't need to be read from the database.
     """
 
     def __init__(self, config: LLMConfig, llm_cache=None):
         self.config = config
         self.num_prompt_tokens = 0
         self.num_answer_tokens = 0
+        # the llm may be called from several annotation threads at the same time
+        self._token_count_lock = threading.Lock()
+        # limits the requests in flight across all annotators that share this llm,
+        # e.g. the annotators of several repositories in run_batch_annotation_pipeline.
+        # Shared by the synchronous and the async calls
+        self.request_slots = threading.BoundedSemaphore(config.max_concurrent_requests)
+        # a single thread that waits for the request_slots on behalf of the async calls, in the order of the calls
+        self.request_slot_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="llm-request-slots"
+        )
+        self.rate_limiter = RateLimiter(
+            requests_per_minute=config.requests_per_minute,
+            tokens_per_minute=config.tokens_per_minute,
+        )
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=config.resilience.circuit_breaker_threshold,
+            reset_timeout=config.resilience.circuit_breaker_reset_timeout,
+        )
+
+        self.tokenizer = Tokenizer()
+        if llm_cache is None:
+            # sqlalchemy is only imported if the default cache is used
+            from llm_docstring_generator.llm.cache_database import (
+                create_default_llm_cache,
+            )
 
-        self.encoder = tiktoken.get_encoding("cl100k_base")
-        self.llm_cache: Optional[LLMCache] = llm_cache or create_default_llm_cache(
-            config
+            llm_cache = create_default_llm_cache(config)
+        self.llm_cache: Optional[CacheBackend] = llm_cache
+        self.memory_cache = MemoryCache(
+            max_entries=config.memory_cache_max_entries,
+            max_bytes=config.memory_cache_max_bytes,
         )
+        self.database_cache_stats = CacheStats()
 
     @property
     def token_count_stats(self) -> str:
         return f"(Approx.) total tokens used: Prompt tokens: {self.num_prompt_tokens}, Answer tokens: {self.num_answer_tokens}"
 
+    @property
+    def memory_cache_stats(self) -> CacheStats:
+        return self.memory_cache.stats
+
+    @property
+    def cache_stats(self) -> str:
+        return f"Memory cache: {self.memory_cache_stats}, database cache: {self.database_cache_stats}"
+
+    @property
+    def generation_parameters(self) -> Dict[str, Any]:
+        """
+        Settings of the backend that change the answers besides the model and the system prompt,
+        they are part of the cache key.
+        """
+        return dict()
+
+    def get_prompt_cache_key(self, prompt: str, prompt_truncated: str) -> str:
+        return get_cache_key(
+            prompt,
+            prompt_truncated,
+            self.config.system_prompt,
+            self.config.model,
+            self.generation_parameters,
+        )
+
     def __call__(self, prompt: str) -> str:
-        prompt_truncated = self.encoder.decode(
-            self.encoder.encode(prompt, allowed_special="all")[
-                : self.config.max_prompt_token_length
-            ]
+        prompt_truncated, num_prompt_tokens = self.truncate_prompt(prompt)
+        key = self.get_prompt_cache_key(prompt, prompt_truncated)
+        answer = self.get_cached_answer(key, prompt, prompt_truncated)
+        if answer is None:
+            answer = self.call_llm_with_retries(prompt_truncated, num_prompt_tokens)
+            self.save_answer(key, prompt, prompt_truncated, answer)
+        else:
+            self.count_answer_tokens(answer)
+        return answer
+
+    async def acall(self, prompt: str) -> str:
+        """
+        Async variant of __call__. Uses acall_llm to query the model, so that many requests can be in flight
+        at the same time.
+        """
+        prompt_truncated, num_prompt_tokens = self.truncate_prompt(prompt)
+        key = self.get_prompt_cache_key(prompt, prompt_truncated)
+        answer = self.get_cached_answer(key, prompt, prompt_truncated)
+        if answer is None:
+            answer = await self.acall_llm_with_retries(
+                prompt_truncated, num_prompt_tokens
+            )
+            self.save_answer(key, prompt, prompt_truncated, answer)
+        else:
+            self.count_answer_tokens(answer)
+        return answer
+
+    def call_llm_with_retries(self, prompt: str, num_prompt_tokens: int) -> str:
+        """
+        Call the llm once the circuit breaker is closed and the request fits into the rate limits.
+        Requests rejected due to the provider's rate limits are queued again, failed requests are retried
+        with exponential backoff. Raises LLMCallFailed if all attempts failed or the request was rejected
+        due to the rate limits in all attempts.
+        """
+        attempt = 0
+        num_rate_limit_errors = 0
+        while True:
+            self.circuit_breaker.wait_until_closed()
+            self.rate_limiter.acquire(num_prompt_tokens)
+            try:
+                with self.request_slots:
+                    answer = self.call_llm(prompt)
+            except RateLimitExceeded as e:
+                # the backend is up, but we need to slow down
+                self.circuit_breaker.record_success()
+                self.rate_limiter.register_rate_limit_error(e)
+                num_rate_limit_errors += 1
+                self.raise_if_rate_limited_too_often(e, num_rate_limit_errors)
+                time.sleep(
+                    self.config.resilience.get_backoff(num_rate_limit_errors - 1)
+                )
+                continue
+            except Exception as e:
+                self.circuit_breaker.record_failure()
+                attempt += 1
+                self.raise_if_final_attempt(e, attempt)
+                time.sleep(self.config.resilience.get_backoff(attempt - 1))
+                continue
+            self.circuit_breaker.record_success()
+            self.rate_limiter.record_tokens(self.count_answer_tokens(answer))
+            return answer
+
+    async def acall_llm_with_retries(self, prompt: str, num_prompt_tokens: int) -> str:
+        attempt = 0
+        num_rate_limit_errors = 0
+        while True:
+            await self.circuit_breaker.await_until_closed()
+            await self.rate_limiter.aacquire(num_prompt_tokens)
+            try:
+                await self.acquire_request_slot()
+                try:
+                    answer = await self.acall_llm(prompt)
+                finally:
+                    self.request_slots.release()
+            except RateLimitExceeded as e:
+                self.circuit_breaker.record_success()
+                self.rate_limiter.register_rate_limit_error(e)
+                num_rate_limit_errors += 1
+                self.raise_if_rate_limited_too_often(e, num_rate_limit_errors)
+                await asyncio.sleep(
+                    self.config.resilience.get_backoff(num_rate_limit_errors - 1)
+                )
+                continue
+            except Exception as e:
+                self.circuit_breaker.record_failure()
+                attempt += 1
+                self.raise_if_final_attempt(e, attempt)
+                await asyncio.sleep(self.config.resilience.get_backoff(attempt - 1))
+                continue
+            self.circuit_breaker.record_success()
+            self.rate_limiter.record_tokens(self.count_answer_tokens(answer))
+            return answer
+
+    async def acquire_request_slot(self) -> None:
+        """
+        Wait for one of the request_slots without blocking the event loop.
+        """
+        future = self.request_slot_executor.submit(self.request_slots.acquire)
+
+        def release_if_acquired(future: Future) -> None:
+            if not future.cancelled():
+                self.request_slots.release()
+
+        try:
+            await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # waits that already started can't be cancelled, their slot is given back once it is acquired
+            future.add_done_callback(release_if_acquired)
+            raise
+
+    def raise_if_final_attempt(self, error: Exception, attempt: int) -> None:
+        if not self.is_retryable_error(error):
+            raise LLMCallFailed(
+                f"LLM call failed with non-retryable error: {error!r}"
+            ) from error
+        if attempt >= self.config.resilience.max_attempts:
+            raise LLMCallFailed(
+                f"LLM call failed after {attempt} attempts: {error!r}"
+            ) from error
+        logger.warning(
+            f"LLM call failed (attempt {attempt}/{self.config.resilience.max_attempts}): {error!r}"
+        )
+
+    def raise_if_rate_limited_too_often(
+        self, error: RateLimitExceeded, num_rate_limit_errors: int
+    ) -> None:
+        """
+        Rate limit errors don't count as failures of the backend, but are bounded by the same number of attempts.
+        """
+        if num_rate_limit_errors >= self.config.resilience.max_attempts:
+            raise LLMCallFailed(
+                f"LLM call was rejected due to the rate limits {num_rate_limit_errors} times: {error!r}"
+            ) from error
+
+    def is_retryable_error(self, error: Exception) -> bool:
+        return True
+
+    def truncate_prompt(self, prompt: str) -> Tuple[str, int]:
+        prompt_truncated, num_prompt_tokens = self.get_truncated_prompt(prompt)
+        with self._token_count_lock:
+            self.num_prompt_tokens += num_prompt_tokens
+        return prompt_truncated, num_prompt_tokens
+
+    def get_truncated_prompt(self, prompt: str) -> Tuple[str, int]:
+        return self.tokenizer.truncate(
+            prompt, self.config.system_prompt, self.config.max_prompt_token_length
         )
-        self.num_prompt_tokens += self.get_num_tokens(prompt_truncated, is_prompt=True)
+
+    def get_cached_answer(
+        self, key: str, prompt: str, prompt_truncated: str
+    ) -> Optional[str]:
         if self.llm_cache is None:
-            answer = self.call_llm(prompt_truncated)
-        else:
-            cache_entry = self.llm_cache.get_llm_answer(
-                prompt=prompt,
-                prompt_truncated=prompt_truncated,
-                system_prompt=self.config.system_prompt,
-                model=self.config.model,
+            return None
+        answer = self.memory_cache.get_answer(key)
+        if answer is None:
+            answer = self.get_database_answers({key: (prompt, prompt_truncated)}).get(
+                key
             )
-            if cache_entry:
-                logger.debug("Using cached result")
-                answer = cache_entry
+            self.count_database_lookups(num_hits=int(bool(answer)), num_lookups=1)
+            if answer:
+                self.memory_cache.set_answer(key, answer)
+        if answer:
+            logger.debug("Using cached result")
+            return answer
+        return None
+
+    def get_database_answers(
+        self, prompts_by_key: Dict[str, Tuple[str, str]]
+    ) -> Dict[str, str]:
+        """
+        Look up the answers in the cache backend. If LLMConfig.legacy_cache_key_fallback is set, answers that
+        are only stored under their legacy key are looked up as well and stored under their current key.
+        :param prompts_by_key: key -> (prompt, prompt_truncated)
+        """
+        assert self.llm_cache is not None
+        answers = self.llm_cache.get_many(list(prompts_by_key))
+        if not self.config.legacy_cache_key_fallback:
+            return answers
+        keys_by_legacy_key = {
+            get_legacy_cache_key(
+                prompt, prompt_truncated, self.config.system_prompt, self.config.model
+            ): key
+            for key, (prompt, prompt_truncated) in prompts_by_key.items()
+            if key not in answers
+        }
+        if len(keys_by_legacy_key) == 0:
+            return answers
+        legacy_answers = self.llm_cache.get_many(list(keys_by_legacy_key))
+        rows = []
+        for legacy_key, answer in legacy_answers.items():
+            key = keys_by_legacy_key[legacy_key]
+            prompt, prompt_truncated = prompts_by_key[key]
+            answers[key] = answer
+            rows.append(
+                dict(
+                    key=key,
+                    prompt=prompt,
+                    prompt_truncated=prompt_truncated,
+                    answer=answer,
+                    system_prompt=self.config.system_prompt,
+                    model=self.config.model,
+                )
+            )
+        if len(rows) > 0:
+            self.llm_cache.put_many(rows)
+        return answers
+
+    def count_database_lookups(self, num_hits: int, num_lookups: int) -> None:
+        with self._token_count_lock:
+            self.database_cache_stats.hits += num_hits
+            self.database_cache_stats.misses += num_lookups - num_hits
+
+    def get_cached_answers(self, prompts: List[str]) -> List[Optional[str]]:
+        """
+        Look up the cached answers of many prompts with a single batched query.
+        Token counts are only updated for the prompts that are in the cache.
+        :return: the cached answer for each prompt, None if it is not in the cache
+        """
+        if self.llm_cache is None:
+            return [None] * len(prompts)
+        truncated_prompts = [self.get_truncated_prompt(prompt) for prompt in prompts]
+        keys = [
+            self.get_prompt_cache_key(prompt, prompt_truncated)
+            for prompt, (prompt_truncated, _) in zip(prompts, truncated_prompts)
+        ]
+        cached_answers = dict()
+        prompts_by_key = dict()
+        for key, prompt, (prompt_truncated, _) in zip(keys, prompts, truncated_prompts):
+            answer = self.memory_cache.get_answer(key)
+            if answer is not None:
+                cached_answers[key] = answer
             else:
-                answer = self.call_llm(prompt_truncated)
-                self.llm_cache.save_llm_answer(
+                prompts_by_key[key] = (prompt, prompt_truncated)
+        database_answers = self.get_database_answers(prompts_by_key)
+        self.count_database_lookups(
+            num_hits=len(database_answers), num_lookups=len(prompts_by_key)
+        )
+        for key, answer in database_answers.items():
+            self.memory_cache.set_answer(key, answer)
+            cached_answers[key] = answer
+
+        answers: List[Optional[str]] = []
+        for key, (_, num_prompt_tokens) in zip(keys, truncated_prompts):
+            answer = cached_answers.get(key)
+            if answer:
+                with self._token_count_lock:
+                    self.num_prompt_tokens += num_prompt_tokens
+                self.count_answer_tokens(answer)
+                answers.append(answer)
+            else:
+                answers.append(None)
+        return answers
+
+    def save_answer(
+        self, key: str, prompt: str, prompt_truncated: str, answer: str
+    ) -> None:
+        if self.llm_cache is None:
+            return
+        self.memory_cache.set_answer(key, answer)
+        self.llm_cache.put_many(
+            [
+                dict(
+                    key=key,
                     prompt=prompt,
                     prompt_truncated=prompt_truncated,
                     answer=answer,
                     system_prompt=self.config.system_prompt,
                     model=self.config.model,
                 )
-        self.num_answer_tokens += self.get_num_tokens(answer, is_prompt=False)
-        return answer
+            ]
+        )
+
+    def count_answer_tokens(self, answer: str) -> int:
+        num_answer_tokens = self.get_num_tokens(answer, is_prompt=False)
+        with self._token_count_lock:
+            self.num_answer_tokens += num_answer_tokens
+        return num_answer_tokens
 
     def get_num_tokens(self, text: str, is_prompt: bool):
         """
@@ -69,50 +379,167 @@ class BaseLLM:
         Note that this method is not totally accurate, as it does not take into account special tokens of the model.
         For now, we will use it as an approximation.
         """
+        num_tokens = self.tokenizer.count_tokens(text)
         if is_prompt:
-            text = self.config.system_prompt + text
-        return len(self.encoder.encode(text, allowed_special="all"))
+            num_tokens += self.tokenizer.count_system_prompt_tokens(
+                self.config.system_prompt
+            )
+        return num_tokens
 
     def call_llm(self, prompt: str) -> str:
         return "This is a placeholder response, you should not see this message. If you do, something went wrong."
 
+    async def acall_llm(self, prompt: str) -> str:
+        """
+        Async variant of call_llm. By default, the blocking call_llm is run in a worker thread.
+        Backends with a native async client should overwrite this method.
+        """
+        return await asyncio.to_thread(self.call_llm, prompt)
+
+    def close(self) -> None:
+        """
+        Release the resources (e.g. http connections) held by the llm.
+        """
+        self.request_slot_executor.shutdown(wait=False, cancel_futures=True)
+        if self.llm_cache is not None:
+            self.llm_cache.flush()
+
 
 class DebugLLM(BaseLLM):
     def call_llm(self, prompt: str) -> str:
         return prompt
 
+    async def acall_llm(self, prompt: str) -> str:
+        return prompt
+
+
+class AsyncClientLLM(BaseLLM):
+    """
+    Base class for llms that are queried via a native async http client.
+
+    Each instance owns one event loop thread and one pooled async client that lives inside this loop.
+    Both the synchronous facade (call_llm, used by the annotators) and acall_llm submit their requests
+    to this loop, so that all requests of an instance share the same connection pool.
+    """
 
-class OpenAILLM(BaseLLM):
     def __init__(self, config: LLMConfig, llm_cache=None):
         super().__init__(config=config, llm_cache=llm_cache)
-        self.client = OpenAI(
-            base_url=os.environ.get("OPENAI_API_URL", None),
-            api_key=os.environ["OPENAI_API_KEY"],
-        )
+        self.event_loop_thread = EventLoopThread()
+        self._async_client = None
 
-        # https://github.com/openai/openai-cookbook/blob/main/examples/How_to_count_tokens_with_tiktoken.ipynb
-        try:
-            self.encoder = tiktoken.encoding_for_model(self.config.model)
-        except Exception as e:
-            logger.error(
-                f"Error when trying to get the encoder for the model,"
-                f" falling back to cl100k_base: {e}"
-            )
-            self.encoder = tiktoken.get_encoding("cl100k_base")
+    @property
+    def async_client(self):
+        # must only be accessed from within self.event_loop_thread
+        if self._async_client is None:
+            self._async_client = self.create_async_client()
+        return self._async_client
+
+    @property
+    def max_connections(self) -> int:
+        return max(100, self.config.max_concurrent_requests)
+
+    def create_async_client(self):
+        raise NotImplementedError
+
+    async def generate(self, prompt: str) -> str:
+        """
+        Query the model using self.async_client. Runs inside self.event_loop_thread.
+        """
+        raise NotImplementedError
+
+    async def close_async_client(self) -> None:
+        raise NotImplementedError
+
+    async def generate_with_timeout(self, prompt: str) -> str:
+        return await asyncio.wait_for(
+            self.generate(prompt), timeout=self.config.resilience.timeout
+        )
 
     def call_llm(self, prompt: str) -> str:
-        response = self.client.chat.completions.create(
-            model=self.config.model,
-            messages=[
-                {"role": "system", "content": self.config.system_prompt},
-                {"role": "user", "content": prompt},
-            ],
+        return self.event_loop_thread.run(self.generate_with_timeout(prompt))
+
+    async def acall_llm(self, prompt: str) -> str:
+        return await self.event_loop_thread.arun(self.generate_with_timeout(prompt))
+
+    def is_retryable_error(self, error: Exception) -> bool:
+        # client errors such as authentication errors or malformed requests won't succeed on retry
+        import httpx
+        from openai import APIStatusError
+
+        if isinstance(error, (APIStatusError, httpx.HTTPStatusError)):
+            return error.response.status_code >= 500 or error.response.status_code in [
+                408,
+                409,
+            ]
+        return True
+
+    def close(self) -> None:
+        if self._async_client is not None:
+            self.event_loop_thread.run(self.close_async_client())
+            self._async_client = None
+        self.event_loop_thread.close()
+        super().close()
+
+
+class OpenAILLM(AsyncClientLLM):
+    def __init__(self, config: LLMConfig, llm_cache=None):
+        super().__init__(config=config, llm_cache=llm_cache)
+        self.base_url = os.environ.get("OPENAI_API_URL", None)
+        self.api_key = os.environ["OPENAI_API_KEY"]
+
+        self.tokenizer = Tokenizer(model=self.config.model)
+
+    @property
+    def generation_parameters(self) -> Dict[str, Any]:
+        # a custom OPENAI_API_URL may serve different models under the same name
+        return dict() if self.base_url is None else dict(base_url=self.base_url)
+
+    def create_async_client(self) -> "AsyncOpenAI":
+        import httpx
+        from openai import AsyncOpenAI
+
+        return AsyncOpenAI(
+            base_url=self.base_url,
+            api_key=self.api_key,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                timeout=httpx.Timeout(self.config.resilience.timeout, connect=5.0),
+            ),
+            # retries are handled by BaseLLM.call_llm_with_retries
+            max_retries=0,
         )
+
+    async def generate(self, prompt: str) -> str:
+        from openai import RateLimitError
+
+        try:
+            raw_response = (
+                await self.async_client.chat.completions.with_raw_response.create(
+                    model=self.config.model,
+                    messages=[
+                        {"role": "system", "content": self.config.system_prompt},
+                        {"role": "user", "content": prompt},
+                    ],
+                )
+            )
+        except RateLimitError as e:
+            # insufficient_quota is also reported as 429, but waiting does not help
+            if e.code == "insufficient_quota":
+                raise
+            raise RateLimitExceeded(str(e), headers=e.response.headers) from e
+        self.rate_limiter.update_from_headers(raw_response.headers)
+        response = raw_response.parse()
         answer = str(response.choices[0].message.content)
         return answer
 
+    async def close_async_client(self) -> None:
+        await self.async_client.close()
 
-class LocalTGILLM(BaseLLM):
+
+class LocalTGILLM(AsyncClientLLM):
     """
     Run a local llm, e.g. run mistral-instruct locally:
 
@@ -123,13 +550,14 @@ class LocalTGILLM(BaseLLM):
 
     See tgi documentation: https://huggingface.co/docs/text-generation-inference/index
 
-    WARNING:
-        DELETE CACHE DB IF YOU RERUN WITH A DIFFERENT MODEL.
-        DB DOES NOT STORE MODEL NAME NOT URL AND IS THUS NOT ABLE TO DIFFERENTIATE BETWEEN MODELS.
+    The model url and max_new_tokens are part of the cache key, answers of different TGI deployments are thus
+    cached separately. Note that the cache can't detect a different model being served under the same url.
 
-        USE CORRECT SYSTEM PROMPT FORMATTING FOR POSSIBLE BETTER RESULTS.
+    USE CORRECT SYSTEM PROMPT FORMATTING FOR POSSIBLE BETTER RESULTS.
     """
 
+    max_new_tokens: int = 1024
+
     def __init__(self, config: LLMConfig, llm_cache=None):
         if "TGI_MODEL_URL" not in os.environ:
             raise ValueError("TGI_MODEL_URL not set")
@@ -138,12 +566,39 @@ class LocalTGILLM(BaseLLM):
             "Please see LocalTGILLM class for some caveats when using TGI locally."
         )
         super().__init__(config=config, llm_cache=llm_cache)
+        self.model_url = os.environ["TGI_MODEL_URL"].rstrip("/")
 
-    def call_llm(self, prompt: str) -> str:
-        client = InferenceClient(model=os.environ["TGI_MODEL_URL"])
+    @property
+    def generation_parameters(self) -> Dict[str, Any]:
+        return dict(model_url=self.model_url, max_new_tokens=self.max_new_tokens)
+
+    def create_async_client(self) -> "httpx.AsyncClient":
+        import httpx
+
+        return httpx.AsyncClient(
+            base_url=self.model_url,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            ),
+            timeout=httpx.Timeout(self.config.resilience.timeout, connect=5.0),
+        )
+
+    async def generate(self, prompt: str) -> str:
         # Can use a special prompt template here for system prompt, if wanted
         # TGI does not yet support chat templates
-        result = client.text_generation(
-            prompt=self.config.system_prompt + "\n\n" + prompt, max_new_tokens=1024
+        response = await self.async_client.post(
+            "/generate",
+            json={
+                "inputs": self.config.system_prompt + "\n\n" + prompt,
+                "parameters": {"max_new_tokens": self.max_new_tokens},
+            },
         )
-        return result
+        if response.status_code == 429:
+            raise RateLimitExceeded(response.text, headers=response.headers)
+        response.raise_for_status()
+        self.rate_limiter.update_from_headers(response.headers)
+        return response.json()["generated_text"]
+
+    async def close_async_client(self) -> None:
+        await self.async_client.aclose()
@@ -0,0 +1,63 @@
+"""
+In-process LRU cache for llm answers, used as the first tier in front of the persistent LLMCache.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    def __str__(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses"
+
+
+class MemoryCache:
+    """
+    Thread-safe LRU cache that is bounded by the number of entries and the total size of the answers in bytes.
+    A limit of 0 disables the cache.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> answer, in least recently used order
+        self.answers: OrderedDict[str, str] = OrderedDict()
+        self.num_bytes = 0
+        self.stats = CacheStats()
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get_answer(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        with self.lock:
+            answer = self.answers.get(key)
+            if answer is None:
+                self.stats.misses += 1
+                return None
+            self.answers.move_to_end(key)
+            self.stats.hits += 1
+            return answer
+
+    def set_answer(self, key: str, answer: str) -> None:
+        num_bytes = len(answer.encode())
+        if not self.enabled or num_bytes > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.answers:
+                self.num_bytes -= len(self.answers.pop(key).encode())
+            self.answers[key] = answer
+            self.num_bytes += num_bytes
+            while (
+                len(self.answers) > self.max_entries or self.num_bytes > self.max_bytes
+            ):
+                _, evicted_answer = self.answers.popitem(last=False)
+                self.num_bytes -= len(evicted_answer.encode())
@@ -56,3 +56,11 @@ Raises:
 """
 
 '''
+
+# prepended to the prompts of several code objects that are annotated in one request, see PackingAnnotator
+PACKED_PROMPT_INSTRUCTIONS = """
+The following {num_code_objects} code objects are separated by headers starting with ###.
+Follow the instructions above for each code object separately.
+Answer with a single json object that maps the name in the header of each code object to its answer,
+e.g. {{"package.module.function": "answer"}}. Do not output anything else.
+"""
@@ -0,0 +1,195 @@
+"""
+Client side rate limiting for llm calls.
+Meters requests per minute (RPM) and tokens per minute (TPM) and queues calls that would exceed the
+provider's limits, instead of sending them and failing with 429 responses.
+"""
+import asyncio
+import re
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Mapping, Optional, Tuple
+
+from loguru import logger
+
+
+class RateLimitExceeded(Exception):
+    """
+    Raised by an llm backend if the provider rejected a request due to its rate limits (e.g. HTTP 429).
+    """
+
+    def __init__(
+        self,
+        message: str,
+        retry_after: Optional[float] = None,
+        headers: Optional[Mapping[str, str]] = None,
+    ):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.headers = headers or dict()
+
+
+def parse_duration(duration: str) -> Optional[float]:
+    """
+    Parse durations as used by rate limit headers to seconds.
+    >>> parse_duration("6m0s")
+    360.0
+    >>> parse_duration("20ms")
+    0.02
+    >>> parse_duration("1.5")
+    1.5
+    """
+    duration = duration.strip()
+    try:
+        return float(duration)
+    except ValueError:
+        pass
+    matches = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", duration)
+    if not matches or "".join(value + unit for value, unit in matches) != duration:
+        return None
+    factors = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    return sum(float(value) * factors[unit] for value, unit in matches)
+
+
+def get_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    headers = {key.lower(): value for key, value in headers.items()}
+    if "retry-after-ms" in headers:
+        retry_after_ms = parse_duration(headers["retry-after-ms"])
+        return retry_after_ms / 1000 if retry_after_ms is not None else None
+    if "retry-after" in headers:
+        return parse_duration(headers["retry-after"])
+    return None
+
+
+class RateLimiter:
+    """
+    Sliding window rate limiter for requests and tokens.
+
+    acquire blocks until a request with the given number of (prompt) tokens fits into both budgets.
+    The limits can be unknown (None) initially and are learned from the rate limit headers of the provider
+    (see update_from_headers). After a 429 response, all calls are paused (see register_rate_limit_error).
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        window: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.window = window
+        self.clock = clock
+        # timestamps of the requests in the current window
+        self.request_times: Deque[float] = deque()
+        # (timestamp, num_tokens) of the token usage in the current window
+        self.token_usage: Deque[Tuple[float, int]] = deque()
+        self.num_tokens_in_window = 0
+        self.paused_until = 0.0
+        self.condition = threading.Condition()
+
+    def acquire(self, num_tokens: int) -> None:
+        with self.condition:
+            while True:
+                wait_time = self._try_acquire(num_tokens)
+                if wait_time == 0:
+                    return
+                self.condition.wait(timeout=wait_time)
+
+    async def aacquire(self, num_tokens: int) -> None:
+        while True:
+            with self.condition:
+                wait_time = self._try_acquire(num_tokens)
+            if wait_time == 0:
+                return
+            await asyncio.sleep(wait_time)
+
+    def record_tokens(self, num_tokens: int) -> None:
+        """
+        Add tokens to the current window that are only known after the call, e.g. the answer tokens.
+        """
+        with self.condition:
+            self.token_usage.append((self.clock(), num_tokens))
+            self.num_tokens_in_window += num_tokens
+
+    def pause(self, seconds: float) -> None:
+        with self.condition:
+            self.paused_until = max(self.paused_until, self.clock() + seconds)
+            self.condition.notify_all()
+
+    def register_rate_limit_error(self, error: RateLimitExceeded) -> None:
+        retry_after = error.retry_after
+        if retry_after is None:
+            retry_after = get_retry_after(error.headers)
+        if retry_after is None:
+            # no information from the provider, wait for a quarter of the window
+            retry_after = self.window / 4
+        logger.warning(f"Rate limit exceeded, pausing llm calls for {retry_after}s")
+        self.update_from_headers(error.headers)
+        self.pause(retry_after)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """
+        Adapt the limits to the (OpenAI style) rate limit headers of the provider, e.g.
+        x-ratelimit-limit-requests, x-ratelimit-remaining-tokens, x-ratelimit-reset-tokens
+        """
+        headers = {key.lower(): value for key, value in headers.items()}
+        with self.condition:
+            for kind in ["requests", "tokens"]:
+                limit = headers.get(f"x-ratelimit-limit-{kind}")
+                if limit is not None and limit.isdigit():
+                    setattr(self, f"{kind}_per_minute", int(limit))
+                remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+                reset = headers.get(f"x-ratelimit-reset-{kind}")
+                if remaining == "0" and reset is not None:
+                    reset_seconds = parse_duration(reset)
+                    if reset_seconds is not None:
+                        self.paused_until = max(
+                            self.paused_until, self.clock() + reset_seconds
+                        )
+            self.condition.notify_all()
+
+    def _try_acquire(self, num_tokens: int) -> float:
+        """
+        Returns 0 and registers the request if it fits into the budgets, otherwise the time to wait.
+        Must be called while holding self.condition.
+        """
+        now = self.clock()
+        if now < self.paused_until:
+            return self.paused_until - now
+
+        while self.request_times and self.request_times[0] <= now - self.window:
+            self.request_times.popleft()
+        while self.token_usage and self.token_usage[0][0] <= now - self.window:
+            self.num_tokens_in_window -= self.token_usage.popleft()[1]
+
+        wait_time = 0.0
+        if (
+            self.requests_per_minute is not None
+            and len(self.request_times) >= self.requests_per_minute
+        ):
+            index = len(self.request_times) - self.requests_per_minute
+            wait_time = self.request_times[index] + self.window - now
+        if (
+            self.tokens_per_minute is not None
+            and self.num_tokens_in_window + num_tokens > self.tokens_per_minute
+            # a single request larger than the budget is sent once the window is empty
+            and self.num_tokens_in_window > 0
+        ):
+            num_tokens_to_free = (
+                self.num_tokens_in_window + num_tokens - self.tokens_per_minute
+            )
+            freed_tokens = 0
+            for timestamp, used_tokens in self.token_usage:
+                freed_tokens += used_tokens
+                if freed_tokens >= num_tokens_to_free:
+                    wait_time = max(wait_time, timestamp + self.window - now)
+                    break
+        if wait_time > 0:
+            return wait_time
+
+        self.request_times.append(now)
+        self.token_usage.append((now, num_tokens))
+        self.num_tokens_in_window += num_tokens
+        return 0
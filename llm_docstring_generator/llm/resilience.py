@@ -0,0 +1,120 @@
+"""
+Resilience layer for llm calls: exponential backoff with jitter, a max attempts policy and a circuit breaker
+that pauses all calls while the backend is down.
+"""
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from loguru import logger
+
+
+class LLMCallFailed(Exception):
+    """
+    Raised if an llm call did not succeed within the attempts of the ResilienceConfig.
+    """
+
+
+@dataclass
+class ResilienceConfig:
+    # timeout in seconds for a single llm request
+    timeout: float = 600.0
+    # number of attempts per llm call, including the first one
+    max_attempts: int = 5
+    initial_backoff: float = 1.0
+    max_backoff: float = 60.0
+    # number of consecutive failures after which the circuit breaker opens
+    circuit_breaker_threshold: int = 5
+    # seconds after which an open circuit breaker lets a trial call through
+    circuit_breaker_reset_timeout: float = 30.0
+
+    def get_backoff(self, attempt: int) -> float:
+        """
+        Exponential backoff with full jitter for the given (0-indexed) attempt.
+        """
+        return random.uniform(
+            0, min(self.max_backoff, self.initial_backoff * 2**attempt)
+        )
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures and blocks all callers for reset_timeout seconds.
+    Afterwards, a single trial call is let through (half-open state). The breaker closes if the trial call
+    succeeds and opens again otherwise.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.num_consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_call_in_flight = False
+        self.condition = threading.Condition()
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def wait_until_closed(self) -> None:
+        with self.condition:
+            while True:
+                wait_time = self._try_pass()
+                if wait_time == 0:
+                    return
+                self.condition.wait(timeout=wait_time)
+
+    async def await_until_closed(self) -> None:
+        while True:
+            with self.condition:
+                wait_time = self._try_pass()
+            if wait_time == 0:
+                return
+            await asyncio.sleep(wait_time)
+
+    def record_success(self) -> None:
+        with self.condition:
+            if self.is_open:
+                logger.info("LLM backend is available again, closing circuit breaker")
+            self.num_consecutive_failures = 0
+            self.opened_at = None
+            self.trial_call_in_flight = False
+            self.condition.notify_all()
+
+    def record_failure(self) -> None:
+        with self.condition:
+            self.num_consecutive_failures += 1
+            self.trial_call_in_flight = False
+            if self.is_open or self.num_consecutive_failures >= self.failure_threshold:
+                if not self.is_open:
+                    logger.warning(
+                        f"{self.num_consecutive_failures} consecutive llm calls failed, "
+                        f"pausing llm calls for {self.reset_timeout}s"
+                    )
+                self.opened_at = self.clock()
+            self.condition.notify_all()
+
+    def _try_pass(self) -> float:
+        """
+        Returns 0 if the caller may pass, otherwise the time to wait.
+        Must be called while holding self.condition.
+        """
+        if self.opened_at is None:
+            return 0
+        wait_time = self.opened_at + self.reset_timeout - self.clock()
+        if wait_time > 0:
+            return wait_time
+        if self.trial_call_in_flight:
+            # wait for the result of the trial call
+            return min(self.reset_timeout, 1.0)
+        self.trial_call_in_flight = True
+        return 0
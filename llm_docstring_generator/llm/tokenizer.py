@@ -0,0 +1,76 @@
+"""
+Token counting and prompt truncation for the llms.
+"""
+import threading
+from typing import Dict, Optional, Tuple
+
+from loguru import logger
+
+
+def load_encoding(model: Optional[str] = None):
+    import tiktoken
+
+    if model is not None:
+        # https://github.com/openai/openai-cookbook/blob/main/examples/How_to_count_tokens_with_tiktoken.ipynb
+        try:
+            return tiktoken.encoding_for_model(model)
+        except Exception as e:
+            logger.error(
+                f"Error when trying to get the encoder for the model,"
+                f" falling back to cl100k_base: {e}"
+            )
+    return tiktoken.get_encoding("cl100k_base")
+
+
+class Tokenizer:
+    """
+    Wraps a tiktoken encoding. Prompts are encoded exactly once for both truncation and counting,
+    and the token counts of the (constant) system prompts are cached.
+    Unless an encoding is passed, the encoding of the model (cl100k_base by default) is loaded on first use.
+
+    The counts are approximations: special tokens of the chat format and merges across the boundary
+    between the system prompt and the prompt are not taken into account.
+    """
+
+    def __init__(self, encoding=None, model: Optional[str] = None):
+        self._encoding = encoding
+        self.model = model
+        self.encoding_lock = threading.Lock()
+        # system prompt -> number of tokens, an llm only uses a handful of system prompts
+        self.system_prompt_num_tokens: Dict[str, int] = dict()
+
+    @property
+    def encoding(self):
+        if self._encoding is None:
+            with self.encoding_lock:
+                if self._encoding is None:
+                    self._encoding = load_encoding(self.model)
+        return self._encoding
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encoding.encode(text, allowed_special="all"))
+
+    def count_system_prompt_tokens(self, system_prompt: str) -> int:
+        num_tokens = self.system_prompt_num_tokens.get(system_prompt)
+        if num_tokens is None:
+            num_tokens = self.count_tokens(system_prompt)
+            self.system_prompt_num_tokens[system_prompt] = num_tokens
+        return num_tokens
+
+    def truncate(
+        self, prompt: str, system_prompt: str, max_prompt_token_length: int
+    ) -> Tuple[str, int]:
+        """
+        :return: the prompt truncated to max_prompt_token_length tokens and the number of tokens
+            of the system prompt plus the truncated prompt
+        """
+        tokens = self.encoding.encode(prompt, allowed_special="all")
+        if len(tokens) <= max_prompt_token_length:
+            # encoding is lossless, so there is no need to decode the tokens again
+            prompt_truncated = prompt
+        else:
+            tokens = tokens[:max_prompt_token_length]
+            prompt_truncated = self.encoding.decode(tokens)
+        return prompt_truncated, self.count_system_prompt_tokens(system_prompt) + len(
+            tokens
+        )
@@ -2,38 +2,25 @@ import ast
 import textwrap
 from typing import List, Optional
 
+from llm_docstring_generator.parser.parsed_module import get_parsed_module
+
 
 class AstParser:
     def __init__(self, codestring: str):
         self.codestring = codestring
+        self.parsed_module = get_parsed_module(codestring)
 
     def extract_function_nodes(self) -> List[ast.FunctionDef | ast.AsyncFunctionDef]:
         """
-        Extract all functions from a code string.
+        Extract all functions from a code string (excluding methods).
         """
-        p = ast.parse(self.codestring)
-        nodes = list(ast.walk(p))
-        # mark methods to be able to exclude them from the list of functions
-        for node in nodes:
-            if isinstance(node, ast.ClassDef):
-                for child in node.body:
-                    if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                        child.parent = node  # type: ignore
-        function_nodes = [
-            node
-            for node in nodes
-            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
-            and not hasattr(node, "parent")
-        ]
-        return function_nodes
+        return list(self.parsed_module.function_nodes)
 
     def extract_class_nodes(self) -> List[ast.ClassDef]:
         """
         Extract all classes from a code string.
         """
-        p = ast.parse(self.codestring)
-        class_nodes = [node for node in ast.walk(p) if isinstance(node, ast.ClassDef)]
-        return class_nodes
+        return list(self.parsed_module.class_nodes)
 
     def extract_method_nodes_from_class_node(
         self, class_node: ast.ClassDef
@@ -65,9 +52,7 @@ class AstParser:
             # cannot use astunparse here, as it automatically reformats the code
             # dedent the code string to remove leading whitespaces
             codestring=textwrap.dedent(
-                "\n".join(
-                    self.codestring.split("\n")[node.lineno - 1 : node.end_lineno]
-                )
+                "\n".join(self.parsed_module.lines[node.lineno - 1 : node.end_lineno])
             ),
             docstring=ast.get_docstring(node),
             docstring_line=self.get_docstring_line(node),
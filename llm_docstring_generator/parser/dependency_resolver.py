@@ -65,7 +65,7 @@ class DependencyResolver:
         self, functions: List[Function], classes: List[Class]
     ) -> List[Import]:
         """
-        Extract all imports from a code string using ast parser and code2flow graph.
+        Extract all imports from a code string using ast parser and the call graph.
         :return: list of Import dataclasses
         """
         # all explicit imports the file has
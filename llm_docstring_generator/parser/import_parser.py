@@ -2,6 +2,7 @@ import ast
 from copy import copy
 from typing import List, Optional
 
+from llm_docstring_generator.parser.parsed_module import get_parsed_module
 from llm_docstring_generator.python_files.imports import Import
 
 
@@ -45,23 +46,20 @@ class ImportParser:
         return imports
 
     def get_imports_names(self) -> List:
-        p = ast.parse(self.codestring)
+        parsed_module = get_parsed_module(self.codestring)
+        # one node per imported name. The parsed nodes are shared, so only the copies are modified
         import_nodes = []
-        for import_node in [
-            node for node in ast.walk(p) if isinstance(node, ast.Import)
-        ]:
-            names = import_node.names
-            for name in names:
-                import_node.names = [name]
-                import_nodes.append(copy(import_node))
+        for import_node in parsed_module.import_nodes:
+            for name in import_node.names:
+                import_node_copy = copy(import_node)
+                import_node_copy.names = [name]
+                import_nodes.append(import_node_copy)
         import_from_nodes = []
-        for import_from_node in [
-            node for node in ast.walk(p) if isinstance(node, ast.ImportFrom)
-        ]:
-            names = import_from_node.names
-            for name in names:
-                import_from_node.names = [name]
-                import_from_nodes.append(copy(import_from_node))
+        for import_from_node in parsed_module.import_from_nodes:
+            for name in import_from_node.names:
+                import_from_node_copy = copy(import_from_node)
+                import_from_node_copy.names = [name]
+                import_from_nodes.append(import_from_node_copy)
 
         return [import_from_nodes, import_nodes]
 
@@ -1,29 +1,140 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
 from typing import List
 
+import networkx as nx
+from llm_docstring_generator.parser.parse_cache import (
+    get_hash,
+    get_imports_fingerprint,
+    get_parse_cache,
+)
+from llm_docstring_generator.parser.parsed_module import get_parsed_module
 from llm_docstring_generator.parser.python_file_parser import PythonFileParser
+from llm_docstring_generator.python_files.imports import Import
 from llm_docstring_generator.python_files.python_file import PythonFile
+from llm_docstring_generator.sorters.function_import_graph import (
+    FUNCTION_IMPORT_GRAPH_CACHE,
+    get_function_import_graph,
+)
 from llm_docstring_generator.utils.base_config import BaseConfig
-from llm_docstring_generator.utils.utils import get_import_name
+from llm_docstring_generator.utils.utils import (
+    ALL_IMPORTS_CACHE,
+    get_all_imports,
+    get_file_symbols,
+    get_import_name,
+)
 from loguru import logger
 
 
 def load_python_files(config: BaseConfig) -> List[PythonFile]:
     assert config.repository_path.exists(), f"{config.repository_path} does not exist."
-    python_files = [
-        load_python_file(config=config, python_filepath=python_filepath)
-        for python_filepath in config.repository_path.rglob("*.py")
-    ]
+    start_time = time.time()
+    python_filepaths = list(config.repository_path.rglob("*.py"))
+    try:
+        if config.num_workers > 1 and len(python_filepaths) > 1:
+            python_files = load_python_files_in_parallel(config, python_filepaths)
+        else:
+            python_files = [
+                load_python_file(config=config, python_filepath=python_filepath)
+                for python_filepath in python_filepaths
+            ]
+    finally:
+        # the parsed modules are only shared while the repository is loaded,
+        # don't keep the asts of all files alive (e.g. when loading several repositories)
+        get_parsed_module.cache_clear()
+    if config.use_parse_cache:
+        get_parse_cache(config).prune(start_time)
     logger.info(f"Loaded {len(python_files)} python_files")
     return python_files
 
 
+def load_python_files_in_parallel(
+    config: BaseConfig, python_filepaths: List[Path]
+) -> List[PythonFile]:
+    """
+    Parse the python files using config.num_workers processes.
+    The repository wide symbol table and function import graph are built once and shared with the workers.
+    The python files are returned in the order of python_filepaths.
+    """
+    all_imports = get_all_imports(config)
+    function_import_graph = get_function_import_graph(config)
+    num_workers = min(config.num_workers, len(python_filepaths))
+    logger.debug(
+        f"Loading {len(python_filepaths)} python files with {num_workers} processes"
+    )
+    with ProcessPoolExecutor(
+        max_workers=num_workers,
+        initializer=initialize_worker,
+        initargs=(config, all_imports, function_import_graph),
+    ) as executor:
+        return list(
+            executor.map(
+                partial(load_python_file, config),
+                python_filepaths,
+                chunksize=max(1, len(python_filepaths) // (4 * num_workers)),
+            )
+        )
+
+
+def initialize_worker(
+    config: BaseConfig, all_imports: List[Import], function_import_graph: nx.DiGraph
+) -> None:
+    ALL_IMPORTS_CACHE[config] = all_imports
+    FUNCTION_IMPORT_GRAPH_CACHE[config] = function_import_graph
+
+
 def load_python_file(config: BaseConfig, python_filepath: Path) -> PythonFile:
     with open(python_filepath, "r") as file:
         codestring = file.read()
     import_name = get_import_name(
         repository_path=config.repository_path, python_filepath=python_filepath
     )
+    if not config.use_parse_cache:
+        return parse_python_file(config, codestring, import_name)
+
+    parse_cache = get_parse_cache(config)
+    key = parse_cache.get_key(
+        "python_file",
+        config.repository_name,
+        import_name,
+        get_hash(codestring),
+        get_symbol_table_fingerprint(config),
+        get_call_graph_fingerprint(
+            config, get_file_symbols(codestring, import_name, parse_cache)
+        ),
+    )
+    python_file = parse_cache.load(key)
+    if python_file is None:
+        python_file = parse_python_file(config, codestring, import_name)
+        parse_cache.save(key, python_file)
+    return python_file
+
+
+@lru_cache(maxsize=None)
+def get_symbol_table_fingerprint(config: BaseConfig) -> str:
+    return get_imports_fingerprint(get_all_imports(config))
+
+
+def get_call_graph_fingerprint(config: BaseConfig, symbols: List[Import]) -> str:
+    """
+    Hash of all edges of the function import graph that start at the given symbols.
+    """
+    G = get_function_import_graph(config)
+    return get_hash(
+        *[
+            f"{symbol.complete_import_name}->{successor.complete_import_name}"
+            for symbol in sorted(set(symbols), key=lambda x: x.complete_import_name)
+            if symbol in G
+            for successor in G.successors(symbol)
+        ]
+    )
+
+
+def parse_python_file(
+    config: BaseConfig, codestring: str, import_name: str
+) -> PythonFile:
     parser = PythonFileParser(
         config=config,
         codestring=codestring,
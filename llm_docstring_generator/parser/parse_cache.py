@@ -0,0 +1,142 @@
+"""
+On-disk cache for the results of the parser, stored under config.cache_path / "parse_cache" / config.repository_name.
+
+The parsed PythonFile of a file does not only depend on its own content, but also on the symbols
+(functions, classes and methods) of the whole repository and on the call graph. Thus, the cache key of a file
+consists of
+    - the parser version and the fields of the python_files dataclasses
+    - the repository name (stored in the PythonFile, see also get_raw_source_paths)
+    - the import name and the content hash of the file
+    - a fingerprint of all symbols of the repository (see get_all_imports)
+    - the edges of the call graph that start at the symbols of the file
+The call graph itself is cached for the repository name and the content hashes of all files of the repository,
+the symbols of a file are cached for the content hash of the file.
+As almost any change of the repository changes these keys, the entries that a run of load_python_files did not
+use are deleted afterwards, see ParseCache.prune.
+"""
+import dataclasses
+import hashlib
+import os
+import pickle
+import zlib
+from contextlib import suppress
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable, Optional, Set
+
+from llm_docstring_generator.python_files.function_and_classes import Class, Function
+from llm_docstring_generator.python_files.imports import Import
+from llm_docstring_generator.python_files.python_file import PythonFile
+from llm_docstring_generator.utils.base_config import BaseConfig
+from loguru import logger
+
+# bump this version if the output of the parser changes
+PARSER_VERSION = 2
+
+# seconds, the modification times of the file system may lag behind time.time()
+MTIME_TOLERANCE = 2.0
+
+
+def get_parser_version() -> str:
+    # pickled dataclasses can't be loaded correctly if their fields changed
+    field_names = [
+        field.name
+        for dataclass_ in [PythonFile, Function, Class, Import]
+        for field in dataclasses.fields(dataclass_)  # type: ignore[arg-type]
+    ]
+    return f"{PARSER_VERSION}:{','.join(field_names)}"
+
+
+def get_hash(*parts: str) -> str:
+    hasher = hashlib.blake2b(digest_size=20)
+    for part in parts:
+        encoded = part.encode()
+        # length prefix to avoid collisions such as ("ab", "c") and ("a", "bc")
+        hasher.update(len(encoded).to_bytes(8, "little"))
+        hasher.update(encoded)
+    return hasher.hexdigest()
+
+
+def get_imports_fingerprint(imports: Iterable[Import]) -> str:
+    return get_hash(
+        *sorted({import_.complete_import_name for import_ in imports}),
+    )
+
+
+def get_repository_fingerprint(config: BaseConfig) -> str:
+    """
+    Hash of the content of all python files of the repository.
+    """
+    parts = []
+    for python_filepath in sorted(config.repository_path.rglob("*.py")):
+        content_hash = hashlib.blake2b(
+            python_filepath.read_bytes(), digest_size=20
+        ).hexdigest()
+        parts += [
+            str(python_filepath.relative_to(config.repository_path)),
+            content_hash,
+        ]
+    return get_hash(*parts)
+
+
+class ParseCache:
+    """
+    Stores pickled and zlib compressed objects in one file per key.
+    The entries that are used are touched, so that prune keeps the entries used by worker processes as well.
+    """
+
+    def __init__(self, config: BaseConfig):
+        self.path: Path = config.cache_path / "parse_cache" / config.repository_name
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.parser_version = get_parser_version()
+        # keys loaded or saved by this process, e.g. of the function import graph that is kept in memory
+        self.used_keys: Set[str] = set()
+
+    def get_key(self, kind: str, *parts: str) -> str:
+        return f"{kind}_{get_hash(self.parser_version, *parts)}"
+
+    def load(self, key: str) -> Optional[Any]:
+        filepath = self.path / key
+        if not filepath.exists():
+            return None
+        try:
+            value = pickle.loads(zlib.decompress(filepath.read_bytes()))
+        except Exception as e:
+            logger.warning(f"Could not load {filepath} from parse cache due to {e}")
+            return None
+        self.used_keys.add(key)
+        # the entry may have been pruned by another process in the meantime
+        with suppress(FileNotFoundError):
+            os.utime(filepath)
+        return value
+
+    def save(self, key: str, value: Any) -> None:
+        filepath = self.path / key
+        # write to a temporary file first, so that concurrent readers never see partial files
+        tmp_filepath = filepath.with_name(f"{key}.{os.getpid()}.tmp")
+        tmp_filepath.write_bytes(
+            zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        )
+        os.replace(tmp_filepath, filepath)
+        self.used_keys.add(key)
+
+    def prune(self, start_time: float) -> None:
+        """
+        Delete all entries that were neither used by this process nor touched since start_time,
+        e.g. the entries of files that changed or were deleted since the last run.
+        """
+        num_deleted = 0
+        for filepath in self.path.iterdir():
+            if filepath.name in self.used_keys:
+                continue
+            with suppress(FileNotFoundError):
+                if filepath.stat().st_mtime < start_time - MTIME_TOLERANCE:
+                    filepath.unlink()
+                    num_deleted += 1
+        if num_deleted > 0:
+            logger.debug(f"Deleted {num_deleted} unused entries from {self.path}")
+
+
+@lru_cache(maxsize=None)
+def get_parse_cache(config: BaseConfig) -> ParseCache:
+    return ParseCache(config)
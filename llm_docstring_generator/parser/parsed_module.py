@@ -0,0 +1,57 @@
+"""
+Parse a code string once and share the result between all parsers.
+"""
+import ast
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List
+
+
+@dataclass
+class ParsedModule:
+    """
+    The ast of a code string together with indexes of its nodes.
+    All node lists are in ast.walk order. The nodes are shared, so they must not be mutated.
+    """
+
+    codestring: str
+    tree: ast.Module
+    # lines of the code string, i.e. codestring.split("\n")
+    lines: List[str]
+    # functions that are not defined directly in a class body
+    function_nodes: List[ast.FunctionDef | ast.AsyncFunctionDef] = field(
+        default_factory=list
+    )
+    class_nodes: List[ast.ClassDef] = field(default_factory=list)
+    import_nodes: List[ast.Import] = field(default_factory=list)
+    import_from_nodes: List[ast.ImportFrom] = field(default_factory=list)
+
+
+@lru_cache(maxsize=None)
+def get_parsed_module(codestring: str) -> ParsedModule:
+    """
+    Cached until the end of load_python_files, which clears the cache.
+    """
+    tree = ast.parse(codestring)
+    parsed_module = ParsedModule(
+        codestring=codestring, tree=tree, lines=codestring.split("\n")
+    )
+    nodes = list(ast.walk(tree))
+    method_node_ids = {
+        id(child)
+        for node in nodes
+        if isinstance(node, ast.ClassDef)
+        for child in node.body
+        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef))
+    }
+    for node in nodes:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if id(node) not in method_node_ids:
+                parsed_module.function_nodes.append(node)
+        elif isinstance(node, ast.ClassDef):
+            parsed_module.class_nodes.append(node)
+        elif isinstance(node, ast.Import):
+            parsed_module.import_nodes.append(node)
+        elif isinstance(node, ast.ImportFrom):
+            parsed_module.import_from_nodes.append(node)
+    return parsed_module
@@ -1,6 +1,10 @@
-from typing import List
+import signal
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Sequence
 
 from llm_docstring_generator.annotator.code_annotator import BaseAnnotator
+from llm_docstring_generator.annotator.triage import CodeTriage
 from llm_docstring_generator.parser.load_python_files import load_python_files
 from llm_docstring_generator.python_files.python_file import PythonFile
 from llm_docstring_generator.sorters.sort_python_files import (
@@ -12,37 +16,94 @@ from llm_docstring_generator.utils.copy_repository import CopyRepositoryBase
 from loguru import logger
 
 
+def keep_all_python_files(python_files: List[PythonFile]) -> List[PythonFile]:
+    return python_files
+
+
 class CodeAnnotationPipeline:
     def __init__(
         self,
         config: BaseConfig,
         annotator: BaseAnnotator,
         copy_repository: CopyRepositoryBase,
-        filter_python_files_function=lambda python_files: python_files,
+        filter_python_files_function=keep_all_python_files,
         sort_python_files_function=sort_python_files_by_imports,
+        code_triage: Optional[CodeTriage] = None,
     ):
         self.config = config
+        # the annotator checkpoints its annotations if it has an annotation state,
+        # see create_annotation_state, BaseConfig.incremental and BaseConfig.resume
+        self.annotator = annotator
 
         # you can modify the pipeline by adding or removing steps
-        # for now, it is hardcoded until new use cases require it to be more flexible
-        self.steps = [
+        # for now, it is hardcoded until new use cases require it to be more flexible.
+        # The load steps only prepare the python files and may run in another process
+        # (see run_batch_annotation_pipeline), so they must be picklable, i.e. no lambdas.
+        self.load_steps = [
             filter_python_files_function,
             sort_python_files_function,
+        ]
+        if code_triage is None and config.triage:
+            code_triage = CodeTriage()
+        if code_triage is not None:
+            self.load_steps.append(code_triage)
+        self.annotation_steps: List[Callable[..., List[PythonFile]]] = [
             annotator,
             copy_repository,
         ]
 
     def run(self):
-        if self.config.remote_url and self.config.repository_path.exists():
-            logger.warning(
-                f"{self.config.repository_path} already exists, skipping clone. "
-                f"Please remove it if you want to clone again."
-            )
-        elif self.config.remote_url:
-            clone_repository(self.config)
-        python_files: List[PythonFile] = load_python_files(self.config)
-        assert len(python_files) > 0, "No python files found in the repository"
-
-        for step in self.steps:
+        with exit_on_sigterm():
+            python_files = self.load_repository()
+            return self.annotate_repository(python_files)
+
+    def load_repository(self) -> List[PythonFile]:
+        return load_sorted_python_files(self.config, self.load_steps)
+
+    def annotate_repository(self, python_files: List[PythonFile]) -> List[PythonFile]:
+        for step in self.annotation_steps:
             python_files = step(python_files=python_files)
         return python_files
+
+
+def load_sorted_python_files(
+    config: BaseConfig,
+    load_steps: Sequence[Callable[..., List[PythonFile]]],
+) -> List[PythonFile]:
+    """
+    Clone the repository if needed, load its python files and apply the load steps (filter and sort).
+    """
+    if config.remote_url and config.repository_path.exists():
+        logger.warning(
+            f"{config.repository_path} already exists, skipping clone. "
+            f"Please remove it if you want to clone again."
+        )
+    elif config.remote_url:
+        clone_repository(config)
+    python_files: List[PythonFile] = load_python_files(config)
+    assert len(python_files) > 0, "No python files found in the repository"
+
+    for step in load_steps:
+        python_files = step(python_files=python_files)
+    return python_files
+
+
+@contextmanager
+def exit_on_sigterm() -> Iterator[None]:
+    """
+    Raise SystemExit on SIGTERM (e.g. sent by a job scheduler), so that the annotations are checkpointed
+    before the process exits.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        # signal handlers can only be set in the main thread
+        yield
+        return
+
+    def raise_system_exit(signum, frame):
+        raise SystemExit(f"Received signal {signum}")
+
+    previous_handler = signal.signal(signal.SIGTERM, raise_system_exit)
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGTERM, previous_handler)
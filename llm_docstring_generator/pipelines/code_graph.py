@@ -11,7 +11,6 @@ from llm_docstring_generator.sorters.sort_python_files import (
 )
 from llm_docstring_generator.utils.base_config import DEFAULT_DATA_DIR, BaseConfig
 from llm_docstring_generator.utils.clone_repository import clone_repository
-from pyvis.network import Network
 
 
 def run_code_graph_generation(
@@ -44,6 +43,9 @@ def run_code_graph_generation(
     else:
         raise ValueError(f"mode {mode} not supported")
 
+    # pyvis (and IPython) are slow to import and only needed here
+    from pyvis.network import Network
+
     nt = Network(
         height="750px",
         width="100%",
@@ -1,5 +1,7 @@
 import os
+from typing import Callable, Dict, Optional
 
+from llm_docstring_generator.annotator.annotation_state import create_annotation_state
 from llm_docstring_generator.annotator.code_annotator import (
     DebugAnnotator,
     DefaultAnnotator,
@@ -8,7 +10,8 @@ from llm_docstring_generator.annotator.metadata_provider import (
     DebugMetaDataProvider,
     DefaultMetaDataProvider,
 )
-from llm_docstring_generator.llm.llm import DebugLLM, LocalTGILLM, OpenAILLM
+from llm_docstring_generator.annotator.packing_annotator import PackingAnnotator
+from llm_docstring_generator.llm.llm import BaseLLM, DebugLLM, LocalTGILLM, OpenAILLM
 from llm_docstring_generator.llm.llm_config import LLMConfig
 from llm_docstring_generator.pipelines.code_annotation_pipeline import (
     CodeAnnotationPipeline,
@@ -22,14 +25,17 @@ from llm_docstring_generator.utils.copy_repository import (
 )
 
 
-def debug_format(config: BaseConfig, llm_config: LLMConfig) -> CodeAnnotationPipeline:
+def debug_format(
+    config: BaseConfig, llm_config: LLMConfig, llm: Optional[BaseLLM] = None
+) -> CodeAnnotationPipeline:
     # assert sanity check to prevent the user accidentally using the wrong pipeline
     assert (
         llm_config.model == "debug"
     ), f"Model name should be 'debug' when using the debug pipeline, got {llm_config.model}."
     annotator = DebugAnnotator(
-        llm=DebugLLM(config=llm_config),
+        llm=llm or DebugLLM(config=llm_config),
         metadata_provider_class=DebugMetaDataProvider,
+        annotation_state=create_annotation_state(config),
     )
     copy_repository = CopyRepositoryWithLLMDocstrings(
         original_repo_path=config.repository_path,
@@ -45,13 +51,14 @@ def debug_format(config: BaseConfig, llm_config: LLMConfig) -> CodeAnnotationPip
 
 
 def tgi_local_format(
-    config: BaseConfig, llm_config: LLMConfig
+    config: BaseConfig, llm_config: LLMConfig, llm: Optional[BaseLLM] = None
 ) -> CodeAnnotationPipeline:
     assert "TGI_MODEL_URL" in os.environ, "TGI_MODEL_URL not set"
 
     annotator = DefaultAnnotator(
-        llm=LocalTGILLM(config=llm_config),
+        llm=llm or LocalTGILLM(config=llm_config),
         metadata_provider_class=DefaultMetaDataProvider,
+        annotation_state=create_annotation_state(config),
     )
     copy_repository = CopyRepositoryWithLLMDocstrings(
         original_repo_path=config.repository_path,
@@ -66,14 +73,44 @@ def tgi_local_format(
     )
 
 
-def gpt_format(config: BaseConfig, llm_config: LLMConfig) -> CodeAnnotationPipeline:
+def gpt_format(
+    config: BaseConfig, llm_config: LLMConfig, llm: Optional[BaseLLM] = None
+) -> CodeAnnotationPipeline:
     assert "OPENAI_API_KEY" in os.environ, "OPENAI_API_KEY not set"
     if llm_config.model == "tgi":
         assert "OPENAI_API_URL" in os.environ, "OPENAI_API_URL needs to be set"
 
     annotator = DefaultAnnotator(
-        llm=OpenAILLM(config=llm_config),
+        llm=llm or OpenAILLM(config=llm_config),
+        metadata_provider_class=DefaultMetaDataProvider,
+        annotation_state=create_annotation_state(config),
+    )
+    copy_repository = CopyRepositoryWithLLMDocstrings(
+        original_repo_path=config.repository_path,
+        new_repository_path=config.new_repository_path,  # type: ignore
+    )
+
+    return CodeAnnotationPipeline(
+        annotator=annotator,
+        copy_repository=copy_repository,
+        config=config,
+        sort_python_files_function=sort_python_files_by_imports,
+    )
+
+
+def gpt_packed_format(
+    config: BaseConfig, llm_config: LLMConfig, llm: Optional[BaseLLM] = None
+) -> CodeAnnotationPipeline:
+    """
+    Like gpt_format, but small independent functions/classes are annotated together in one request,
+    see PackingAnnotator.
+    """
+    assert "OPENAI_API_KEY" in os.environ, "OPENAI_API_KEY not set"
+
+    annotator = PackingAnnotator(
+        llm=llm or OpenAILLM(config=llm_config),
         metadata_provider_class=DefaultMetaDataProvider,
+        annotation_state=create_annotation_state(config),
     )
     copy_repository = CopyRepositoryWithLLMDocstrings(
         original_repo_path=config.repository_path,
@@ -88,12 +125,15 @@ def gpt_format(config: BaseConfig, llm_config: LLMConfig) -> CodeAnnotationPipel
     )
 
 
-pipeline_factory = dict()
+# a pipeline is created from the repository config and the llm config. Pipelines that annotate several
+# repositories (see run_batch_annotation_pipeline) pass an existing llm to share it between them
+pipeline_factory: Dict[str, Callable[..., CodeAnnotationPipeline]] = dict()
 # you can add more formats here
 pipeline_factory["debug"] = debug_format
 pipeline_factory["tgi-local"] = tgi_local_format
 pipeline_factory["tgi"] = gpt_format
 pipeline_factory["openai-gpt"] = gpt_format
+pipeline_factory["openai-gpt-packed"] = gpt_packed_format
 # explicit model names, shortcut
 pipeline_factory["gpt-3.5-turbo"] = gpt_format
 pipeline_factory["gpt-4-0125-preview"] = gpt_format
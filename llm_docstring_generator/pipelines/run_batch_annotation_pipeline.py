@@ -0,0 +1,255 @@
+import json
+import time
+from concurrent.futures import (
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from llm_docstring_generator.llm.llm_config import LLMConfig
+from llm_docstring_generator.llm.prompts import DEFAULT_DOCSTRING_SYSTEM_PROMPT
+from llm_docstring_generator.python_files.python_file import PythonFile
+from llm_docstring_generator.utils.base_config import DEFAULT_DATA_DIR, BaseConfig
+from loguru import logger
+
+if TYPE_CHECKING:
+    from llm_docstring_generator.pipelines.code_annotation_pipeline import (
+        CodeAnnotationPipeline,
+    )
+
+
+@dataclass
+class RepositoryThroughput:
+    """
+    Per repository report of a batch run.
+    load_seconds is the time spent cloning, parsing and sorting the repository in its load process,
+    annotation_seconds the time spent annotating (and copying) it.
+    """
+
+    repository_name: str
+    num_python_files: int = 0
+    num_annotations: int = 0
+    load_seconds: float = 0.0
+    annotation_seconds: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def annotations_per_second(self) -> float:
+        if self.annotation_seconds == 0:
+            return 0.0
+        return self.num_annotations / self.annotation_seconds
+
+    def __str__(self) -> str:
+        if self.error is not None:
+            return f"{self.repository_name}: failed with {self.error}"
+        return (
+            f"{self.repository_name}: {self.num_python_files} python files, "
+            f"{self.num_annotations} annotations, load {self.load_seconds:.1f}s, "
+            f"annotation {self.annotation_seconds:.1f}s "
+            f"({self.annotations_per_second:.1f} annotations/s)"
+        )
+
+
+def run_batch_annotation_pipeline(
+    manifest_path: Path | str,
+    cache_path: Optional[Path | str] = None,
+    system_prompt: str = DEFAULT_DOCSTRING_SYSTEM_PROMPT,
+    model: str = "gpt-4-0125-preview",
+    max_prompt_token_length: int = 2048,
+    pipeline_name: Optional[str] = None,
+    max_concurrent_requests: int = 1,
+    requests_per_minute: Optional[int] = None,
+    tokens_per_minute: Optional[int] = None,
+    num_load_processes: int = 4,
+    num_parallel_repositories: int = 4,
+    incremental: bool = False,
+    resume: bool = False,
+    triage: bool = False,
+) -> List[RepositoryThroughput]:
+    """
+    Annotate all repositories of a manifest.
+    The repositories are loaded (cloned, parsed and sorted) in num_load_processes processes, a repository is
+    annotated as soon as it is loaded. All repositories share one llm, i.e. one client, rate limiter and cache,
+    so that at most max_concurrent_requests llm requests are in flight across all repositories.
+
+    :param manifest_path: Json file with a list of repositories. Each entry contains the arguments of BaseConfig,
+                          e.g. {"repository_name": "optuna", "remote_url": "https://github.com/optuna/optuna.git"}
+    :param cache_path: Directory of the shared llm cache, defaults to the default cache directory.
+                       The other results are stored in the cache_path of each repository (see BaseConfig).
+    :param system_prompt: System prompt to be used for the LLM
+    :param model: The LLM model to be used
+    :param max_prompt_token_length: The maximum token length for the prompt, excluding the system prompt
+    :param pipeline_name: Name of the pipeline to be used, defaults to the model name if not set.
+                          The pipeline must accept an llm argument, see default_pipelines.
+    :param max_concurrent_requests: Maximum number of LLM requests in flight at the same time, for all repositories.
+    :param requests_per_minute: Rate limit of the LLM provider. Learned from the provider's response headers if not set.
+    :param tokens_per_minute: Token rate limit of the LLM provider, see requests_per_minute.
+    :param num_load_processes: Number of repositories that are loaded at the same time.
+    :param num_parallel_repositories: Number of repositories that are annotated at the same time.
+    :param incremental: Default of BaseConfig.incremental for the repositories of the manifest.
+    :param resume: Default of BaseConfig.resume for the repositories of the manifest.
+    :param triage: Default of BaseConfig.triage for the repositories of the manifest.
+    :return: Throughput report of each repository, in the order of the manifest
+    """
+    # imported here, so that the command line interface (e.g. --help) starts fast
+    from llm_docstring_generator.pipelines.default_pipelines import pipeline_factory
+
+    pipeline_name = pipeline_name or model
+    assert pipeline_name in pipeline_factory, (
+        f"Pipeline {pipeline_name} not found. "
+        f"Available pipelines: {pipeline_factory.keys()}."
+    )
+    configs = load_manifest(
+        manifest_path,
+        defaults=dict(incremental=incremental, resume=resume, triage=triage),
+    )
+    llm_config = LLMConfig(
+        system_prompt=system_prompt,
+        model=model,
+        db_root_path=Path(cache_path or DEFAULT_DATA_DIR).absolute(),
+        max_prompt_token_length=max_prompt_token_length,
+        max_concurrent_requests=max_concurrent_requests,
+        requests_per_minute=requests_per_minute,
+        tokens_per_minute=tokens_per_minute,
+    )
+    code_annotation_pipelines = create_pipelines_with_shared_llm(
+        pipeline_factory[pipeline_name], configs, llm_config
+    )
+    try:
+        reports = annotate_repositories(
+            code_annotation_pipelines,
+            num_load_processes=num_load_processes,
+            num_parallel_repositories=num_parallel_repositories,
+        )
+    finally:
+        code_annotation_pipelines[0].annotator.llm.close()
+
+    logger.info(
+        "Batch annotation finished:\n" + "\n".join(str(report) for report in reports)
+    )
+    return reports
+
+
+def load_manifest(
+    manifest_path: Path | str, defaults: Optional[Dict[str, Any]] = None
+) -> List[BaseConfig]:
+    """
+    Read the repository configs of a manifest, see run_batch_annotation_pipeline.
+    The entries of the manifest overwrite the defaults.
+    """
+    entries = json.loads(Path(manifest_path).read_text())
+    assert isinstance(entries, list), "The manifest must contain a list of repositories"
+    configs = [BaseConfig(**{**(defaults or dict()), **entry}) for entry in entries]
+    assert len(configs) > 0, f"No repositories found in {manifest_path}"
+    return configs
+
+
+def create_pipelines_with_shared_llm(
+    create_pipeline: Callable[..., "CodeAnnotationPipeline"],
+    configs: List[BaseConfig],
+    llm_config: LLMConfig,
+) -> List["CodeAnnotationPipeline"]:
+    """
+    Create a pipeline for each repository. The llm of the first pipeline is passed to all other pipelines.
+    """
+    code_annotation_pipelines: List["CodeAnnotationPipeline"] = []
+    for config in configs:
+        llm = (
+            code_annotation_pipelines[0].annotator.llm
+            if code_annotation_pipelines
+            else None
+        )
+        code_annotation_pipelines.append(create_pipeline(config, llm_config, llm=llm))
+    return code_annotation_pipelines
+
+
+def annotate_repositories(
+    code_annotation_pipelines: List["CodeAnnotationPipeline"],
+    num_load_processes: int,
+    num_parallel_repositories: int,
+) -> List[RepositoryThroughput]:
+    """
+    Load the repositories in processes and annotate each repository in a thread once it is loaded.
+    A repository that fails to load or annotate is reported, the other repositories continue.
+    """
+    # imported here, so that the command line interface (e.g. --help) starts fast
+    from llm_docstring_generator.pipelines.code_annotation_pipeline import (
+        load_sorted_python_files,
+    )
+
+    reports = [
+        RepositoryThroughput(repository_name=pipeline.config.repository_name)
+        for pipeline in code_annotation_pipelines
+    ]
+    with ProcessPoolExecutor(max_workers=num_load_processes) as load_executor:
+        with ThreadPoolExecutor(
+            max_workers=num_parallel_repositories
+        ) as annotation_executor:
+            load_futures: Dict[Future, int] = {
+                load_executor.submit(
+                    measure_time,
+                    load_sorted_python_files,
+                    pipeline.config,
+                    pipeline.load_steps,
+                ): index
+                for index, pipeline in enumerate(code_annotation_pipelines)
+            }
+            for load_future in as_completed(load_futures):
+                index = load_futures[load_future]
+                report = reports[index]
+                try:
+                    python_files, report.load_seconds = load_future.result()
+                except Exception as e:
+                    logger.exception(f"Loading {report.repository_name} failed")
+                    report.error = repr(e)
+                    continue
+                logger.info(
+                    f"Loaded {report.repository_name} in {report.load_seconds:.1f}s"
+                )
+                annotation_executor.submit(
+                    annotate_repository_and_report,
+                    code_annotation_pipelines[index],
+                    python_files,
+                    report,
+                )
+    return reports
+
+
+def measure_time(function: Callable, *args) -> Tuple[Any, float]:
+    start_time = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start_time
+
+
+def annotate_repository_and_report(
+    code_annotation_pipeline: "CodeAnnotationPipeline",
+    python_files: List[PythonFile],
+    report: RepositoryThroughput,
+) -> None:
+    try:
+        python_files, report.annotation_seconds = measure_time(
+            code_annotation_pipeline.annotate_repository, python_files
+        )
+    except Exception as e:
+        logger.exception(f"Annotating {report.repository_name} failed")
+        report.error = repr(e)
+        return
+    report.num_python_files = len(python_files)
+    report.num_annotations = count_annotations(python_files)
+    logger.info(str(report))
+
+
+def count_annotations(python_files: List[PythonFile]) -> int:
+    num_annotations = 0
+    for python_file in python_files:
+        llm_responses = [python_file.llm_response]
+        for code_object in [*python_file.functions, *python_file.classes]:
+            llm_responses.append(code_object.llm_response)
+        for class_ in python_file.classes:
+            llm_responses.extend(method.llm_response for method in class_.methods)
+        num_annotations += sum(llm_response != "" for llm_response in llm_responses)
+    return num_annotations
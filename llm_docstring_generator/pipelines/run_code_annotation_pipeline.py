@@ -1,15 +1,16 @@
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 from llm_docstring_generator.llm.llm_config import LLMConfig
 from llm_docstring_generator.llm.prompts import DEFAULT_DOCSTRING_SYSTEM_PROMPT
-from llm_docstring_generator.pipelines.code_annotation_pipeline import (
-    CodeAnnotationPipeline,
-)
-from llm_docstring_generator.pipelines.default_pipelines import pipeline_factory
 from llm_docstring_generator.utils.base_config import BaseConfig
 from loguru import logger
 
+if TYPE_CHECKING:
+    from llm_docstring_generator.pipelines.code_annotation_pipeline import (
+        CodeAnnotationPipeline,
+    )
+
 
 def run_code_annotation_pipeline(
     repository_name: str,
@@ -21,6 +22,14 @@ def run_code_annotation_pipeline(
     model: str = "gpt-4-0125-preview",
     max_prompt_token_length: int = 2048,
     pipeline_name: Optional[str] = None,
+    max_concurrent_requests: int = 1,
+    requests_per_minute: Optional[int] = None,
+    tokens_per_minute: Optional[int] = None,
+    num_workers: int = 1,
+    incremental: bool = False,
+    base_commit: Optional[str] = None,
+    resume: bool = False,
+    triage: bool = False,
 ):
     """
     Run the code annotation pipeline
@@ -36,8 +45,22 @@ def run_code_annotation_pipeline(
     :param pipeline_name: Name of the pipeline to be used, defaults to the model name if not set.
                           Useful when using arbitrary openai models together with openai-gpt pipeline.
                           Can also be used to call custom pipelines that where added to the pipeline_factory.
+    :param max_concurrent_requests: Maximum number of LLM requests in flight at the same time.
+                                    Values > 1 annotate independent functions/classes concurrently.
+    :param requests_per_minute: Rate limit of the LLM provider. Learned from the provider's response headers if not set.
+    :param tokens_per_minute: Token rate limit of the LLM provider, see requests_per_minute.
+    :param num_workers: Number of processes used to parse the repository.
+    :param incremental: Only annotate the functions/classes that changed since the last (incremental) run
+                        and the functions/classes that depend on them, reuse the stored annotations otherwise.
+    :param base_commit: Git commit for incremental runs, files changed since this commit are annotated again.
+    :param resume: Resume an interrupted run, i.e. reuse the annotations of its last checkpoint.
+    :param triage: Skip functions/classes that don't need an llm annotation, e.g. because they are already
+                   documented, trivial or test code. Their docstrings are still used as context.
     :return: Annotated python files
     """
+    # imported here, so that the command line interface (e.g. --help) starts fast
+    from llm_docstring_generator.pipelines.default_pipelines import pipeline_factory
+
     pipeline_name = pipeline_name or model
     assert pipeline_name in pipeline_factory, (
         f"Pipeline {pipeline_name} not found. "
@@ -52,16 +75,24 @@ def run_code_annotation_pipeline(
         remote_url=remote_url,
         cache_path=cache_path,  # type: ignore[arg-type]
         new_repository_path=new_repository_path,  # type: ignore[arg-type]
+        num_workers=num_workers,
+        incremental=incremental,
+        base_commit=base_commit,
+        resume=resume,
+        triage=triage,
     )
     llm_config = LLMConfig(
         system_prompt=system_prompt,
         model=model,
         db_root_path=config.cache_path,
         max_prompt_token_length=max_prompt_token_length,
+        max_concurrent_requests=max_concurrent_requests,
+        requests_per_minute=requests_per_minute,
+        tokens_per_minute=tokens_per_minute,
     )
-    code_annotation_pipeline: CodeAnnotationPipeline = pipeline_factory[pipeline_name](
-        config, llm_config
-    )
+    code_annotation_pipeline: "CodeAnnotationPipeline" = pipeline_factory[
+        pipeline_name
+    ](config, llm_config)
     python_files = code_annotation_pipeline.run()
     logger.info(f"Annotated {len(python_files)} python files")
     return python_files
@@ -16,6 +16,8 @@ class CodeObject:
     end_line: int  # end line of the function in the file
 
     llm_response: str = ""
+    # set by the triage (see CodeTriage) if the code object is not annotated by the llm, e.g. "documented"
+    skip_reason: Optional[str] = None
 
     @property
     def complete_import_name(self) -> str:
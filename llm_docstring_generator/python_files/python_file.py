@@ -17,7 +17,7 @@ class PythonFile:
     functions: List[Function]  # The functions in the file
     classes: List[Class]  # The classes in the file
     # The import dependencies in the file. Also takes into account implicit dependencies, e.g. if a function
-    # argument is a class from another file, this class will be added to the import_dependencies (via code2flow)
+    # argument is a class from another file, this class will be added to the import_dependencies (via the call graph)
     import_dependencies: List[Import]
     # LLM annotation response from the LLM
     llm_response: str = ""
@@ -0,0 +1,682 @@
+"""
+Build the function call graph of a repository using the ast of its python files.
+
+Nodes are the functions and methods of the repository (as Import objects), an edge (a, b) means that a calls b.
+Calls within nested functions are attributed to the enclosing top-level function or method.
+
+Calls are resolved as follows:
+    - foo() resolves to a function foo or to the constructor of a class Foo that is defined in the same file
+      or imported from the repository.
+    - self.foo(), cls.foo() and super().foo() resolve to the methods of the class (and its base classes).
+    - x.foo() resolves to the method foo of the class of x, if x is an instance of a repository class
+      (x = MyClass(...), a type annotation, or self.x = MyClass(...) in one of the methods of the class).
+    - module.foo() resolves to foo in the imported repository module.
+Calls that can't be resolved this way are matched by name, if there is exactly one function/method with this name
+in the repository. Calls on objects of 3rd party modules, builtins and literals are never matched by name.
+"""
+import ast
+import builtins
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import networkx as nx
+from llm_docstring_generator.parser.parsed_module import get_parsed_module
+from llm_docstring_generator.python_files.imports import Import
+from loguru import logger
+
+BUILTIN_NAMES = set(dir(builtins))
+
+# kinds of the objects names can be bound to
+MODULE = "module"
+CLASS = "class"
+INSTANCE = "instance"
+FUNCTION = "function"
+EXTERNAL = "external"  # 3rd party modules, builtins, literals, ...
+UNRESOLVED = (
+    "unresolved"  # imported from the repository, but not found (e.g. re-exported names)
+)
+
+# (kind, value), value is the module name for modules, otherwise the (class or function) Import
+Binding = Tuple[str, Optional[Import | str]]
+EXTERNAL_BINDING: Binding = (EXTERNAL, None)
+UNKNOWN_BINDING: Binding = ("unknown", None)
+
+FunctionNode = ast.FunctionDef | ast.AsyncFunctionDef
+
+
+@dataclass
+class ClassInfo:
+    import_: Import
+    module: "ModuleInfo"
+    node: ast.ClassDef
+    # method name -> method Import
+    methods: Dict[str, Import] = field(default_factory=dict)
+    # attribute name -> binding, from self.attribute = ... assignments in the methods
+    attribute_bindings: Dict[str, Binding] = field(default_factory=dict)
+    # resolved after all modules have been added
+    base_classes: List["ClassInfo"] = field(default_factory=list)
+
+
+@dataclass
+class ModuleInfo:
+    import_name: str
+    tree: ast.Module
+    functions: Dict[str, Import] = field(default_factory=dict)
+    classes: Dict[str, ClassInfo] = field(default_factory=dict)
+    # local name -> binding of the imports of the module
+    bindings: Dict[str, Binding] = field(default_factory=dict)
+    # (caller, function node, class of the method)
+    units: List[Tuple[Import, FunctionNode, Optional[ClassInfo]]] = field(
+        default_factory=list
+    )
+
+
+def build_call_graph(
+    repository_path: Path, source_paths: List[Path], all_imports: List[Import]
+) -> nx.DiGraph:
+    """
+    Build the call graph for all python files in source_paths.
+    All Imports in all_imports are added as nodes to the graph.
+    """
+    builder = CallGraphBuilder(repository_path)
+    for source_path in source_paths:
+        for python_filepath in sorted(source_path.rglob("*.py")):
+            builder.add_file(python_filepath)
+    G = builder.build()
+    G.add_nodes_from(all_imports)
+    return G
+
+
+class CallGraphBuilder:
+    def __init__(self, repository_path: Path):
+        self.repository_path = repository_path
+        self.modules: Dict[str, ModuleInfo] = dict()
+        # package name -> module name of its __init__.py
+        self.package_modules: Dict[str, str] = dict()
+        self.resolved_module_names: Dict[str, Optional[str]] = dict()
+        # name -> functions/constructors/methods with this name, used to match unresolved calls by name
+        self.functions_by_name: Dict[str, List[Import]] = dict()
+        self.constructors_by_name: Dict[str, List[Import]] = dict()
+        self.methods_by_name: Dict[str, List[Import]] = dict()
+
+    def add_file(self, python_filepath: Path) -> None:
+        relative_filepath = python_filepath.relative_to(self.repository_path)
+        import_name = ".".join(relative_filepath.with_suffix("").parts)
+        try:
+            with open(python_filepath, "r") as file:
+                tree = get_parsed_module(file.read()).tree
+        except (SyntaxError, UnicodeDecodeError, ValueError) as e:
+            logger.warning(f"Could not parse {python_filepath} due to {e}, skipping")
+            return
+        module = ModuleInfo(import_name=import_name, tree=tree)
+        self.modules[import_name] = module
+        if import_name.endswith(".__init__"):
+            self.package_modules[import_name[: -len(".__init__")]] = import_name
+        self.collect_definitions(module)
+
+    def collect_definitions(self, module: ModuleInfo) -> None:
+        """
+        Collect the top-level functions, classes and methods of a module.
+        Definitions inside of if/try/with blocks and classes defined inside of functions are collected as well.
+        """
+        stack: List[Tuple[List[ast.stmt], Optional[ClassInfo]]] = [
+            (module.tree.body, None)
+        ]
+        while stack:
+            statements, class_info = stack.pop()
+            for statement in statements:
+                if isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    import_ = self.add_function(module, statement, class_info)
+                    module.units.append((import_, statement, class_info))
+                    for node in iter_function_body(statement):
+                        if isinstance(node, ast.ClassDef):
+                            stack.append(
+                                (node.body, self.get_or_create_class_info(module, node))
+                            )
+                elif isinstance(statement, ast.ClassDef):
+                    stack.append(
+                        (
+                            statement.body,
+                            self.get_or_create_class_info(module, statement),
+                        )
+                    )
+                else:
+                    for child_statements in get_child_statements(statement):
+                        stack.append((child_statements, class_info))
+
+    def add_function(
+        self,
+        module: ModuleInfo,
+        function_node: FunctionNode,
+        class_info: Optional[ClassInfo],
+    ) -> Import:
+        if class_info is None:
+            import_ = Import(
+                import_name=module.import_name,
+                class_or_function_name=function_node.name,
+            )
+            module.functions[function_node.name] = import_
+            self.functions_by_name.setdefault(function_node.name, []).append(import_)
+            return import_
+
+        import_ = Import(
+            import_name=module.import_name,
+            class_or_function_name=class_info.import_.class_or_function_name,
+            method_name=function_node.name,
+        )
+        class_info.methods[function_node.name] = import_
+        self.methods_by_name.setdefault(function_node.name, []).append(import_)
+        if function_node.name == "__init__":
+            self.constructors_by_name.setdefault(class_info.node.name, []).append(
+                import_
+            )
+        return import_
+
+    def get_or_create_class_info(
+        self, module: ModuleInfo, class_node: ast.ClassDef
+    ) -> ClassInfo:
+        import_ = Import(
+            import_name=module.import_name, class_or_function_name=class_node.name
+        )
+        return module.classes.setdefault(
+            class_node.name, ClassInfo(import_=import_, module=module, node=class_node)
+        )
+
+    def build(self) -> nx.DiGraph:
+        G = nx.DiGraph()
+        # names imported in __init__.py files may be re-exported to other modules, so resolve them first
+        for module in sorted(
+            self.modules.values(),
+            key=lambda module: not module.import_name.endswith("__init__"),
+        ):
+            self.collect_import_bindings(module)
+        for module in self.modules.values():
+            for class_info in module.classes.values():
+                class_info.base_classes = self.resolve_base_classes(class_info)
+        for module in self.modules.values():
+            for _, function_node, method_class_info in module.units:
+                if method_class_info is not None:
+                    self.collect_attribute_bindings(
+                        module, function_node, method_class_info
+                    )
+        for module in self.modules.values():
+            for caller, function_node, method_class_info in module.units:
+                G.add_node(caller)
+                local_bindings = self.get_local_bindings(
+                    module, function_node, method_class_info
+                )
+                for node in iter_function_body(function_node):
+                    if not isinstance(node, ast.Call):
+                        continue
+                    callee = self.resolve_call(
+                        module, node, method_class_info, local_bindings, caller
+                    )
+                    if callee is not None and callee != caller:
+                        G.add_edge(caller, callee)
+        logger.debug(
+            f"Created call graph with {len(G.nodes)} nodes and {len(G.edges)} edges"
+        )
+        return G
+
+    def resolve_module_name(self, name: str) -> Optional[str]:
+        """
+        Resolve an import such as foo.bar to the module name of the repository, e.g. foo.bar, foo.bar.__init__ or
+        src.foo.bar if the repository uses a src layout (or bar, if the repository path is inside of the package).
+        """
+        if name in self.resolved_module_names:
+            return self.resolved_module_names[name]
+        module_name: Optional[str] = None
+        if name in self.modules:
+            module_name = name
+        elif name in self.package_modules:
+            module_name = self.package_modules[name]
+        else:
+            candidates = [
+                candidate
+                for candidate in list(self.modules) + list(self.package_modules)
+                if name.endswith("." + candidate) or candidate.endswith("." + name)
+            ]
+            if candidates:
+                longest_candidates = [
+                    candidate
+                    for candidate in candidates
+                    if len(candidate) == max(len(c) for c in candidates)
+                ]
+                if len(longest_candidates) == 1:
+                    module_name = self.package_modules.get(
+                        longest_candidates[0], longest_candidates[0]
+                    )
+        self.resolved_module_names[name] = module_name
+        return module_name
+
+    def get_symbol_binding(self, module_name: str, name: str) -> Binding:
+        module = self.modules[module_name]
+        if name in module.classes:
+            return CLASS, module.classes[name].import_
+        if name in module.functions:
+            return FUNCTION, module.functions[name]
+        if name in module.bindings:
+            # e.g. imports in __init__.py files
+            kind, value = module.bindings[name]
+            if kind in [CLASS, FUNCTION, MODULE]:
+                return kind, value
+        return UNRESOLVED, None
+
+    def collect_import_bindings(self, module: ModuleInfo) -> None:
+        package_parts = module.import_name.split(".")[:-1]
+        for node in ast.walk(module.tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    module_name = self.resolve_module_name(alias.name)
+                    if alias.asname is not None:
+                        module.bindings[alias.asname] = (
+                            (MODULE, module_name)
+                            if module_name is not None
+                            else EXTERNAL_BINDING
+                        )
+                    else:
+                        # import foo.bar binds foo, calls look like foo.bar.baz()
+                        module.bindings.setdefault(
+                            alias.name.split(".")[0], EXTERNAL_BINDING
+                        )
+                        if module_name is not None:
+                            module.bindings[alias.name] = (MODULE, module_name)
+            elif isinstance(node, ast.ImportFrom):
+                if node.level > 0:
+                    base_parts = package_parts[: len(package_parts) - node.level + 1]
+                    target = ".".join(
+                        base_parts + ([node.module] if node.module else [])
+                    )
+                else:
+                    target = node.module or ""
+                for alias in node.names:
+                    if alias.name == "*":
+                        continue
+                    local_name = alias.asname or alias.name
+                    submodule_name = self.resolve_module_name(
+                        f"{target}.{alias.name}" if target else alias.name
+                    )
+                    module_name = self.resolve_module_name(target) if target else None
+                    if submodule_name is not None:
+                        module.bindings[local_name] = (MODULE, submodule_name)
+                    elif module_name is not None:
+                        module.bindings[local_name] = self.get_symbol_binding(
+                            module_name, alias.name
+                        )
+                    else:
+                        module.bindings[local_name] = EXTERNAL_BINDING
+
+    def get_class_info(self, import_: Import) -> Optional[ClassInfo]:
+        module = self.modules.get(import_.import_name)
+        if module is None or import_.class_or_function_name is None:
+            return None
+        return module.classes.get(import_.class_or_function_name)
+
+    def resolve_base_classes(self, class_info: ClassInfo) -> List[ClassInfo]:
+        base_classes = []
+        for base in class_info.node.bases:
+            kind, value = self.resolve_expression(class_info.module, base, None, dict())
+            if kind == CLASS and isinstance(value, Import):
+                base_class_info = self.get_class_info(value)
+                if base_class_info is not None and base_class_info is not class_info:
+                    base_classes.append(base_class_info)
+        return base_classes
+
+    def find_method(
+        self, class_info: ClassInfo, method_name: str, include_class: bool = True
+    ) -> Optional[Import]:
+        """
+        Find method_name in the class or its base classes (depth first).
+        """
+        visited: Set[int] = set()
+        stack = [class_info] if include_class else class_info.base_classes[::-1]
+        while stack:
+            current = stack.pop()
+            if id(current) in visited:
+                continue
+            visited.add(id(current))
+            if method_name in current.methods:
+                return current.methods[method_name]
+            stack.extend(current.base_classes[::-1])
+        return None
+
+    def find_attribute_binding(
+        self, class_info: ClassInfo, attribute_name: str
+    ) -> Binding:
+        visited: Set[int] = set()
+        stack = [class_info]
+        while stack:
+            current = stack.pop()
+            if id(current) in visited:
+                continue
+            visited.add(id(current))
+            if attribute_name in current.attribute_bindings:
+                return current.attribute_bindings[attribute_name]
+            stack.extend(current.base_classes[::-1])
+        return UNKNOWN_BINDING
+
+    def resolve_name(
+        self,
+        module: ModuleInfo,
+        name: str,
+        class_info: Optional[ClassInfo],
+        local_bindings: Dict[str, Binding],
+    ) -> Binding:
+        if name in local_bindings:
+            return local_bindings[name]
+        if name in ["self", "cls"] and class_info is not None:
+            return (INSTANCE if name == "self" else CLASS), class_info.import_
+        if name in module.classes:
+            return CLASS, module.classes[name].import_
+        if name in module.functions:
+            return FUNCTION, module.functions[name]
+        if name in module.bindings:
+            return module.bindings[name]
+        if name in BUILTIN_NAMES:
+            return EXTERNAL_BINDING
+        return UNKNOWN_BINDING
+
+    def resolve_expression(
+        self,
+        module: ModuleInfo,
+        expression: ast.expr,
+        class_info: Optional[ClassInfo],
+        local_bindings: Dict[str, Binding],
+    ) -> Binding:
+        """
+        Resolve what an expression evaluates to.
+        """
+        if isinstance(expression, ast.Name):
+            return self.resolve_name(module, expression.id, class_info, local_bindings)
+        if isinstance(expression, ast.Attribute):
+            dotted_name = get_dotted_name(expression)
+            if dotted_name is not None and dotted_name in module.bindings:
+                # import foo.bar
+                return module.bindings[dotted_name]
+            kind, value = self.resolve_expression(
+                module, expression.value, class_info, local_bindings
+            )
+            if kind == EXTERNAL:
+                return EXTERNAL_BINDING
+            if kind == MODULE and isinstance(value, str):
+                return self.get_symbol_binding(value, expression.attr)
+            if kind == INSTANCE and isinstance(value, Import):
+                owner_class_info = self.get_class_info(value)
+                if owner_class_info is not None:
+                    return self.find_attribute_binding(
+                        owner_class_info, expression.attr
+                    )
+            return UNKNOWN_BINDING
+        if isinstance(expression, ast.Call):
+            kind, value = self.resolve_expression(
+                module, expression.func, class_info, local_bindings
+            )
+            if kind == CLASS:
+                return INSTANCE, value
+            if kind == EXTERNAL:
+                return EXTERNAL_BINDING
+            return UNKNOWN_BINDING
+        if isinstance(expression, ast.Subscript):
+            # type annotations such as Optional[MyClass]
+            if isinstance(expression.slice, (ast.Name, ast.Attribute)):
+                return self.resolve_expression(
+                    module, expression.slice, class_info, local_bindings
+                )
+            return UNKNOWN_BINDING
+        if isinstance(expression, ast.Constant) and isinstance(expression.value, str):
+            # string type annotations
+            try:
+                parsed_expression = ast.parse(expression.value, mode="eval").body
+            except SyntaxError:
+                return EXTERNAL_BINDING
+            return self.resolve_expression(
+                module, parsed_expression, class_info, local_bindings
+            )
+        if isinstance(expression, LITERAL_TYPES):
+            return EXTERNAL_BINDING
+        return UNKNOWN_BINDING
+
+    def resolve_instance_binding(
+        self,
+        module: ModuleInfo,
+        expression: ast.expr,
+        class_info: Optional[ClassInfo],
+        local_bindings: Dict[str, Binding],
+        is_annotation: bool = False,
+    ) -> Binding:
+        """
+        Binding of a variable that is assigned the value of expression (or annotated with expression).
+        """
+        kind, value = self.resolve_expression(
+            module, expression, class_info, local_bindings
+        )
+        if is_annotation and kind == CLASS:
+            return INSTANCE, value
+        if kind in [INSTANCE, EXTERNAL]:
+            return kind, value
+        return UNKNOWN_BINDING
+
+    def collect_attribute_bindings(
+        self, module: ModuleInfo, function_node: FunctionNode, class_info: ClassInfo
+    ) -> None:
+        """
+        Collect self.attribute = MyClass(...) assignments of the methods.
+        """
+        local_bindings = self.get_local_bindings(module, function_node, None)
+        for node in iter_function_body(function_node):
+            targets: List[ast.expr] = []
+            value: Optional[ast.expr] = None
+            if isinstance(node, ast.Assign):
+                targets, value = node.targets, node.value
+            elif isinstance(node, ast.AnnAssign):
+                targets, value = [node.target], node.annotation
+            for target in targets:
+                if (
+                    isinstance(target, ast.Attribute)
+                    and isinstance(target.value, ast.Name)
+                    and target.value.id == "self"
+                    and value is not None
+                ):
+                    binding = self.resolve_instance_binding(
+                        module,
+                        value,
+                        class_info,
+                        local_bindings,
+                        is_annotation=isinstance(node, ast.AnnAssign),
+                    )
+                    if binding != UNKNOWN_BINDING:
+                        class_info.attribute_bindings.setdefault(target.attr, binding)
+
+    def get_local_bindings(
+        self,
+        module: ModuleInfo,
+        function_node: FunctionNode,
+        class_info: Optional[ClassInfo],
+    ) -> Dict[str, Binding]:
+        """
+        Bindings of the (type annotated) arguments and local variables of a function. This is flow-insensitive,
+        the first assignment that can be resolved wins.
+        """
+        local_bindings: Dict[str, Binding] = dict()
+        arguments = function_node.args
+        for argument in (
+            arguments.posonlyargs
+            + arguments.args
+            + arguments.kwonlyargs
+            + [a for a in [arguments.vararg, arguments.kwarg] if a is not None]
+        ):
+            if argument.annotation is not None:
+                binding = self.resolve_instance_binding(
+                    module,
+                    argument.annotation,
+                    class_info,
+                    local_bindings,
+                    is_annotation=True,
+                )
+                if binding != UNKNOWN_BINDING:
+                    local_bindings[argument.arg] = binding
+
+        for node in iter_function_body(function_node):
+            if isinstance(node, ast.Assign):
+                names = [
+                    target.id for target in node.targets if isinstance(target, ast.Name)
+                ]
+                value: Optional[ast.expr] = node.value
+                is_annotation = False
+            elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+                names, value, is_annotation = [node.target.id], node.annotation, True
+            elif isinstance(node, (ast.With, ast.AsyncWith)):
+                for item in node.items:
+                    if isinstance(item.optional_vars, ast.Name):
+                        # context managers usually return self
+                        binding = self.resolve_instance_binding(
+                            module, item.context_expr, class_info, local_bindings
+                        )
+                        if binding != UNKNOWN_BINDING:
+                            local_bindings.setdefault(item.optional_vars.id, binding)
+                continue
+            else:
+                continue
+            for name in names:
+                if name in local_bindings or value is None:
+                    continue
+                binding = self.resolve_instance_binding(
+                    module, value, class_info, local_bindings, is_annotation
+                )
+                if binding != UNKNOWN_BINDING:
+                    local_bindings[name] = binding
+        return local_bindings
+
+    def get_constructor(self, class_import: Optional[Import | str]) -> Optional[Import]:
+        if not isinstance(class_import, Import):
+            return None
+        class_info = self.get_class_info(class_import)
+        if class_info is None:
+            return None
+        return self.find_method(class_info, "__init__")
+
+    def resolve_call(
+        self,
+        module: ModuleInfo,
+        call: ast.Call,
+        class_info: Optional[ClassInfo],
+        local_bindings: Dict[str, Binding],
+        caller: Import,
+    ) -> Optional[Import]:
+        func = call.func
+        if isinstance(func, ast.Name):
+            kind, value = self.resolve_name(module, func.id, class_info, local_bindings)
+            if kind == FUNCTION and isinstance(value, Import):
+                return value
+            if kind == CLASS:
+                return self.get_constructor(value)
+            if kind in [UNRESOLVED, "unknown"]:
+                return get_unique(
+                    self.functions_by_name.get(func.id, [])
+                    + self.constructors_by_name.get(func.id, [])
+                )
+            return None
+
+        if not isinstance(func, ast.Attribute):
+            return None
+        method_name = func.attr
+        owner = func.value
+        if (
+            isinstance(owner, ast.Call)
+            and isinstance(owner.func, ast.Name)
+            and owner.func.id == "super"
+        ):
+            if class_info is not None:
+                method = self.find_method(class_info, method_name, include_class=False)
+                if method is not None:
+                    return method
+            return self.match_method_by_name(method_name, caller)
+
+        kind, value = self.resolve_expression(module, owner, class_info, local_bindings)
+        if kind == EXTERNAL:
+            return None
+        if kind in [CLASS, INSTANCE] and isinstance(value, Import):
+            owner_class_info = self.get_class_info(value)
+            if owner_class_info is not None:
+                method = self.find_method(owner_class_info, method_name)
+                if method is not None:
+                    return method
+        if kind == MODULE and isinstance(value, str):
+            symbol_kind, symbol = self.get_symbol_binding(value, method_name)
+            if symbol_kind == FUNCTION and isinstance(symbol, Import):
+                return symbol
+            if symbol_kind == CLASS:
+                return self.get_constructor(symbol)
+        return self.match_method_by_name(method_name, caller)
+
+    def match_method_by_name(
+        self, method_name: str, caller: Import
+    ) -> Optional[Import]:
+        # functions of the same file are called directly, not via an attribute
+        return get_unique(
+            self.methods_by_name.get(method_name, [])
+            + [
+                function
+                for function in self.functions_by_name.get(method_name, [])
+                if function.import_name != caller.import_name
+            ]
+        )
+
+
+LITERAL_TYPES = (
+    ast.Constant,
+    ast.JoinedStr,
+    ast.List,
+    ast.Tuple,
+    ast.Set,
+    ast.Dict,
+    ast.ListComp,
+    ast.SetComp,
+    ast.DictComp,
+    ast.GeneratorExp,
+    ast.BinOp,
+    ast.Compare,
+    ast.BoolOp,
+)
+
+
+def get_unique(imports: List[Import]) -> Optional[Import]:
+    unique_imports = set(imports)
+    if len(unique_imports) == 1:
+        return unique_imports.pop()
+    return None
+
+
+def get_dotted_name(expression: ast.expr) -> Optional[str]:
+    if isinstance(expression, ast.Name):
+        return expression.id
+    if isinstance(expression, ast.Attribute):
+        value = get_dotted_name(expression.value)
+        return f"{value}.{expression.attr}" if value is not None else None
+    return None
+
+
+def get_child_statements(statement: ast.stmt) -> Iterator[List[ast.stmt]]:
+    for field_name in ["body", "orelse", "finalbody"]:
+        child_statements = getattr(statement, field_name, None)
+        if isinstance(child_statements, list):
+            yield child_statements
+    for handler in getattr(statement, "handlers", []):
+        yield handler.body
+    for case in getattr(statement, "cases", []):
+        yield case.body
+
+
+def iter_function_body(function_node: FunctionNode) -> Iterator[ast.AST]:
+    """
+    Walk all nodes of the function body, including nested functions but excluding nested classes
+    (which are yielded, but not walked).
+    """
+    stack: List[ast.AST] = list(reversed(function_node.body))
+    while stack:
+        node = stack.pop()
+        yield node
+        if isinstance(node, ast.ClassDef):
+            continue
+        stack.extend(reversed(list(ast.iter_child_nodes(node))))
@@ -23,7 +23,7 @@ __all__ = [
 def extract_class_only_import_dependencies(
     config: BaseConfig, import_: Import
 ) -> List[Import]:
-    return get_code2flow_import_dependencies(config, import_)
+    return get_call_graph_import_dependencies(config, import_)
 
 
 @lru_cache(maxsize=None)
@@ -32,9 +32,9 @@ def extract_function_import_dependencies(
     import_: Import,
     function_node: ast.FunctionDef | ast.AsyncFunctionDef,
 ) -> List[Import]:
-    import_dependencies = get_code2flow_import_dependencies(config, import_)
+    import_dependencies = get_call_graph_import_dependencies(config, import_)
 
-    # this should be in responsibility of code2flow, but need to be done here for nowt
+    # the call graph only contains calls, arguments annotated with a class are added here
     try:
         import_dependencies_from_type_annotations = (
             extract_import_dependendencies_from_type_annotations(
@@ -56,7 +56,7 @@ def extract_function_import_dependencies(
 
 
 @lru_cache(maxsize=None)
-def get_code2flow_import_dependencies(
+def get_call_graph_import_dependencies(
     config: BaseConfig, import_: Import
 ) -> List[Import]:
     """
@@ -98,6 +98,25 @@ def extract_import_dependendencies_from_type_annotations(
             ...
     then we can infer that MyModel is a dependency of eval.
     """
+    file_imports = get_file_imports(config, import_name)
+
+    import_annotations: List[Import] = []
+    for type_annotation in parse_type_annotations(function_node):
+        for import_ in file_imports:
+            if type_annotation is not None and type_annotation in [
+                import_.class_or_function_name,
+                import_.method_name,
+            ]:
+                import_annotations.append(import_)
+                break
+    return import_annotations
+
+
+@lru_cache(maxsize=None)
+def get_file_imports(config: BaseConfig, import_name: str) -> List[Import]:
+    """
+    Get all imports of the file import_name that point to the repository.
+    """
     # this fails if the python name contains . e.g.
     # optuna/optuna/storages/_rdb/alembic/versions/v1.2.0.a.py
     # As this isn't common, there is no try to fix this atm
@@ -111,18 +130,7 @@ def extract_import_dependendencies_from_type_annotations(
         import_name=import_name,
         all_imports=get_all_imports(config),
     )
-    file_imports = remove_3rd_party_imports(config, file_imports)
-
-    import_annotations: List[Import] = []
-    for type_annotation in parse_type_annotations(function_node):
-        for import_ in file_imports:
-            if type_annotation is not None and type_annotation in [
-                import_.class_or_function_name,
-                import_.method_name,
-            ]:
-                import_annotations.append(import_)
-                break
-    return import_annotations
+    return remove_3rd_party_imports(config, file_imports)
 
 
 def parse_type_annotations(
@@ -1,5 +1,5 @@
-from itertools import cycle
-from typing import List
+import heapq
+from typing import Dict, Iterator, List, Set, Tuple
 
 import networkx as nx
 from llm_docstring_generator.python_files.python_file import PythonFile
@@ -26,53 +26,123 @@ def sort_python_files_by_imports(python_files: List[PythonFile]) -> List[PythonF
 
 
 class NodeIterator:
+    """
+    Iterate over the nodes of the graph in a topological order in O((V + E) log V).
+
+    Strongly connected components (import cycles) are condensed into single nodes, the condensed graph
+    is ordered with Kahn's algorithm. Among the nodes that are ready, the root nodes come first, then the
+    node with the smallest name, so that the order is deterministic.
+    Within a cycle, nodes are emitted as soon as all their predecessors have been visited. If no such node exists,
+    the cycle is broken at the node with the fewest unvisited predecessors (ties broken by name).
+    The broken cycles are recorded in broken_cycles as (node, unvisited predecessors).
+    """
+
     def __init__(self, G: nx.DiGraph):
         self.G = G
         self.nodes: List[str] = list(self.G.nodes)
         self.root_nodes: List[str] = sorted(
             [node for node, degree in self.G.in_degree() if degree == 0]
         )
-        self.visited: List[str] = []
-        self.loop_count = 0
+        self.broken_cycles: List[Tuple[str, List[str]]] = []
 
-    @property
-    def not_visited(self):
-        return sorted(list(set(self.nodes) - set(self.visited)))
-
-    def __iter__(self):
+    def __iter__(self) -> Iterator[str]:
         """
         Iterate over the nodes of the graph. The nodes are visited in a topological order.
-        When a node is returned, all its predecessors (it's imports) have already been visited.
-        :return:
+        When a node is returned, all its predecessors (it's imports) have already been visited,
+        unless the node is part of an import cycle.
         """
-        yield from self.root_nodes
-        self.visited = self.root_nodes
-
-        parent_nodes_cycle = cycle(self.not_visited)
-        while self.not_visited:
-            node: str = next(parent_nodes_cycle)
-            # factor 4 is arbitrary, but should be large enough to ensure that all nodes are visited
-            should_break = self.loop_count > len(self.nodes) * 4
-            if self.should_visit_node(node) or should_break:
-                if should_break:
-                    logger.warning(
-                        f"Stopping condition reached. {node} depends on "
-                        f"the following imports {[n for n in self.G.predecessors(node) if n not in self.visited]} "
-                        f"that have not yet been visited."
-                    )
+        self.broken_cycles = []
+        components = [
+            sorted(component) for component in nx.strongly_connected_components(self.G)
+        ]
+        node2component = {
+            node: index
+            for index, component in enumerate(components)
+            for node in component
+        }
+        # number of unvisited edges from other components
+        num_pending_edges = [0] * len(components)
+        for u, v in self.G.edges:
+            if node2component[u] != node2component[v]:
+                num_pending_edges[node2component[v]] += 1
+        num_unvisited_predecessors = dict(self.G.in_degree())
+
+        def get_key(index: int) -> Tuple[bool, str, int]:
+            # acyclic nodes are preferred over cycles, then the node with the smallest name
+            return len(components[index]) > 1, components[index][0], index
+
+        # the root nodes are yielded first, all other components without pending edges are ready,
+        # i.e. cycles and nodes that only depend on themselves
+        ready = [
+            get_key(index)
+            for index in range(len(components))
+            if num_pending_edges[index] == 0
+            and num_unvisited_predecessors[components[index][0]] > 0
+        ]
+
+        def visit(node: str) -> None:
+            for successor in self.G.successors(node):
+                num_unvisited_predecessors[successor] -= 1
+                index = node2component[successor]
+                if index != node2component[node]:
+                    num_pending_edges[index] -= 1
+                    if num_pending_edges[index] == 0:
+                        heapq.heappush(ready, get_key(index))
+
+        for node in self.root_nodes:
+            yield node
+            visit(node)
+
+        heapq.heapify(ready)
+        while ready:
+            _, _, index = heapq.heappop(ready)
+            for node in self._iter_component(
+                set(components[index]), num_unvisited_predecessors
+            ):
                 yield node
+                visit(node)
 
-                self.visited.append(node)
-                parent_nodes_cycle = cycle(self.not_visited)
-                self.loop_count = 0
-            else:
-                self.loop_count += 1
+        if self.broken_cycles:
+            logger.warning(
+                f"Broke {len(self.broken_cycles)} import cycles: {self.broken_cycles}"
+            )
 
-    def should_visit_node(self, node):
-        parent_nodes_visited = all(
-            [parent_node in self.visited for parent_node in self.G.predecessors(node)]
-        )
-        return parent_nodes_visited and node not in self.visited
+    def _iter_component(
+        self, component: Set[str], num_unvisited_predecessors: Dict[str, int]
+    ) -> Iterator[str]:
+        """
+        Iterate over the nodes of a strongly connected component.
+        The caller updates num_unvisited_predecessors after each yielded node.
+        """
+        if len(component) == 1:
+            yield from component
+            return
+        # heap of (num_unvisited_predecessors[node], node), outdated entries are skipped
+        candidates = [(num_unvisited_predecessors[node], node) for node in component]
+        heapq.heapify(candidates)
+        visited: Set[str] = set()
+        while candidates:
+            num_unvisited, node = heapq.heappop(candidates)
+            if node in visited or num_unvisited != num_unvisited_predecessors[node]:
+                continue
+            if num_unvisited > 0:
+                unvisited_predecessors = sorted(
+                    predecessor
+                    for predecessor in self.G.predecessors(node)
+                    if predecessor in component and predecessor not in visited
+                )
+                logger.debug(
+                    f"Breaking import cycle at {node}, which depends on "
+                    f"{unvisited_predecessors} that have not yet been visited."
+                )
+                self.broken_cycles.append((node, unvisited_predecessors))
+            visited.add(node)
+            yield node
+            for successor in self.G.successors(node):
+                if successor in component and successor not in visited:
+                    heapq.heappush(
+                        candidates, (num_unvisited_predecessors[successor], successor)
+                    )
 
 
 def create_python_file_dependency_graph(python_files: List[PythonFile]) -> nx.DiGraph:
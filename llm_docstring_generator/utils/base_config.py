@@ -23,6 +23,20 @@ class BaseConfig:
                 Defaults to ~/.cache/llm_docstring_generator/{repository_name}_project
 
     new_repository_path: New path where the annotated repository will be saved.
+
+    use_parse_cache: Whether to cache the parsed python files in cache_path / "parse_cache",
+                     so that only changed files need to be parsed again. Entries that a run did not use are deleted.
+    num_workers: Number of processes used to parse the python files of the repository.
+    incremental: Whether to only annotate the code objects that changed since the last run (and the code objects
+                 that depend on them). The annotations are stored in cache_path / "annotation_state.db".
+    base_commit: Optional git commit for incremental runs. All code objects of python files that changed
+                 since this commit are annotated again.
+    resume: Whether to resume an interrupted run, i.e. to reuse the annotations of its last checkpoint.
+            Annotations are only checkpointed if incremental or resume is set, so set it for the first run as well.
+            If the last run completed, all code objects are annotated again (unless incremental is set).
+    checkpoint_interval: Seconds between two checkpoints of the annotations in cache_path / "annotation_state.db".
+    triage: Whether to skip functions/classes that don't need an llm annotation, e.g. because they already have
+            a docstring (see CodeTriage).
     """
 
     repository_name: str
@@ -30,6 +44,13 @@ class BaseConfig:
     remote_url: Optional[str] = None
     cache_path: Path = None  # type: ignore
     new_repository_path: Path = None  # type: ignore
+    use_parse_cache: bool = True
+    num_workers: int = 1
+    incremental: bool = False
+    base_commit: Optional[str] = None
+    resume: bool = False
+    checkpoint_interval: float = 60.0
+    triage: bool = False
 
     def __post_init__(self):
         if self.repository_path is None and self.remote_url is None:
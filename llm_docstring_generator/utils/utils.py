@@ -1,9 +1,13 @@
 import os
-from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional
 
 from llm_docstring_generator.parser.ast_parser import AstParser
+from llm_docstring_generator.parser.parse_cache import (
+    ParseCache,
+    get_hash,
+    get_parse_cache,
+)
 from llm_docstring_generator.python_files.imports import Import
 from llm_docstring_generator.utils.base_config import BaseConfig
 
@@ -23,8 +27,18 @@ def get_import_name(repository_path: Path, python_filepath: Path) -> str:
         raise ValueError(f"File {python_filepath} is not a python file")
 
 
-@lru_cache(maxsize=None)
+# config -> all imports of the repository. Explicit cache, so that it can be shared with worker processes
+ALL_IMPORTS_CACHE: Dict[BaseConfig, List[Import]] = dict()
+
+
 def get_all_imports(config: BaseConfig) -> list[Import]:
+    if config not in ALL_IMPORTS_CACHE:
+        ALL_IMPORTS_CACHE[config] = collect_all_imports(config)
+    return ALL_IMPORTS_CACHE[config]
+
+
+def collect_all_imports(config: BaseConfig) -> list[Import]:
+    parse_cache = get_parse_cache(config) if config.use_parse_cache else None
     imports = []
 
     for python_filepath in config.repository_path.rglob("*.py"):
@@ -33,36 +47,54 @@ def get_all_imports(config: BaseConfig) -> list[Import]:
         import_name = get_import_name(
             repository_path=config.repository_path, python_filepath=python_filepath
         )
-        parser = AstParser(codestring=codestring)
-        function_nodes = parser.extract_function_nodes()
-        imports += [
-            Import(
-                import_name=import_name,
-                class_or_function_name=function_node.name,
-                method_name=None,
-            )
-            for function_node in function_nodes
-        ]
+        imports += get_file_symbols(codestring, import_name, parse_cache)
+    return imports
+
+
+def get_file_symbols(
+    codestring: str, import_name: str, parse_cache: Optional[ParseCache] = None
+) -> List[Import]:
+    """
+    Get all functions, classes and methods defined in a file.
+    """
+    if parse_cache is not None:
+        key = parse_cache.get_key("symbols", import_name, get_hash(codestring))
+        file_symbols = parse_cache.load(key)
+        if file_symbols is None:
+            file_symbols = get_file_symbols(codestring, import_name)
+            parse_cache.save(key, file_symbols)
+        return file_symbols
+
+    parser = AstParser(codestring=codestring)
+    function_nodes = parser.extract_function_nodes()
+    imports = [
+        Import(
+            import_name=import_name,
+            class_or_function_name=function_node.name,
+            method_name=None,
+        )
+        for function_node in function_nodes
+    ]
 
-        class_nodes = parser.extract_class_nodes()
+    class_nodes = parser.extract_class_nodes()
+    imports += [
+        Import(
+            import_name=import_name,
+            class_or_function_name=class_node.name,
+            method_name=None,
+        )
+        for class_node in class_nodes
+    ]
+    for class_node in class_nodes:
+        method_nodes = parser.extract_method_nodes_from_class_node(class_node)
         imports += [
             Import(
                 import_name=import_name,
                 class_or_function_name=class_node.name,
-                method_name=None,
+                method_name=method_node.name,
             )
-            for class_node in class_nodes
+            for method_node in method_nodes
         ]
-        for class_node in class_nodes:
-            method_nodes = parser.extract_method_nodes_from_class_node(class_node)
-            imports += [
-                Import(
-                    import_name=import_name,
-                    class_or_function_name=class_node.name,
-                    method_name=method_node.name,
-                )
-                for method_node in method_nodes
-            ]
     return imports
 
 
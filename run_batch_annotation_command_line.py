@@ -0,0 +1,7 @@
+import fire
+from llm_docstring_generator.pipelines.run_batch_annotation_pipeline import (
+    run_batch_annotation_pipeline,
+)
+
+if __name__ == "__main__":
+    fire.Fire(run_batch_annotation_pipeline)
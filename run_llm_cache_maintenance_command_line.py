@@ -0,0 +1,15 @@
+import fire
+from llm_docstring_generator.llm.cache_maintenance import (
+    compact_llm_cache,
+    evict_llm_cache,
+)
+from llm_docstring_generator.llm.cache_server import serve_llm_cache
+
+if __name__ == "__main__":
+    fire.Fire(
+        {
+            "compact": compact_llm_cache,
+            "evict": evict_llm_cache,
+            "serve": serve_llm_cache,
+        }
+    )
@@ -0,0 +1,137 @@
+import threading
+import time
+from typing import Dict, List
+
+from llm_docstring_generator.annotator.annotation_graph import build_annotation_graph
+from llm_docstring_generator.annotator.code_annotator import DebugAnnotator
+from llm_docstring_generator.annotator.metadata_provider import DebugMetaDataProvider
+from llm_docstring_generator.llm.llm import DebugLLM
+from llm_docstring_generator.llm.llm_config import LLMConfig
+from llm_docstring_generator.llm.resilience import LLMCallFailed
+from llm_docstring_generator.parser.load_python_files import load_python_files
+from llm_docstring_generator.sorters.sort_python_files import (
+    sort_python_files_by_imports,
+)
+from tests.fixtures import config_llm_docstring_generator  # noqa: F401
+
+
+class SlowDebugLLM(DebugLLM):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = threading.Lock()
+        self.num_in_flight = 0
+        self.max_in_flight = 0
+
+    def call_llm(self, prompt: str) -> str:
+        with self.lock:
+            self.num_in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.num_in_flight)
+        time.sleep(0.005)
+        with self.lock:
+            self.num_in_flight -= 1
+        return prompt
+
+
+def get_llm_responses(python_files):
+    llm_responses = dict()
+    for python_file in python_files:
+        llm_responses[python_file.import_name] = python_file.llm_response
+        for function_or_class in python_file.functions + python_file.classes:
+            llm_responses[
+                function_or_class.complete_import_name
+            ] = function_or_class.llm_response
+        for class_ in python_file.classes:
+            for method in class_.methods:
+                llm_responses[method.complete_import_name] = method.llm_response
+    return llm_responses
+
+
+def test_annotation_graph_dependencies_are_annotated_first(
+    config_llm_docstring_generator,  # noqa: F811
+):
+    python_files = sort_python_files_by_imports(
+        load_python_files(config_llm_docstring_generator)
+    )
+    nodes = build_annotation_graph(python_files)
+    name2indices: Dict[str, List[int]] = dict()
+    for node in nodes:
+        name2indices.setdefault(node.name, []).append(node.index)
+
+    assert [node.index for node in nodes] == list(range(len(nodes)))
+    num_dependencies = 0
+    for node in nodes:
+        assert all(dependency < node.index for dependency in node.dependencies)
+        if node.code_object is None:
+            continue
+        for import_dependency in node.code_object.import_dependencies:
+            for index in name2indices.get(import_dependency.complete_import_name, []):
+                if index < node.index:
+                    num_dependencies += 1
+                    assert index in node.dependencies, (node.name, index)
+    assert num_dependencies > 65, num_dependencies
+
+
+def test_concurrent_annotation_matches_sequential_annotation(
+    config_llm_docstring_generator,  # noqa: F811
+):
+    llm_responses = []
+    for max_concurrent_requests in [1, 8]:
+        llm = SlowDebugLLM(
+            config=LLMConfig(
+                model="debug", max_concurrent_requests=max_concurrent_requests
+            )
+        )
+        annotator = DebugAnnotator(
+            llm=llm, metadata_provider_class=DebugMetaDataProvider
+        )
+        python_files = sort_python_files_by_imports(
+            load_python_files(config_llm_docstring_generator)
+        )
+        annotator(python_files)
+        llm_responses.append(get_llm_responses(python_files))
+        assert llm.max_in_flight <= max_concurrent_requests
+
+    assert llm.max_in_flight > 1
+    assert llm_responses[0] == llm_responses[1]
+
+
+class TemporarilyFailingSlowDebugLLM(SlowDebugLLM):
+    """
+    Fails the first num_failures calls.
+    """
+
+    def __init__(self, *args, num_failures: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.num_failures = num_failures
+        self.num_calls = 0
+
+    def __call__(self, prompt: str) -> str:
+        with self.lock:
+            self.num_calls += 1
+            num_calls = self.num_calls
+        if num_calls <= self.num_failures:
+            raise LLMCallFailed("backend down")
+        return super().__call__(prompt)
+
+
+def test_dependents_of_failed_nodes_wait_for_the_retry(
+    config_llm_docstring_generator,  # noqa: F811
+):
+    llm_responses = []
+    for num_failures in [0, 8]:
+        llm = TemporarilyFailingSlowDebugLLM(
+            config=LLMConfig(model="debug", max_concurrent_requests=8),
+            num_failures=num_failures,
+        )
+        annotator = DebugAnnotator(
+            llm=llm, metadata_provider_class=DebugMetaDataProvider
+        )
+        python_files = sort_python_files_by_imports(
+            load_python_files(config_llm_docstring_generator)
+        )
+        annotator(python_files)
+        assert annotator.failed_annotations == []
+        llm_responses.append(get_llm_responses(python_files))
+
+    # the dependents of the failed nodes see their annotations
+    assert llm_responses[0] == llm_responses[1]
@@ -0,0 +1,180 @@
+from pathlib import Path
+
+import pytest
+from llm_docstring_generator.annotator.annotation_state import (
+    AnnotationState,
+    create_annotation_state,
+)
+from llm_docstring_generator.annotator.code_annotator import DebugAnnotator
+from llm_docstring_generator.annotator.metadata_provider import DebugMetaDataProvider
+from llm_docstring_generator.llm.llm import DebugLLM
+from llm_docstring_generator.llm.llm_config import LLMConfig
+from llm_docstring_generator.parser.load_python_files import load_python_files
+from llm_docstring_generator.sorters.sort_python_files import (
+    sort_python_files_by_imports,
+)
+from llm_docstring_generator.utils.base_config import BaseConfig
+
+
+class CountingDebugLLM(DebugLLM):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prompts = []
+
+    def __call__(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        return super().__call__(prompt)
+
+
+def annotate(config: BaseConfig, annotation_state: AnnotationState, change=None):
+    python_files = sort_python_files_by_imports(load_python_files(config))
+    if change is not None:
+        change(python_files)
+    llm = CountingDebugLLM(config=LLMConfig(model="debug"))
+    annotator = DebugAnnotator(
+        llm,
+        metadata_provider_class=DebugMetaDataProvider,
+        annotation_state=annotation_state,
+    )
+    annotator(python_files)
+    return python_files, llm.prompts
+
+
+def test_incremental_annotation_only_annotates_changed_code_objects(tmp_path):
+    config = BaseConfig(
+        repository_name="mock_repo",
+        repository_path=Path(__file__).parent.parent / "sorters" / "mock_repo",
+        cache_path=tmp_path,
+    )
+    annotation_state = AnnotationState(config)
+
+    python_files, prompts = annotate(config, annotation_state)
+    num_annotations = len(prompts)
+    assert num_annotations > 0
+
+    # nothing changed, all annotations are restored
+    restored_python_files, prompts = annotate(config, annotation_state)
+    assert prompts == []
+    for python_file, restored_python_file in zip(python_files, restored_python_files):
+        assert python_file.llm_response == restored_python_file.llm_response
+        for function, restored_function in zip(
+            python_file.functions, restored_python_file.functions
+        ):
+            assert restored_function.llm_response == function.llm_response != ""
+
+    def change_dummy_process(python_files):
+        python_file = next(pf for pf in python_files if pf.import_name == "b")
+        function = next(
+            f
+            for f in python_file.functions
+            if f.import_.class_or_function_name == "dummy_process"
+        )
+        function.codestring += "\n    # changed"
+
+    python_files, prompts = annotate(
+        config, annotation_state, change=change_dummy_process
+    )
+    annotated_names = {prompt.split("\n")[0] for prompt in prompts}
+    # b.dummy_process changed, c.dummy_a and c.dummy_b call it
+    assert any("dummy_process" in name for name in annotated_names)
+    assert any("dummy_a" in name for name in annotated_names)
+    assert any("dummy_b" in name for name in annotated_names)
+    assert not any("DummyClass" in name for name in annotated_names)
+    assert 0 < len(prompts) < num_annotations
+
+
+class InterruptedDebugLLM(CountingDebugLLM):
+    def __call__(self, prompt: str) -> str:
+        if len(self.prompts) == 3:
+            raise KeyboardInterrupt
+        return super().__call__(prompt)
+
+
+def test_interrupted_run_is_resumed_from_checkpoint(tmp_path):
+    config = BaseConfig(
+        repository_name="mock_repo",
+        repository_path=Path(__file__).parent.parent / "sorters" / "mock_repo",
+        cache_path=tmp_path,
+    )
+    _, prompts = annotate(config, AnnotationState(config, restore_completed_runs=False))
+    num_annotations = len(prompts)
+
+    python_files = sort_python_files_by_imports(load_python_files(config))
+    llm = InterruptedDebugLLM(config=LLMConfig(model="debug"))
+    annotator = DebugAnnotator(
+        llm,
+        metadata_provider_class=DebugMetaDataProvider,
+        annotation_state=AnnotationState(
+            config, restore_completed_runs=False, checkpoint_interval=1e9
+        ),
+    )
+    with pytest.raises(KeyboardInterrupt):
+        annotator(python_files)
+
+    # the 3 annotations before the interruption are restored from the checkpoint
+    _, prompts = annotate(config, AnnotationState(config, restore_completed_runs=False))
+    assert len(prompts) == num_annotations - 3
+
+    # the resumed run completed, the next run annotates everything again
+    _, prompts = annotate(config, AnnotationState(config, restore_completed_runs=False))
+    assert len(prompts) == num_annotations
+
+
+PROPERTY_MODULE = """
+class A:
+    @property
+    def x(self):
+        return self._x
+
+    @x.setter
+    def x(self, value):
+        self._x = value
+"""
+
+
+def test_same_named_code_objects_are_restored(tmp_path):
+    repository_path = tmp_path / "property_repo"
+    (repository_path / "pkg").mkdir(parents=True)
+    (repository_path / "pkg" / "__init__.py").write_text("")
+    (repository_path / "pkg" / "a.py").write_text(PROPERTY_MODULE)
+    config = BaseConfig(
+        repository_name="property_repo",
+        repository_path=repository_path,
+        cache_path=tmp_path / "cache",
+    )
+    annotation_state = AnnotationState(config)
+
+    def get_property_responses(python_files):
+        python_file = next(pf for pf in python_files if pf.import_name == "pkg.a")
+        return [method.llm_response for method in python_file.classes[0].methods]
+
+    python_files, _ = annotate(config, annotation_state)
+    llm_responses = get_property_responses(python_files)
+    # getter and setter share the name pkg.a.A.x
+    assert len(llm_responses) == 2
+
+    restored_python_files, prompts = annotate(config, annotation_state)
+    assert prompts == []
+    restored_llm_responses = get_property_responses(restored_python_files)
+    assert restored_llm_responses == llm_responses
+    assert all(restored_llm_responses)
+
+
+def test_annotation_state_is_only_created_for_incremental_or_resumed_runs(tmp_path):
+    config = BaseConfig(
+        repository_name="mock_repo",
+        repository_path=Path(__file__).parent.parent / "sorters" / "mock_repo",
+        cache_path=tmp_path,
+    )
+    assert create_annotation_state(config) is None
+    assert not (tmp_path / "annotation_state.db").exists()
+
+    config.resume = True
+    annotation_state = create_annotation_state(config)
+    assert annotation_state is not None
+    assert not annotation_state.restore_completed_runs
+    assert (tmp_path / "annotation_state.db").exists()
+
+    config.incremental = True
+    annotation_state = create_annotation_state(config)
+    assert annotation_state is not None and annotation_state.restore_completed_runs
@@ -0,0 +1,71 @@
+from pathlib import Path
+
+import pytest
+from llm_docstring_generator.annotator.code_annotator import DebugAnnotator
+from llm_docstring_generator.annotator.metadata_provider import DebugMetaDataProvider
+from llm_docstring_generator.llm.llm import DebugLLM
+from llm_docstring_generator.llm.llm_config import LLMConfig
+from llm_docstring_generator.llm.resilience import LLMCallFailed
+from llm_docstring_generator.parser.load_python_files import load_python_files
+from llm_docstring_generator.sorters.sort_python_files import (
+    sort_python_files_by_imports,
+)
+from llm_docstring_generator.utils.base_config import BaseConfig
+from tests.fixtures import config_llm_docstring_generator  # noqa: F401
+
+
+class TemporarilyFailingDebugLLM(DebugLLM):
+    """
+    Fails the first num_failures calls.
+    """
+
+    def __init__(self, *args, num_failures: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.num_failures = num_failures
+        self.num_calls = 0
+
+    def __call__(self, prompt: str) -> str:
+        self.num_calls += 1
+        if self.num_calls <= self.num_failures:
+            raise LLMCallFailed("backend down")
+        return super().__call__(prompt)
+
+
+def test_failed_annotations_are_retried_at_the_end(
+    config_llm_docstring_generator,  # noqa: F811
+):
+    python_files = sort_python_files_by_imports(
+        load_python_files(config_llm_docstring_generator)
+    )
+    llm = TemporarilyFailingDebugLLM(config=LLMConfig(model="debug"), num_failures=3)
+    annotator = DebugAnnotator(llm, metadata_provider_class=DebugMetaDataProvider)
+    annotator(python_files)
+
+    assert annotator.failed_annotations == []
+    for python_file in python_files:
+        if python_file.codestring == "":
+            continue
+        assert python_file.llm_response is not None
+        for function in python_file.functions:
+            assert function.llm_response is not None
+
+
+@pytest.mark.parametrize("max_concurrent_requests", [1, 2])
+def test_failed_annotations_are_retried_once(tmp_path, max_concurrent_requests):
+    config = BaseConfig(
+        repository_name="mock_repo",
+        repository_path=Path(__file__).parent.parent / "sorters" / "mock_repo",
+        cache_path=tmp_path,
+    )
+    python_files = sort_python_files_by_imports(load_python_files(config))
+    llm = TemporarilyFailingDebugLLM(
+        config=LLMConfig(
+            model="debug", max_concurrent_requests=max_concurrent_requests
+        ),
+        num_failures=10**6,
+    )
+    annotator = DebugAnnotator(llm, metadata_provider_class=DebugMetaDataProvider)
+    annotator(python_files)
+
+    assert len(annotator.failed_annotations) > 0
+    assert llm.num_calls == 2 * len(annotator.failed_annotations)
@@ -0,0 +1,50 @@
+from llm_docstring_generator.annotator.metadata_provider import BaseMetaDataProvider
+from llm_docstring_generator.parser.load_python_files import load_python_files
+from llm_docstring_generator.sorters.sort_functions_and_classes import (
+    get_sorted_functions_and_classes_and_methods,
+)
+from tests.fixtures import config_llm_docstring_generator  # noqa: F401
+
+
+def test_metadata_provider_index_finds_all_code_objects_used(
+    config_llm_docstring_generator,  # noqa: F811
+):
+    python_files = load_python_files(config_llm_docstring_generator)
+    metadata_provider = BaseMetaDataProvider(python_files)
+    all_code_objects = [
+        function_or_class
+        for python_file in python_files
+        for function_or_class in get_sorted_functions_and_classes_and_methods(
+            python_file
+        )
+    ]
+
+    num_used = 0
+    for code_object in all_code_objects:
+        complete_import_dependencies = [
+            import_dependency.complete_import_name
+            for import_dependency in code_object.import_dependencies
+        ]
+        expected = sorted(
+            [
+                code_object_used
+                for code_object_used in all_code_objects
+                if code_object_used.complete_import_name in complete_import_dependencies
+            ],
+            key=lambda x: x.complete_import_name,
+        )
+        code_objects_used = metadata_provider.get_functions_and_classes_used(
+            code_object
+        )
+        assert [id(x) for x in code_objects_used] == [id(x) for x in expected]
+        num_used += len(code_objects_used)
+    assert num_used > 65
+
+    for python_file in python_files:
+        import_names = [
+            import_.import_name for import_ in python_file.import_dependencies
+        ]
+        expected_parents = [pf for pf in python_files if pf.import_name in import_names]
+        assert (
+            metadata_provider.get_parent_python_files(python_file) == expected_parents
+        )
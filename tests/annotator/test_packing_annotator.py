@@ -0,0 +1,218 @@
+import json
+import re
+
+from llm_docstring_generator.annotator.annotation_state import AnnotationState
+from llm_docstring_generator.annotator.code_annotator import DefaultAnnotator
+from llm_docstring_generator.annotator.metadata_provider import DebugMetaDataProvider
+from llm_docstring_generator.annotator.packing_annotator import PackingAnnotator
+from llm_docstring_generator.llm.cache_database import LLMCache
+from llm_docstring_generator.llm.llm import DebugLLM
+from llm_docstring_generator.llm.llm_config import LLMConfig
+from llm_docstring_generator.llm.resilience import LLMCallFailed
+from llm_docstring_generator.parser.load_python_files import load_python_files
+from llm_docstring_generator.sorters.sort_python_files import (
+    sort_python_files_by_imports,
+)
+from llm_docstring_generator.utils.base_config import BaseConfig
+from tests.fixtures import config_llm_docstring_generator  # noqa: F401
+
+
+class PackingDebugLLM(DebugLLM):
+    """
+    Answers packed prompts with a json object, all other prompts with a short annotation.
+    """
+
+    def __init__(self, *args, valid_json: bool = True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.valid_json = valid_json
+        self.num_calls = 0
+
+    def call_llm(self, prompt: str) -> str:
+        self.num_calls += 1
+        names = re.findall(r"^### (.+)$", prompt, flags=re.MULTILINE)
+        if not names:
+            return "Single annotation"
+        if not self.valid_json:
+            return "Sorry, I can only annotate one function at a time."
+        return json.dumps({name: f"Packed annotation of {name}" for name in names})
+
+
+def get_python_files(config):
+    return sort_python_files_by_imports(load_python_files(config))
+
+
+def get_llm_responses(python_files):
+    llm_responses = []
+    for python_file in python_files:
+        for function in python_file.functions:
+            llm_responses.append(function.llm_response)
+        for class_ in python_file.classes:
+            llm_responses.append(class_.llm_response)
+            llm_responses.extend(method.llm_response for method in class_.methods)
+    return llm_responses
+
+
+def test_packing_annotator_reduces_the_number_of_requests(
+    config_llm_docstring_generator,  # noqa: F811
+):
+    llm = PackingDebugLLM(config=LLMConfig(model="debug"))
+    DefaultAnnotator(llm, metadata_provider_class=DebugMetaDataProvider)(
+        get_python_files(config_llm_docstring_generator)
+    )
+    num_single_requests = llm.num_calls
+
+    llm = PackingDebugLLM(config=LLMConfig(model="debug", max_concurrent_requests=4))
+    annotator = PackingAnnotator(
+        llm,
+        metadata_provider_class=DebugMetaDataProvider,
+        max_pack_tokens=16384,
+        max_packed_object_tokens=2048,
+    )
+    python_files = annotator(get_python_files(config_llm_docstring_generator))
+
+    assert annotator.num_packed_requests > 0
+    assert llm.num_calls < num_single_requests / 2
+    llm_responses = get_llm_responses(python_files)
+    assert all(llm_responses)
+    assert (
+        sum(llm_response.startswith("Packed") for llm_response in llm_responses)
+        == annotator.num_packed_annotations
+    )
+
+
+def test_packing_annotator_falls_back_to_single_requests(
+    config_llm_docstring_generator,  # noqa: F811
+):
+    llm = PackingDebugLLM(config=LLMConfig(model="debug"), valid_json=False)
+    annotator = PackingAnnotator(llm, metadata_provider_class=DebugMetaDataProvider)
+    python_files = annotator(get_python_files(config_llm_docstring_generator))
+
+    assert annotator.num_packed_requests > 0
+    assert annotator.num_packed_annotations == 0
+    llm_responses = get_llm_responses(python_files)
+    assert all(llm_responses)
+    assert not any(llm_response.startswith("Packed") for llm_response in llm_responses)
+
+
+PROPERTY_MODULE = """
+class A:
+    @property
+    def x(self):
+        value = self._x
+        return value
+
+    @x.setter
+    def x(self, value):
+        self._x = value
+        self.changed = True
+"""
+
+
+def test_packing_annotator_restores_same_named_code_objects(tmp_path):
+    repository_path = tmp_path / "property_repo"
+    (repository_path / "pkg").mkdir(parents=True)
+    (repository_path / "pkg" / "__init__.py").write_text("")
+    (repository_path / "pkg" / "a.py").write_text(PROPERTY_MODULE)
+    config = BaseConfig(
+        repository_name="property_repo",
+        repository_path=repository_path,
+        cache_path=tmp_path / "cache",
+    )
+    annotation_state = AnnotationState(config)
+
+    def annotate_property():
+        llm = PackingDebugLLM(config=LLMConfig(model="debug"))
+        annotator = PackingAnnotator(
+            llm,
+            metadata_provider_class=DebugMetaDataProvider,
+            annotation_state=annotation_state,
+        )
+        python_files = annotator(get_python_files(config))
+        python_file = next(pf for pf in python_files if pf.import_name == "pkg.a")
+        # getter and setter share the name pkg.a.A.x
+        return [method.llm_response for method in python_file.classes[0].methods], llm
+
+    llm_responses, llm = annotate_property()
+    assert len(llm_responses) == 2 and all(llm_responses)
+
+    restored_llm_responses, llm = annotate_property()
+    assert llm.num_calls == 0
+    assert restored_llm_responses == llm_responses
+
+
+DEPENDENT_MODULE = """
+def f(x):
+    y = x + 1
+    return y
+
+
+def h(x):
+    y = x - 1
+    return y
+
+
+def g(x):
+    y = f(x) * 2
+    return h(y)
+"""
+
+
+class FailingFirstCallPackingDebugLLM(PackingDebugLLM):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prompts = []
+
+    def __call__(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        if len(self.prompts) == 1:
+            raise LLMCallFailed("backend down")
+        return super().__call__(prompt)
+
+
+def get_dependent_repository_config(tmp_path) -> BaseConfig:
+    repository_path = tmp_path / "dependent_repo"
+    (repository_path / "pkg").mkdir(parents=True)
+    (repository_path / "pkg" / "__init__.py").write_text("")
+    (repository_path / "pkg" / "dependent.py").write_text(DEPENDENT_MODULE)
+    return BaseConfig(
+        repository_name="dependent_repo",
+        repository_path=repository_path,
+        cache_path=tmp_path / "cache",
+    )
+
+
+def test_dependents_of_failed_packs_wait_for_the_retry(tmp_path):
+    config = get_dependent_repository_config(tmp_path)
+    llm = FailingFirstCallPackingDebugLLM(config=LLMConfig(model="debug"))
+    annotator = PackingAnnotator(llm)
+    python_files = annotator(get_python_files(config))
+
+    assert annotator.failed_annotations == []
+    # the pack of f and h failed, g is annotated after their retry
+    python_file = next(pf for pf in python_files if pf.import_name == "pkg.dependent")
+    assert all(function.llm_response for function in python_file.functions)
+    g_prompt = llm.prompts[-1]
+    assert "def g(x)" in g_prompt
+    assert "Single annotation" in g_prompt
+
+
+def test_packed_answers_are_only_cached_under_the_packed_prompt(tmp_path):
+    config = get_dependent_repository_config(tmp_path)
+    # the packs are annotated in worker threads, i.e. not with the connection of an in-memory database
+    llm_cache = LLMCache(db_name=f"sqlite:///{tmp_path / 'llm_cache.db'}")
+    llm = PackingDebugLLM(config=LLMConfig(model="debug"), llm_cache=llm_cache)
+    annotator = PackingAnnotator(llm)
+    annotator(get_python_files(config))
+    assert annotator.num_packed_annotations == 2
+
+    # the same packs are answered from the cache
+    llm = PackingDebugLLM(config=LLMConfig(model="debug"), llm_cache=llm_cache)
+    PackingAnnotator(llm)(get_python_files(config))
+    assert llm.num_calls == 0
+
+    # the llm was never asked the single prompts of the packed code objects
+    llm = PackingDebugLLM(config=LLMConfig(model="debug"), llm_cache=llm_cache)
+    python_files = DefaultAnnotator(llm)(get_python_files(config))
+    assert llm.num_calls == 3
+    llm_responses = get_llm_responses(python_files)
+    assert llm_responses == ["Single annotation"] * 3
@@ -0,0 +1,135 @@
+import pytest
+from llm_docstring_generator.annotator.code_annotator import DefaultAnnotator
+from llm_docstring_generator.annotator.metadata_provider import DefaultMetaDataProvider
+from llm_docstring_generator.annotator.triage import CodeTriage, TriageConfig
+from llm_docstring_generator.llm.llm import DebugLLM
+from llm_docstring_generator.llm.llm_config import LLMConfig
+from llm_docstring_generator.parser.load_python_files import load_python_files
+from llm_docstring_generator.pipelines.code_annotation_pipeline import (
+    CodeAnnotationPipeline,
+)
+from llm_docstring_generator.sorters.sort_functions_and_classes import (
+    get_sorted_functions_and_classes_and_methods,
+)
+from llm_docstring_generator.utils.base_config import BaseConfig
+from llm_docstring_generator.utils.copy_repository import (
+    CopyRepositoryWithLLMDocstrings,
+)
+
+MODULE = '''
+def documented(x):
+    """
+    Return the input unchanged, used as a placeholder transformation.
+    """
+    y = x
+    return y
+
+
+def getter(x):
+    return x.value
+
+
+def _private_helper(x):
+    y = x + 1
+    return y * 2
+
+
+def uses_documented(x):
+    y = documented(x)
+    return y + 1
+'''
+
+TEST_MODULE = """
+def test_documented():
+    x = 1
+    assert x == 1
+"""
+
+GENERATED_MODULE = """# Generated by the protocol buffer compiler.  DO NOT EDIT!
+def build_message(x):
+    message = dict(x=x)
+    return message
+"""
+
+
+class RecordingLLM(DebugLLM):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prompts = []
+
+    def call_llm(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        return "Annotation"
+
+
+@pytest.fixture
+def triage_config(tmp_path) -> BaseConfig:
+    repository_path = tmp_path / "triage_repo"
+    (repository_path / "package").mkdir(parents=True)
+    (repository_path / "package" / "__init__.py").write_text("")
+    (repository_path / "package" / "module.py").write_text(MODULE)
+    (repository_path / "package" / "test_module.py").write_text(TEST_MODULE)
+    (repository_path / "package" / "service.py").write_text(GENERATED_MODULE)
+    return BaseConfig(
+        repository_name="triage_repo",
+        repository_path=repository_path,
+        cache_path=tmp_path / "cache",
+        triage=True,
+    )
+
+
+def get_skip_reasons(python_files):
+    return {
+        code_object.complete_import_name.split(".")[-1]: code_object.skip_reason
+        for python_file in python_files
+        for code_object in get_sorted_functions_and_classes_and_methods(python_file)
+    }
+
+
+def test_code_triage_classifies_code_objects(triage_config):
+    python_files = CodeTriage()(load_python_files(triage_config))
+    assert get_skip_reasons(python_files) == {
+        "documented": "documented",
+        "getter": "trivial",
+        "_private_helper": None,
+        "uses_documented": None,
+        "test_documented": "test",
+        "build_message": "generated",
+    }
+
+    python_files = CodeTriage(
+        TriageConfig(skip_private=True, skip_trivial=False, skip_tests=False)
+    )(load_python_files(triage_config))
+    skip_reasons = get_skip_reasons(python_files)
+    assert skip_reasons["_private_helper"] == "private"
+    assert skip_reasons["getter"] is None
+    assert skip_reasons["test_documented"] is None
+
+
+def test_triaged_code_objects_are_not_sent_to_the_llm(triage_config):
+    llm = RecordingLLM(config=LLMConfig(model="debug"))
+    pipeline = CodeAnnotationPipeline(
+        config=triage_config,
+        annotator=DefaultAnnotator(
+            llm, metadata_provider_class=DefaultMetaDataProvider
+        ),
+        copy_repository=CopyRepositoryWithLLMDocstrings(
+            original_repo_path=triage_config.repository_path,
+            new_repository_path=triage_config.new_repository_path,
+        ),
+    )
+    python_files = pipeline.run()
+
+    assert len(llm.prompts) == 2
+    llm_responses = {
+        code_object.complete_import_name.split(".")[-1]: code_object.llm_response
+        for python_file in python_files
+        for code_object in get_sorted_functions_and_classes_and_methods(python_file)
+    }
+    assert llm_responses["documented"] == ""
+    assert llm_responses["uses_documented"] == "Annotation"
+    # the existing docstring is used as context instead of an llm annotation
+    assert any(
+        "Return the input unchanged" in prompt and "uses_documented" in prompt
+        for prompt in llm.prompts
+    )
@@ -1,6 +1,7 @@
 from pathlib import Path
 
 import pytest
+from llm_docstring_generator.llm.llm import BaseLLM
 from llm_docstring_generator.utils.base_config import BaseConfig
 from llm_docstring_generator.utils.clone_repository import clone_repository
 
@@ -27,3 +28,8 @@ def config_llm_docstring_generator(tmp_path_factory):
         cache_path=tmp_path,
     )
     return config
+
+
+class RaiseLLM(BaseLLM):
+    def call_llm(self, prompt: str) -> str:
+        raise Exception("This is a test exception")
@@ -0,0 +1,52 @@
+import json
+from pathlib import Path
+
+from llm_docstring_generator.pipelines.run_batch_annotation_pipeline import (
+    run_batch_annotation_pipeline,
+)
+
+MOCK_REPO_PATH = Path(__file__).parent.parent / "sorters" / "mock_repo"
+
+
+def test_batch_annotation_pipeline(tmp_path):
+    manifest = [
+        dict(
+            repository_name="mock_repo",
+            repository_path=str(MOCK_REPO_PATH),
+            cache_path=str(tmp_path / f"project_{i}"),
+        )
+        for i in range(2)
+    ]
+    manifest.append(
+        dict(
+            repository_name="missing_repo",
+            repository_path=str(tmp_path / "missing_repo"),
+            cache_path=str(tmp_path / "project_missing"),
+        )
+    )
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(json.dumps(manifest))
+
+    reports = run_batch_annotation_pipeline(
+        manifest_path,
+        cache_path=tmp_path / "llm_cache",
+        model="debug",
+        max_concurrent_requests=2,
+        num_load_processes=2,
+        num_parallel_repositories=2,
+    )
+
+    assert [report.repository_name for report in reports] == [
+        "mock_repo",
+        "mock_repo",
+        "missing_repo",
+    ]
+    for i, report in enumerate(reports[:2]):
+        assert report.error is None
+        assert report.num_python_files == 4
+        assert report.num_annotations > 0
+        assert report.annotations_per_second > 0
+        assert (tmp_path / f"project_{i}" / "mock_repo_annotated" / "a.py").exists()
+    assert reports[0].num_annotations == reports[1].num_annotations
+    # a repository that fails to load does not stop the other repositories
+    assert "does not exist" in str(reports[2].error)
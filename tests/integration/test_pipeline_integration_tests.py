@@ -6,7 +6,6 @@ from llm_docstring_generator.annotator.code_annotator import DefaultAnnotator
 from llm_docstring_generator.annotator.metadata_provider import (
     BaseMetaDataProvider,
     DefaultMetaDataProvider,
-    get_functions_and_classes_used,
 )
 from llm_docstring_generator.llm.llm import DebugLLM
 from llm_docstring_generator.pipelines.code_annotation_pipeline import (
@@ -35,9 +34,7 @@ class AssertMetaDataProvider(BaseMetaDataProvider):
         return f"Error in {function.complete_import_name} Function depends on {function_or_class.complete_import_name}. "
 
     def get_function_metadata(self, function: Union[Function | Class]) -> str:
-        functions_used = get_functions_and_classes_used(
-            code_object=function, python_files=self.python_files
-        )
+        functions_used = self.get_functions_and_classes_used(function)
         self.total_calls += len(functions_used)
         for function_or_class in functions_used:
             if function_or_class.llm_response == "":
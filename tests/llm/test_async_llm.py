@@ -0,0 +1,153 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from llm_docstring_generator.llm.cache_database import LLMCache
+from llm_docstring_generator.llm.llm import BaseLLM, DebugLLM, LocalTGILLM
+from llm_docstring_generator.llm.llm_config import LLMConfig
+
+
+class ReverseLLM(BaseLLM):
+    def call_llm(self, prompt: str) -> str:
+        return prompt[::-1]
+
+
+class TGIRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        assert self.path == "/generate"
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.client_ports.add(self.client_address[1])  # type: ignore[attr-defined]
+        body = json.dumps(
+            {"generated_text": request["inputs"].split("\n\n")[-1].upper()}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def tgi_server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), TGIRequestHandler)
+    server.client_ports = set()  # type: ignore[attr-defined]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("TGI_MODEL_URL", f"http://127.0.0.1:{server.server_port}")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_acall_uses_cache():
+    llm_cache = LLMCache(db_name="sqlite:///:memory:")
+    llm = DebugLLM(config=LLMConfig(), llm_cache=llm_cache)
+
+    async def run():
+        return await asyncio.gather(*[llm.acall(f"prompt{i}") for i in range(20)])
+
+    assert asyncio.run(run()) == [f"prompt{i}" for i in range(20)]
+    for i in range(20):
+        assert (
+            llm_cache.get_llm_answer(
+                prompt=f"prompt{i}",
+                prompt_truncated=f"prompt{i}",
+                system_prompt=llm.config.system_prompt,
+                model=llm.config.model,
+            )
+            == f"prompt{i}"
+        )
+
+
+def test_acall_falls_back_to_call_llm():
+    llm = ReverseLLM(config=LLMConfig(model="reverse"))
+    assert asyncio.run(llm.acall("abc")) == llm("abc") == "cba"
+
+
+def test_tgi_llm_reuses_connections(tgi_server):
+    llm = LocalTGILLM(config=LLMConfig(model="tgi", max_concurrent_requests=4))
+
+    assert [llm(f"prompt{i}") for i in range(10)] == [f"PROMPT{i}" for i in range(10)]
+    # sequential calls reuse a single pooled connection
+    assert len(tgi_server.client_ports) == 1
+
+    async def run():
+        return await asyncio.gather(*[llm.acall(f"async{i}") for i in range(10)])
+
+    # acall can be used from a different event loop than the one owning the client
+    assert asyncio.run(run()) == [f"ASYNC{i}" for i in range(10)]
+    llm.close()
+
+
+class ConcurrencyTrackingLLM(DebugLLM):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.num_in_flight = 0
+        self.max_in_flight = 0
+        self.prompts = []
+
+    async def acall_llm(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        self.num_in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.num_in_flight)
+        await asyncio.sleep(0.01)
+        self.num_in_flight -= 1
+        return prompt
+
+
+def test_acall_respects_max_concurrent_requests():
+    llm = ConcurrencyTrackingLLM(
+        config=LLMConfig(model="debug", max_concurrent_requests=2),
+        llm_cache=LLMCache(db_name="sqlite:///:memory:"),
+    )
+
+    async def run():
+        return await asyncio.gather(*[llm.acall(f"prompt{i}") for i in range(10)])
+
+    assert asyncio.run(run()) == [f"prompt{i}" for i in range(10)]
+    assert llm.max_in_flight == 2
+
+
+def test_acall_waits_for_request_slots_in_order():
+    llm = ConcurrencyTrackingLLM(
+        config=LLMConfig(model="debug", max_concurrent_requests=1),
+        llm_cache=LLMCache(db_name="sqlite:///:memory:"),
+    )
+
+    async def run():
+        return await asyncio.gather(*[llm.acall(f"prompt{i}") for i in range(20)])
+
+    assert asyncio.run(run()) == [f"prompt{i}" for i in range(20)]
+    assert llm.max_in_flight == 1
+    assert llm.prompts == [f"prompt{i}" for i in range(20)]
+    llm.close()
+
+
+def test_cancelled_acalls_give_back_their_request_slot():
+    llm = ConcurrencyTrackingLLM(
+        config=LLMConfig(model="debug", max_concurrent_requests=1),
+        llm_cache=LLMCache(db_name="sqlite:///:memory:"),
+    )
+
+    async def run():
+        running = asyncio.create_task(llm.acall("running"))
+        waiting = [asyncio.create_task(llm.acall(f"waiting{i}")) for i in range(3)]
+        await asyncio.sleep(0.001)
+        for task in waiting:
+            task.cancel()
+        assert await running == "running"
+        return await llm.acall("after")
+
+    assert asyncio.run(run()) == "after"
+    assert llm.prompts == ["running", "after"]
+    llm.request_slot_executor.submit(lambda: None).result()
+    assert llm.request_slots.acquire(blocking=False)
+    llm.request_slots.release()
+    llm.close()
@@ -0,0 +1,115 @@
+import httpx
+from llm_docstring_generator.llm.cache_backend import (
+    CACHE_ROW_FIELDS,
+    CACHE_TOKEN_HEADER,
+    CacheBackend,
+)
+from llm_docstring_generator.llm.cache_database import (
+    LLMCache,
+    create_default_llm_cache,
+)
+from llm_docstring_generator.llm.cache_server import LLMCacheServer
+from llm_docstring_generator.llm.http_cache_backend import HTTPCacheBackend
+from llm_docstring_generator.llm.llm import DebugLLM
+from llm_docstring_generator.llm.llm_config import LLMConfig
+from tests.fixtures import RaiseLLM
+
+
+def test_backends_implement_the_protocol(tmp_path):
+    assert isinstance(LLMCache(db_name="sqlite:///:memory:"), CacheBackend)
+    assert isinstance(HTTPCacheBackend("http://127.0.0.1:1"), CacheBackend)
+    llm_cache = create_default_llm_cache(
+        LLMConfig(cache_url=f"sqlite:///{tmp_path / 'shared.db'}")
+    )
+    assert isinstance(llm_cache, LLMCache)
+    assert isinstance(
+        create_default_llm_cache(LLMConfig(cache_url="http://127.0.0.1:1")),
+        HTTPCacheBackend,
+    )
+
+
+def test_workers_share_answers_via_the_cache_server(tmp_path):
+    server = LLMCacheServer(LLMCache(db_name=f"sqlite:///{tmp_path / 'llm_cache.db'}"))
+    server.serve_in_background()
+    try:
+        prompts = [f"prompt{i}" for i in range(20)]
+        llm = DebugLLM(config=LLMConfig(cache_url=server.url))
+        answers = [llm(prompt) for prompt in prompts]
+
+        # the second worker only gets answers from the shared cache
+        other_llm = RaiseLLM(config=LLMConfig(cache_url=server.url))
+        assert other_llm.get_cached_answers(prompts) == answers
+
+        assert other_llm.llm_cache is not None
+        stats = other_llm.llm_cache.stats()
+        assert stats.num_entries == 20
+        assert stats.hits == 20
+        assert stats.misses == 0
+    finally:
+        server.shutdown()
+
+
+def test_unreachable_cache_server_is_a_cache_miss():
+    llm_cache = HTTPCacheBackend("http://127.0.0.1:1", timeout=1.0)
+    llm = DebugLLM(config=LLMConfig(), llm_cache=llm_cache)
+    assert llm("prompt") == "prompt"
+    assert llm_cache.get_many(["key"]) == dict()
+    assert llm_cache.stats().num_entries is None
+
+
+def test_cache_server_requires_its_token(tmp_path):
+    server = LLMCacheServer(
+        LLMCache(db_name=f"sqlite:///{tmp_path / 'llm_cache.db'}"),
+        token="secret",
+        max_request_bytes=16 * 1024,
+    )
+    server.serve_in_background()
+    try:
+        llm = DebugLLM(config=LLMConfig(), llm_cache=HTTPCacheBackend(server.url))
+        assert llm("prompt") == "prompt"
+        assert httpx.get(f"{server.url}/stats").status_code == 401
+
+        llm_cache = HTTPCacheBackend(server.url, token="secret")
+        assert llm_cache.stats().num_entries == 0
+        llm = DebugLLM(config=LLMConfig(), llm_cache=llm_cache)
+        assert llm("prompt") == "prompt"
+        assert llm_cache.stats().num_entries == 1
+
+        response = httpx.post(
+            f"{server.url}/get_many",
+            json=dict(keys=["0" * 32] * 1000),
+            headers={CACHE_TOKEN_HEADER: "secret"},
+        )
+        assert response.status_code == 413
+    finally:
+        server.shutdown()
+
+
+def test_cache_server_rejects_malformed_rows(tmp_path):
+    llm_cache = LLMCache(db_name=f"sqlite:///{tmp_path / 'llm_cache.db'}")
+    server = LLMCacheServer(llm_cache)
+    server.serve_in_background()
+    try:
+        for rows in [[dict(key="k1")], [dict.fromkeys(CACHE_ROW_FIELDS, 1)], "rows"]:
+            response = httpx.post(f"{server.url}/put_many", json=dict(rows=rows))
+            assert response.status_code == 400
+
+        llm = DebugLLM(config=LLMConfig(cache_url=server.url))
+        assert llm("prompt") == "prompt"
+        assert llm.llm_cache is not None
+        llm.llm_cache.flush()
+        llm_cache.flush()
+        assert llm_cache.stats().num_entries == 1
+        assert len(list(llm_cache.iter_entries())) == 1
+    finally:
+        server.shutdown()
+
+
+def test_malformed_rows_dont_block_the_llm_cache():
+    llm_cache = LLMCache(db_name="sqlite:///:memory:")
+    llm_cache.put_many([dict(key="k1")])
+    llm_cache.flush()
+    llm = DebugLLM(config=LLMConfig(), llm_cache=llm_cache)
+    assert llm("prompt") == "prompt"
+    llm_cache.flush()
+    assert len(list(llm_cache.iter_entries())) == 1
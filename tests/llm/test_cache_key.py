@@ -0,0 +1,62 @@
+from llm_docstring_generator.llm.cache_database import LLMCache
+from llm_docstring_generator.llm.cache_key import get_cache_key, get_legacy_cache_key
+from llm_docstring_generator.llm.llm import DebugLLM
+from llm_docstring_generator.llm.llm_config import LLMConfig
+from tests.fixtures import RaiseLLM
+
+
+class ParametrizedLLM(DebugLLM):
+    @property
+    def generation_parameters(self):
+        return dict(model_url="http://localhost:10103", max_new_tokens=1024)
+
+
+def test_cache_key_fields_are_not_ambiguous():
+    assert get_cache_key("ab", "c", "", "") != get_cache_key("a", "bc", "", "")
+    assert get_legacy_cache_key("ab", "c", "", "") == get_legacy_cache_key(
+        "a", "bc", "", ""
+    )
+
+
+def test_generation_parameters_are_part_of_the_cache_key():
+    assert get_cache_key("a", "a", "s", "m") == get_cache_key("a", "a", "s", "m", {})
+    assert get_cache_key("a", "a", "s", "m", {"max_new_tokens": 1}) != get_cache_key(
+        "a", "a", "s", "m", {"max_new_tokens": 2}
+    )
+
+    llm_cache = LLMCache(db_name="sqlite:///:memory:")
+    DebugLLM(config=LLMConfig(), llm_cache=llm_cache)("prompt")
+    llm = ParametrizedLLM(config=LLMConfig(), llm_cache=llm_cache)
+    assert llm.get_cached_answers(["prompt"]) == [None]
+
+
+def test_legacy_cache_keys_are_migrated():
+    llm_cache = LLMCache(db_name="sqlite:///:memory:")
+    config = LLMConfig()
+    legacy_key = get_legacy_cache_key(
+        "prompt", "prompt", config.system_prompt, config.model
+    )
+    llm_cache.put_many(
+        [
+            dict(
+                key=legacy_key,
+                prompt="prompt",
+                prompt_truncated="prompt",
+                answer="legacy answer",
+                system_prompt=config.system_prompt,
+                model=config.model,
+            )
+        ]
+    )
+
+    # the fallback is opt-in
+    llm = RaiseLLM(config=config, llm_cache=llm_cache)
+    assert llm.get_cached_answers(["prompt"]) == [None]
+
+    llm = RaiseLLM(
+        config=LLMConfig(legacy_cache_key_fallback=True), llm_cache=llm_cache
+    )
+    assert llm("prompt") == "legacy answer"
+    key = llm.get_prompt_cache_key("prompt", "prompt")
+    assert llm_cache.get_many([key]) == {key: "legacy answer"}
+    assert llm.get_cached_answers(["other prompt"]) == [None]
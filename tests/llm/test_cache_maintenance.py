@@ -0,0 +1,79 @@
+import sqlalchemy
+from llm_docstring_generator.llm.cache_database import (
+    CacheEntry,
+    LLMCache,
+    _create_scoped_session,
+    compress_text,
+    decompress_text,
+)
+from llm_docstring_generator.llm.cache_key import get_legacy_cache_key
+from llm_docstring_generator.llm.cache_maintenance import compact_llm_cache
+
+system_prompt = "You are a helpful assistant that writes docstrings. " * 50
+model = "debug"
+
+
+def create_legacy_llm_cache(db_path, num_entries: int) -> None:
+    engine = sqlalchemy.create_engine(f"sqlite:///{db_path}")
+    CacheEntry.__table__.create(engine)
+    with engine.begin() as connection:
+        connection.execute(
+            sqlalchemy.insert(CacheEntry),
+            [
+                dict(
+                    key=get_legacy_cache_key(
+                        f"prompt{i}" * 50, f"prompt{i}" * 50, system_prompt, model
+                    ),
+                    prompt=f"prompt{i}" * 50,
+                    prompt_truncated=f"prompt{i}" * 50,
+                    answer=f"answer{i}",
+                    system_prompt=system_prompt,
+                    model=model,
+                )
+                for i in range(num_entries)
+            ],
+        )
+    engine.dispose()
+
+
+def legacy_key(i: int) -> str:
+    return get_legacy_cache_key(
+        f"prompt{i}" * 50, f"prompt{i}" * 50, system_prompt, model
+    )
+
+
+def test_compress_text():
+    for text in ["", "short", "long text " * 100]:
+        assert decompress_text(compress_text(text)) == text
+    assert len(compress_text("long text " * 100)) < 100
+
+
+def test_compact_legacy_llm_cache(tmp_path):
+    db_path = tmp_path / "llm_cache.db"
+    create_legacy_llm_cache(db_path, num_entries=300)
+    size_before = db_path.stat().st_size
+
+    # legacy entries are read before the database is compacted
+    llm_cache = LLMCache(db_name=f"sqlite:///{db_path}")
+    assert llm_cache.has_legacy_table
+    assert llm_cache.get_many([legacy_key(7)]) == {legacy_key(7): "answer7"}
+    llm_cache.save_llm_answer("new", "new", "new answer", system_prompt, model)
+    llm_cache.engine.dispose()
+
+    compact_llm_cache(str(db_path))
+
+    assert db_path.stat().st_size < size_before
+    llm_cache = LLMCache(db_name=f"sqlite:///{db_path}")
+    assert not llm_cache.has_legacy_table
+    assert llm_cache.get_many([legacy_key(7)]) == {legacy_key(7): "answer7"}
+    entries = list(llm_cache.iter_entries())
+    assert len(entries) == 301
+    assert {entry["system_prompt"] for entry in entries} == {system_prompt}
+    # the system prompt is interned
+    with _create_scoped_session(llm_cache.scoped_session) as session:
+        assert (
+            session.execute(
+                sqlalchemy.text("SELECT COUNT(*) FROM system_prompts")
+            ).scalar()
+            == 1
+        )
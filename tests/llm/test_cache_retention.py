@@ -0,0 +1,109 @@
+import os
+
+import sqlalchemy
+from llm_docstring_generator.llm.cache_database import (
+    CompressedCacheEntry,
+    LLMCache,
+    _create_scoped_session,
+)
+from llm_docstring_generator.llm.cache_maintenance import evict_llm_cache
+from llm_docstring_generator.llm.cache_retention import RetentionPolicy
+from tests.llm.test_cache_maintenance import create_legacy_llm_cache
+
+system_prompt = "system prompt"
+model = "debug"
+
+
+def open_llm_cache(db_path, **kwargs) -> LLMCache:
+    return LLMCache(db_name=f"sqlite:///{db_path}", **kwargs)
+
+
+def save_answer(llm_cache: LLMCache, prompt: str, answer: str = "answer") -> None:
+    llm_cache.save_llm_answer(prompt, prompt, answer, system_prompt, model)
+
+
+def get_answer(llm_cache: LLMCache, prompt: str):
+    return llm_cache.get_llm_answer(prompt, prompt, system_prompt, model)
+
+
+def test_keep_last_runs(tmp_path):
+    db_path = tmp_path / "llm_cache.db"
+    llm_cache = open_llm_cache(db_path)
+    save_answer(llm_cache, "a")
+    save_answer(llm_cache, "b")
+    llm_cache.close()
+
+    llm_cache = open_llm_cache(db_path)
+    assert get_answer(llm_cache, "a") == "answer"
+    save_answer(llm_cache, "c")
+    llm_cache.close()
+
+    # the maintenance command doesn't count as a run
+    evict_llm_cache(str(db_path), keep_last_runs=1)
+
+    llm_cache = open_llm_cache(db_path)
+    assert get_answer(llm_cache, "a") == "answer"
+    assert get_answer(llm_cache, "b") is None
+    assert get_answer(llm_cache, "c") == "answer"
+
+
+def test_max_age(tmp_path):
+    llm_cache = open_llm_cache(tmp_path / "llm_cache.db")
+    save_answer(llm_cache, "old")
+    save_answer(llm_cache, "new")
+    with _create_scoped_session(llm_cache.scoped_session) as session:
+        session.execute(
+            sqlalchemy.update(CompressedCacheEntry).values(last_accessed=0.0)
+        )
+    # reading an entry updates its last access
+    assert get_answer(llm_cache, "new") == "answer"
+    llm_cache.flush()
+
+    assert llm_cache.evict(RetentionPolicy(max_age=3600)) == 1
+    assert get_answer(llm_cache, "old") is None
+    assert get_answer(llm_cache, "new") == "answer"
+
+
+def test_max_size_evicts_least_recently_used_entries(tmp_path):
+    llm_cache = open_llm_cache(tmp_path / "llm_cache.db")
+    for prompt in ["a", "b", "c", "d"]:
+        # random answers are hardly compressible, each entry takes ~1000 bytes
+        save_answer(llm_cache, prompt, answer=os.urandom(1000).hex())
+    get_answer(llm_cache, "a")
+    llm_cache.flush()
+
+    assert llm_cache.evict(RetentionPolicy(max_payload_size=2500)) == 2
+    assert get_answer(llm_cache, "a") is not None
+    assert get_answer(llm_cache, "d") is not None
+    assert get_answer(llm_cache, "b") is None
+    assert get_answer(llm_cache, "c") is None
+
+
+def test_entries_are_evicted_when_the_cache_is_closed(tmp_path):
+    db_path = tmp_path / "llm_cache.db"
+    llm_cache = open_llm_cache(db_path)
+    save_answer(llm_cache, "a")
+    llm_cache.close()
+
+    llm_cache = open_llm_cache(
+        db_path, retention_policy=RetentionPolicy(keep_last_runs=1)
+    )
+    save_answer(llm_cache, "b")
+    llm_cache.close()
+
+    llm_cache = open_llm_cache(db_path)
+    assert get_answer(llm_cache, "a") is None
+    assert get_answer(llm_cache, "b") == "answer"
+
+
+def test_legacy_entries_are_evicted_after_compacting(tmp_path):
+    db_path = tmp_path / "llm_cache.db"
+    create_legacy_llm_cache(db_path, num_entries=10)
+    llm_cache = open_llm_cache(db_path)
+    retention_policy = RetentionPolicy(max_payload_size=0)
+    assert llm_cache.evict(retention_policy) == 0
+    assert llm_cache.stats().num_entries == 10
+
+    llm_cache.compact()
+    assert llm_cache.evict(retention_policy) == 10
+    assert llm_cache.stats().num_entries == 0
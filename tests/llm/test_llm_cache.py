@@ -4,17 +4,18 @@ import random
 from faker import Faker
 from llm_docstring_generator.annotator.code_annotator import DefaultFileAnnotator
 from llm_docstring_generator.llm.cache_database import (
-    CacheEntry,
+    CompressedCacheEntry,
     LLMCache,
     _create_scoped_session,
 )
+from llm_docstring_generator.llm.cache_key import get_cache_key
 from llm_docstring_generator.llm.llm import BaseLLM, DebugLLM
 from llm_docstring_generator.llm.llm_config import LLMConfig
 from llm_docstring_generator.parser.load_python_files import load_python_files
 from llm_docstring_generator.sorters.sort_python_files import (
     sort_python_files_by_imports,
 )
-from tests.fixtures import config_llm_docstring_generator  # noqa: F401
+from tests.fixtures import RaiseLLM, config_llm_docstring_generator  # noqa: F401
 
 faker = Faker()
 
@@ -24,11 +25,6 @@ class RandomLLM(BaseLLM):
         return "".join([faker.sentence() for _ in range(random.randint(1, 15))])
 
 
-class RaiseLLM(BaseLLM):
-    def call_llm(self, prompt: str) -> str:
-        raise Exception("This is a test exception")
-
-
 def test_caching_integration_test(config_llm_docstring_generator):  # noqa: F811
     llm_cache = LLMCache(
         db_name="sqlite:///:memory:",
@@ -68,5 +64,105 @@ def test_caching(caplog):
     with _create_scoped_session(
         llm_cache.scoped_session, ignore_integrity_error=False
     ) as session:
-        cache_entries = session.query(CacheEntry).all()
+        cache_entries = session.query(CompressedCacheEntry).all()
         assert len(cache_entries) == 500
+
+
+def test_cached_annotations_are_prefetched_in_batches(
+    config_llm_docstring_generator,  # noqa: F811
+):
+    llm_cache = LLMCache(
+        db_name="sqlite:///:memory:",
+    )
+    python_files = sort_python_files_by_imports(
+        load_python_files(config_llm_docstring_generator)
+    )
+    DefaultFileAnnotator(
+        llm=RandomLLM(config=LLMConfig(model="random"), llm_cache=llm_cache)
+    )(python_files)
+
+    num_queries = 0
+    get_many = llm_cache.get_many
+
+    def count_get_many(keys):
+        nonlocal num_queries
+        num_queries += 1
+        return get_many(keys)
+
+    llm_cache.get_many = count_get_many  # type: ignore[method-assign]
+
+    # all answers are cached, so the llm must not be called
+    prefetched_python_files = sort_python_files_by_imports(
+        load_python_files(config_llm_docstring_generator)
+    )
+    annotator = DefaultFileAnnotator(
+        llm=RaiseLLM(config=LLMConfig(model="random"), llm_cache=llm_cache)
+    )
+    annotator(prefetched_python_files)
+
+    assert annotator.failed_annotations == []
+    num_annotations = 0
+    for python_file, prefetched_python_file in zip(
+        python_files, prefetched_python_files
+    ):
+        assert python_file.llm_response == prefetched_python_file.llm_response
+        for function, prefetched_function in zip(
+            python_file.functions, prefetched_python_file.functions
+        ):
+            assert function.llm_response == prefetched_function.llm_response
+            num_annotations += 1
+    assert 0 < num_queries < num_annotations
+
+
+def test_write_behind_cache_batches_writes(tmp_path):
+    llm_cache = LLMCache(
+        db_name=f"sqlite:///{tmp_path / 'llm_cache.db'}",
+        write_batch_size=10,
+        write_interval=1e9,
+    )
+    llm = DebugLLM(config=LLMConfig(), llm_cache=llm_cache)
+
+    def count_entries():
+        with _create_scoped_session(llm_cache.scoped_session) as session:
+            return session.query(CompressedCacheEntry).count()
+
+    for prompt in [f"prompt{i}" for i in range(15)]:
+        llm(prompt)
+        # staged answers are visible before they are written
+        assert llm_cache.get_llm_answers([llm_cache_key(llm, prompt)]) != dict()
+    assert count_entries() == 10
+
+    # duplicate keys are ignored
+    llm_cache.save_llm_answer(
+        prompt="prompt0",
+        prompt_truncated="prompt0",
+        answer="prompt0",
+        system_prompt=llm.config.system_prompt,
+        model=llm.config.model,
+    )
+    llm_cache.close()
+    assert count_entries() == 15
+
+
+def llm_cache_key(llm: BaseLLM, prompt: str) -> str:
+    return get_cache_key(prompt, prompt, llm.config.system_prompt, llm.config.model)
+
+
+def test_sqlite_profile_is_applied(tmp_path):
+    llm_cache = LLMCache(db_name=f"sqlite:///{tmp_path / 'llm_cache.db'}")
+    with llm_cache.engine.connect() as connection:
+        # synchronous=NORMAL is reported as 1
+        for name, expected_value in [
+            ("journal_mode", "wal"),
+            ("synchronous", 1),
+            ("busy_timeout", 30_000),
+        ]:
+            value = connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+            assert value == expected_value, name
+
+    llm_cache = LLMCache(
+        db_name=f"sqlite:///{tmp_path / 'llm_cache_default.db'}",
+        use_sqlite_profile=False,
+    )
+    with llm_cache.engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "delete"
@@ -0,0 +1,44 @@
+from llm_docstring_generator.llm.cache_database import LLMCache
+from llm_docstring_generator.llm.llm import DebugLLM
+from llm_docstring_generator.llm.llm_config import LLMConfig
+from llm_docstring_generator.llm.memory_cache import MemoryCache
+
+
+def test_memory_cache_evicts_least_recently_used_entries():
+    memory_cache = MemoryCache(max_entries=2, max_bytes=100)
+    memory_cache.set_answer("a", "answer a")
+    memory_cache.set_answer("b", "answer b")
+    assert memory_cache.get_answer("a") == "answer a"
+    memory_cache.set_answer("c", "answer c")
+
+    assert memory_cache.get_answer("b") is None
+    assert memory_cache.get_answer("a") == "answer a"
+    assert memory_cache.get_answer("c") == "answer c"
+    assert (memory_cache.stats.hits, memory_cache.stats.misses) == (3, 1)
+
+
+def test_memory_cache_is_bounded_by_bytes():
+    memory_cache = MemoryCache(max_entries=100, max_bytes=10)
+    memory_cache.set_answer("a", "12345")
+    memory_cache.set_answer("b", "12345")
+    memory_cache.set_answer("c", "12345")
+    assert memory_cache.get_answer("a") is None
+    assert memory_cache.num_bytes == 10
+
+    # answers larger than the cache are not stored
+    memory_cache.set_answer("d", "12345678901")
+    assert memory_cache.get_answer("d") is None
+    assert memory_cache.get_answer("c") == "12345"
+
+
+def test_llm_reads_recent_answers_from_memory():
+    llm = DebugLLM(config=LLMConfig(), llm_cache=LLMCache(db_name="sqlite:///:memory:"))
+    for _ in range(3):
+        assert llm("prompt") == "prompt"
+
+    assert (llm.memory_cache_stats.hits, llm.memory_cache_stats.misses) == (2, 1)
+    assert (llm.database_cache_stats.hits, llm.database_cache_stats.misses) == (0, 1)
+
+    llm.memory_cache = MemoryCache(max_entries=0, max_bytes=0)
+    assert llm("prompt") == "prompt"
+    assert llm.database_cache_stats.hits == 1
@@ -0,0 +1,147 @@
+import asyncio
+import time
+
+import pytest
+from llm_docstring_generator.llm.llm import BaseLLM
+from llm_docstring_generator.llm.llm_config import LLMConfig
+from llm_docstring_generator.llm.rate_limiter import (
+    RateLimiter,
+    RateLimitExceeded,
+    get_retry_after,
+    parse_duration,
+)
+from llm_docstring_generator.llm.resilience import LLMCallFailed, ResilienceConfig
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FlakyLLM(BaseLLM):
+    num_calls = 0
+
+    def call_llm(self, prompt: str) -> str:
+        self.num_calls += 1
+        if self.num_calls <= 2:
+            raise RateLimitExceeded("429", retry_after=0.05)
+        return prompt
+
+
+def test_parse_duration():
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("1s") == 1
+    assert parse_duration("20ms") == 0.02
+    assert parse_duration("1h2m3s") == 3723
+    assert parse_duration("0.5") == 0.5
+    assert parse_duration("soon") is None
+    assert get_retry_after({"Retry-After": "2"}) == 2
+    assert get_retry_after({"retry-after-ms": "1500"}) == 1.5
+    assert get_retry_after({}) is None
+
+
+def test_rate_limiter_meters_requests():
+    clock = FakeClock()
+    rate_limiter = RateLimiter(requests_per_minute=3, clock=clock)
+    for _ in range(3):
+        assert rate_limiter._try_acquire(10) == 0
+    assert rate_limiter._try_acquire(10) == 60
+    clock.now = 30
+    assert rate_limiter._try_acquire(10) == 30
+    clock.now = 60
+    assert rate_limiter._try_acquire(10) == 0
+
+
+def test_rate_limiter_meters_tokens():
+    clock = FakeClock()
+    rate_limiter = RateLimiter(tokens_per_minute=100, clock=clock)
+    assert rate_limiter._try_acquire(60) == 0
+    clock.now = 10
+    rate_limiter.record_tokens(20)
+    assert rate_limiter._try_acquire(30) == 50
+    clock.now = 60
+    assert rate_limiter._try_acquire(30) == 0
+    # requests larger than the budget are sent once the window is empty
+    clock.now = 200
+    assert rate_limiter._try_acquire(1000) == 0
+
+
+def test_rate_limiter_adapts_to_headers():
+    clock = FakeClock()
+    rate_limiter = RateLimiter(clock=clock)
+    rate_limiter.update_from_headers(
+        {
+            "x-ratelimit-limit-requests": "500",
+            "x-ratelimit-limit-tokens": "30000",
+            "x-ratelimit-remaining-requests": "499",
+            "x-ratelimit-remaining-tokens": "0",
+            "x-ratelimit-reset-tokens": "6s",
+        }
+    )
+    assert rate_limiter.requests_per_minute == 500
+    assert rate_limiter.tokens_per_minute == 30000
+    assert rate_limiter._try_acquire(10) == 6
+    clock.now = 6
+    assert rate_limiter._try_acquire(10) == 0
+
+    rate_limiter.register_rate_limit_error(
+        RateLimitExceeded("429", headers={"retry-after": "3"})
+    )
+    assert rate_limiter._try_acquire(10) == 3
+
+
+def test_rate_limiter_blocks_until_budget_is_available():
+    rate_limiter = RateLimiter(requests_per_minute=5, window=0.2)
+    start = time.monotonic()
+    for _ in range(10):
+        rate_limiter.acquire(1)
+    assert time.monotonic() - start >= 0.2
+
+    async def run():
+        await asyncio.gather(*[rate_limiter.aacquire(1) for _ in range(10)])
+
+    start = time.monotonic()
+    asyncio.run(run())
+    assert time.monotonic() - start >= 0.2
+
+
+def test_llm_queues_rate_limited_calls():
+    llm = FlakyLLM(config=LLMConfig(model="flaky"))
+    start = time.monotonic()
+    assert llm("prompt") == "prompt"
+    assert llm.num_calls == 3
+    assert time.monotonic() - start >= 0.1
+
+
+class AlwaysRateLimitedLLM(BaseLLM):
+    num_calls = 0
+
+    def call_llm(self, prompt: str) -> str:
+        self.num_calls += 1
+        raise RateLimitExceeded("429", retry_after=0.001)
+
+    async def acall_llm(self, prompt: str) -> str:
+        return self.call_llm(prompt)
+
+
+def test_llm_raises_after_max_attempts_of_rate_limited_calls():
+    config = LLMConfig(
+        model="rate_limited",
+        resilience=ResilienceConfig(
+            max_attempts=3, initial_backoff=0.001, max_backoff=0.01
+        ),
+    )
+    llm = AlwaysRateLimitedLLM(config=config)
+    with pytest.raises(LLMCallFailed):
+        llm("prompt")
+    assert llm.num_calls == 3
+    # rate limit errors don't open the circuit breaker
+    assert not llm.circuit_breaker.is_open
+
+    llm = AlwaysRateLimitedLLM(config=config)
+    with pytest.raises(LLMCallFailed):
+        asyncio.run(llm.acall("prompt"))
+    assert llm.num_calls == 3
@@ -0,0 +1,85 @@
+import pytest
+from llm_docstring_generator.llm.llm import BaseLLM
+from llm_docstring_generator.llm.llm_config import LLMConfig
+from llm_docstring_generator.llm.resilience import (
+    CircuitBreaker,
+    LLMCallFailed,
+    ResilienceConfig,
+)
+from tests.llm.test_rate_limiter import FakeClock
+
+
+class FailingLLM(BaseLLM):
+    def __init__(self, *args, num_failures: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.num_failures = num_failures
+        self.num_calls = 0
+
+    def call_llm(self, prompt: str) -> str:
+        self.num_calls += 1
+        if self.num_calls <= self.num_failures:
+            raise ConnectionError("backend down")
+        return prompt
+
+
+def get_config(**kwargs) -> LLMConfig:
+    return LLMConfig(
+        model="failing",
+        resilience=ResilienceConfig(initial_backoff=0.001, max_backoff=0.01, **kwargs),
+    )
+
+
+def test_backoff_is_bounded():
+    config = ResilienceConfig(initial_backoff=1, max_backoff=8)
+    for attempt in range(10):
+        backoff = config.get_backoff(attempt)
+        assert 0 <= backoff <= min(8, 2**attempt)
+
+
+def test_circuit_breaker_opens_and_lets_single_trial_call_through():
+    clock = FakeClock()
+    circuit_breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    circuit_breaker.record_failure()
+    assert not circuit_breaker.is_open
+    assert circuit_breaker._try_pass() == 0
+    circuit_breaker.record_failure()
+    assert circuit_breaker.is_open
+    assert circuit_breaker._try_pass() == 10
+
+    clock.now = 10
+    assert circuit_breaker._try_pass() == 0
+    # only a single trial call while half open
+    assert circuit_breaker._try_pass() > 0
+    circuit_breaker.record_failure()
+    assert circuit_breaker._try_pass() == 10
+
+    clock.now = 20
+    assert circuit_breaker._try_pass() == 0
+    circuit_breaker.record_success()
+    assert not circuit_breaker.is_open
+    assert circuit_breaker._try_pass() == 0
+
+
+def test_llm_retries_failed_calls():
+    llm = FailingLLM(config=get_config(max_attempts=3), num_failures=2)
+    assert llm("prompt") == "prompt"
+    assert llm.num_calls == 3
+    assert not llm.circuit_breaker.is_open
+
+
+def test_llm_raises_after_max_attempts():
+    llm = FailingLLM(config=get_config(max_attempts=3), num_failures=10)
+    with pytest.raises(LLMCallFailed):
+        llm("prompt")
+    assert llm.num_calls == 3
+
+
+def test_llm_does_not_retry_non_retryable_errors():
+    class NonRetryableLLM(FailingLLM):
+        def is_retryable_error(self, error: Exception) -> bool:
+            return False
+
+    llm = NonRetryableLLM(config=get_config(max_attempts=3), num_failures=10)
+    with pytest.raises(LLMCallFailed):
+        llm("prompt")
+    assert llm.num_calls == 1
@@ -0,0 +1,46 @@
+from llm_docstring_generator.llm.llm import DebugLLM
+from llm_docstring_generator.llm.llm_config import LLMConfig
+from llm_docstring_generator.llm.tokenizer import Tokenizer
+
+
+class CountingEncoding:
+    """
+    One token per character, counts the calls of encode and decode.
+    """
+
+    def __init__(self):
+        self.encoded_texts = []
+        self.num_decode_calls = 0
+
+    def encode(self, text, allowed_special=None):
+        self.encoded_texts.append(text)
+        return [ord(character) for character in text]
+
+    def decode(self, tokens):
+        self.num_decode_calls += 1
+        return "".join(chr(token) for token in tokens)
+
+
+def test_prompts_are_encoded_once():
+    encoding = CountingEncoding()
+    tokenizer = Tokenizer(encoding)
+
+    for prompt in ["first prompt", "second prompt"]:
+        assert tokenizer.truncate(prompt, "system", 100) == (prompt, 6 + len(prompt))
+    # the system prompt is only encoded once, prompts below the limit are not decoded
+    assert encoding.encoded_texts == ["first prompt", "system", "second prompt"]
+    assert encoding.num_decode_calls == 0
+
+    assert tokenizer.truncate("long prompt", "system", 4) == ("long", 10)
+    assert encoding.num_decode_calls == 1
+
+
+def test_llm_uses_the_tokenizer():
+    llm = DebugLLM(
+        config=LLMConfig(system_prompt="system", max_prompt_token_length=4),
+        llm_cache=None,
+    )
+    llm.tokenizer = Tokenizer(CountingEncoding())
+    assert llm("long prompt") == "long"
+    assert llm.num_prompt_tokens == 10
+    assert llm.num_answer_tokens == 4
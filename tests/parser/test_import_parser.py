@@ -105,3 +105,16 @@ def test_get_imports_nodes():
     for node in import_nodes:
         assert isinstance(node, ast.Import)
         assert len(node.names) == 1
+
+
+def test_get_imports_nodes_does_not_modify_shared_ast():
+    code = "import os, sys\nfrom typing import List, Optional\n"
+    for _ in range(2):
+        import_from_nodes, import_nodes = ImportParser(
+            code, "module"
+        ).get_imports_names()
+        assert [node.names[0].name for node in import_nodes] == ["os", "sys"]
+        assert [node.names[0].name for node in import_from_nodes] == [
+            "List",
+            "Optional",
+        ]
@@ -38,6 +38,11 @@ def test_load_python_file_code_annotation_pipeline(
             class_or_function_name="BaseAnnotator",
             method_name=None,
         ),
+        Import(
+            import_name="llm_docstring_generator.annotator.triage",
+            class_or_function_name="CodeTriage",
+            method_name="__init__",
+        ),
         Import(
             import_name="llm_docstring_generator.utils.base_config",
             class_or_function_name="BaseConfig",
@@ -51,11 +56,39 @@ def test_load_python_file_code_annotation_pipeline(
     }
 
     assert set(methods[1].import_dependencies) == {
+        Import(
+            import_name="llm_docstring_generator.pipelines.code_annotation_pipeline",
+            class_or_function_name="exit_on_sigterm",
+            method_name=None,
+        ),
+        Import(
+            import_name="llm_docstring_generator.pipelines.code_annotation_pipeline",
+            class_or_function_name="CodeAnnotationPipeline",
+            method_name="load_repository",
+        ),
+        Import(
+            import_name="llm_docstring_generator.pipelines.code_annotation_pipeline",
+            class_or_function_name="CodeAnnotationPipeline",
+            method_name="annotate_repository",
+        ),
+    }
+
+    load_sorted_python_files = [
+        function
+        for function in python_file.functions
+        if function.import_.class_or_function_name == "load_sorted_python_files"
+    ][0]
+    assert set(load_sorted_python_files.import_dependencies) == {
         Import(
             import_name="llm_docstring_generator.parser.load_python_files",
             class_or_function_name="load_python_files",
             method_name=None,
         ),
+        Import(
+            import_name="llm_docstring_generator.utils.base_config",
+            class_or_function_name="BaseConfig",
+            method_name=None,
+        ),
         Import(
             import_name="llm_docstring_generator.utils.clone_repository",
             class_or_function_name="clone_repository",
@@ -0,0 +1,31 @@
+from pathlib import Path
+
+from llm_docstring_generator.parser.load_python_files import load_python_files
+from llm_docstring_generator.utils.base_config import BaseConfig
+
+
+def test_load_python_files_in_parallel(tmp_path):
+    def get_config(num_workers: int) -> BaseConfig:
+        return BaseConfig(
+            repository_name="llm_docstring_generator",
+            repository_path=Path(__file__).parent.parent.parent,
+            cache_path=tmp_path,
+            use_parse_cache=False,
+            num_workers=num_workers,
+        )
+
+    python_files = load_python_files(get_config(num_workers=1))
+    python_files_parallel = load_python_files(get_config(num_workers=4))
+    assert len(python_files) > 25
+    assert [python_file.import_name for python_file in python_files_parallel] == [
+        python_file.import_name for python_file in python_files
+    ]
+    assert python_files_parallel == python_files
+    for python_file, python_file_parallel in zip(python_files, python_files_parallel):
+        assert (
+            python_file.import_dependencies == python_file_parallel.import_dependencies
+        )
+        for function, function_parallel in zip(
+            python_file.functions, python_file_parallel.functions
+        ):
+            assert function.import_dependencies == function_parallel.import_dependencies
@@ -0,0 +1,154 @@
+import os
+import shutil
+import time
+from collections import Counter
+from pathlib import Path
+
+import llm_docstring_generator.parser.load_python_files as load_python_files_module
+import pytest
+from llm_docstring_generator.parser.load_python_files import (
+    get_symbol_table_fingerprint,
+    load_python_files,
+)
+from llm_docstring_generator.parser.parse_cache import get_parse_cache
+from llm_docstring_generator.sorters.function_import_graph import (
+    FUNCTION_IMPORT_GRAPH_CACHE,
+)
+from llm_docstring_generator.utils.base_config import BaseConfig
+from llm_docstring_generator.utils.utils import ALL_IMPORTS_CACHE
+
+
+def clear_in_memory_caches():
+    # simulates a new python session
+    ALL_IMPORTS_CACHE.clear()
+    FUNCTION_IMPORT_GRAPH_CACHE.clear()
+    get_symbol_table_fingerprint.cache_clear()
+    get_parse_cache.cache_clear()
+
+
+def load_python_files_and_count_parsed_files(config, monkeypatch):
+    parsed_import_names = []
+    parse_python_file = load_python_files_module.parse_python_file
+
+    def counting_parse_python_file(config, codestring, import_name):
+        parsed_import_names.append(import_name)
+        return parse_python_file(config, codestring, import_name)
+
+    monkeypatch.setattr(
+        load_python_files_module, "parse_python_file", counting_parse_python_file
+    )
+    clear_in_memory_caches()
+    python_files = load_python_files(config)
+    return sorted(python_files, key=lambda x: x.import_name), parsed_import_names
+
+
+def test_parse_cache_only_parses_changed_files(tmp_path, monkeypatch):
+    repository_path = tmp_path / "mock_repo"
+    shutil.copytree(
+        Path(__file__).parent.parent / "sorters" / "mock_repo",
+        repository_path,
+        ignore=shutil.ignore_patterns("__pycache__"),
+    )
+    config = BaseConfig(
+        repository_name="mock_repo",
+        repository_path=repository_path,
+        cache_path=tmp_path / "cache",
+    )
+    python_files, parsed = load_python_files_and_count_parsed_files(config, monkeypatch)
+    assert sorted(parsed) == ["__init__", "a", "b", "c"]
+
+    cached_python_files, parsed = load_python_files_and_count_parsed_files(
+        config, monkeypatch
+    )
+    assert parsed == []
+    assert cached_python_files == python_files
+
+    # a change that doesn't affect symbols or the call graph only reparses the changed file
+    with open(repository_path / "c.py", "a") as file:
+        file.write("\n# comment\n")
+    _, parsed = load_python_files_and_count_parsed_files(config, monkeypatch)
+    assert parsed == ["c"]
+
+    # a new symbol may change the dependencies of all files
+    with open(repository_path / "a.py", "a") as file:
+        file.write("\n\ndef new_function():\n    pass\n")
+    _, parsed = load_python_files_and_count_parsed_files(config, monkeypatch)
+    assert sorted(parsed) == ["__init__", "a", "b", "c"]
+
+    config_without_cache = BaseConfig(
+        repository_name="mock_repo",
+        repository_path=repository_path,
+        cache_path=tmp_path / "cache",
+        use_parse_cache=False,
+    )
+    python_files, parsed = load_python_files_and_count_parsed_files(
+        config_without_cache, monkeypatch
+    )
+    cached_python_files, _ = load_python_files_and_count_parsed_files(
+        config, monkeypatch
+    )
+    assert len(parsed) == 4
+    assert cached_python_files == python_files
+    clear_in_memory_caches()
+
+
+def test_parse_cache_is_keyed_by_the_repository_name(tmp_path, monkeypatch):
+    repository_path = tmp_path / "mock_repo"
+    shutil.copytree(
+        Path(__file__).parent.parent / "sorters" / "mock_repo",
+        repository_path,
+        ignore=shutil.ignore_patterns("__pycache__"),
+    )
+    for repository_name in ["mock_repo", "renamed_repo"]:
+        config = BaseConfig(
+            repository_name=repository_name,
+            repository_path=repository_path,
+            cache_path=tmp_path / "cache",
+        )
+        python_files, parsed = load_python_files_and_count_parsed_files(
+            config, monkeypatch
+        )
+        assert sorted(parsed) == ["__init__", "a", "b", "c"]
+        assert all(
+            python_file.repository_name == repository_name
+            for python_file in python_files
+        )
+    clear_in_memory_caches()
+
+
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_parse_cache_deletes_unused_entries(tmp_path, monkeypatch, num_workers):
+    repository_path = tmp_path / "mock_repo"
+    shutil.copytree(
+        Path(__file__).parent.parent / "sorters" / "mock_repo",
+        repository_path,
+        ignore=shutil.ignore_patterns("__pycache__"),
+    )
+    config = BaseConfig(
+        repository_name="mock_repo",
+        repository_path=repository_path,
+        cache_path=tmp_path / "cache",
+        num_workers=num_workers,
+    )
+    parse_cache_path = tmp_path / "cache" / "parse_cache" / "mock_repo"
+
+    def count_entries():
+        return Counter(
+            filepath.name.split("_")[0] for filepath in parse_cache_path.iterdir()
+        )
+
+    load_python_files_and_count_parsed_files(config, monkeypatch)
+    assert count_entries() == {"python": 4, "symbols": 4, "graph": 1}
+
+    # entries of the previous run that are used by the next run are touched by the worker processes
+    for filepath in parse_cache_path.iterdir():
+        os.utime(filepath, (time.time() - 60, time.time() - 60))
+    with open(repository_path / "c.py", "a") as file:
+        file.write("\n# comment\n")
+    load_python_files_and_count_parsed_files(config, monkeypatch)
+    assert count_entries() == {"python": 4, "symbols": 4, "graph": 1}
+
+    # all entries are in use
+    load_python_files_and_count_parsed_files(config, monkeypatch)
+    assert count_entries() == {"python": 4, "symbols": 4, "graph": 1}
+    clear_in_memory_caches()
@@ -0,0 +1,51 @@
+import textwrap
+from pathlib import Path
+
+from llm_docstring_generator.parser.ast_parser import AstParser
+from llm_docstring_generator.parser.load_python_files import load_python_files
+from llm_docstring_generator.parser.parsed_module import get_parsed_module
+from llm_docstring_generator.utils.base_config import BaseConfig
+
+
+def test_parsed_module_is_shared_and_indexes_nodes():
+    code = """
+    import os
+    from typing import List
+
+    def function():
+        def inner_function():
+            pass
+
+    class Foo:
+        def method(self):
+            pass
+
+        class Bar:
+            def nested_method(self):
+                pass
+    """
+    code = textwrap.dedent(code)
+    parsed_module = get_parsed_module(code)
+    assert get_parsed_module(code) is parsed_module
+    assert AstParser(code).parsed_module is parsed_module
+
+    assert [node.name for node in parsed_module.function_nodes] == [
+        "function",
+        "inner_function",
+    ]
+    assert [node.name for node in parsed_module.class_nodes] == ["Foo", "Bar"]
+    assert [node.names[0].name for node in parsed_module.import_nodes] == ["os"]
+    assert [node.module for node in parsed_module.import_from_nodes] == ["typing"]
+    assert parsed_module.lines == code.split("\n")
+
+
+def test_parsed_modules_are_released_after_loading(tmp_path):
+    config = BaseConfig(
+        repository_name="mock_repo",
+        repository_path=Path(__file__).parent.parent / "sorters" / "mock_repo",
+        cache_path=tmp_path,
+        use_parse_cache=False,
+    )
+    get_parsed_module("x = 1")
+    assert len(load_python_files(config)) > 0
+    assert get_parsed_module.cache_info().currsize == 0
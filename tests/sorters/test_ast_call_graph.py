@@ -0,0 +1,72 @@
+from llm_docstring_generator.python_files.imports import Import
+from llm_docstring_generator.sorters.ast_call_graph import build_call_graph
+
+MODELS_CODE = """
+class Base:
+    def run(self):
+        return self.step()
+
+    def step(self):
+        return 1
+
+
+class Model(Base):
+    def __init__(self):
+        super().__init__()
+        self.helper = Helper()
+
+    def step(self):
+        super().step()
+        return self.helper.compute()
+
+
+class Helper:
+    def compute(self):
+        return 2
+"""
+
+TRAIN_CODE = """
+import json
+from pkg import models
+from pkg.models import Model
+
+
+def train(model: Model):
+    model.run()
+    json.dumps([]).step()
+    return models.Helper()
+
+
+def main():
+    train(Model())
+    with open("file") as file:
+        file.compute()
+"""
+
+
+def test_build_call_graph_resolves_calls(tmp_path):
+    package_path = tmp_path / "pkg"
+    package_path.mkdir()
+    (package_path / "__init__.py").write_text("")
+    (package_path / "models.py").write_text(MODELS_CODE)
+    (package_path / "train.py").write_text(TRAIN_CODE)
+
+    G = build_call_graph(tmp_path, [package_path], all_imports=[])
+
+    def method(class_name, method_name):
+        return Import("pkg.models", class_name, method_name)
+
+    train = Import("pkg.train", "train")
+    main = Import("pkg.train", "main")
+    assert set(G.edges) == {
+        # self.step()
+        (method("Base", "run"), method("Base", "step")),
+        # self.helper = Helper() and self.helper.compute()
+        (method("Model", "step"), method("Helper", "compute")),
+        # super().step()
+        (method("Model", "step"), method("Base", "step")),
+        # model: Model and model.run() resolves to the base class method
+        (train, method("Base", "run")),
+        (main, train),
+        (main, method("Model", "__init__")),
+    }
@@ -0,0 +1,59 @@
+import networkx as nx
+from llm_docstring_generator.sorters.sort_python_files import NodeIterator
+
+
+def test_node_iterator_yields_topological_order():
+    G = nx.DiGraph()
+    G.add_nodes_from(["e", "d", "c", "b", "a"])
+    G.add_edges_from([("c", "a"), ("e", "b"), ("b", "a"), ("d", "b")])
+    node_iterator = NodeIterator(G)
+    # root nodes first, then the ready node with the smallest name
+    assert list(node_iterator) == ["c", "d", "e", "b", "a"]
+    assert node_iterator.broken_cycles == []
+
+
+def test_node_iterator_breaks_cycles_deterministically():
+    G = nx.DiGraph()
+    G.add_nodes_from(["root", "x", "y", "z", "after_cycle", "independent"])
+    G.add_edges_from(
+        [
+            ("root", "y"),
+            ("x", "y"),
+            ("y", "z"),
+            ("z", "x"),
+            ("root", "x"),
+            ("x", "after_cycle"),
+            ("independent", "independent_child"),
+        ]
+    )
+    node_iterator = NodeIterator(G)
+    nodes = list(node_iterator)
+    assert nodes == [
+        "independent",
+        "root",
+        "independent_child",
+        "x",
+        "y",
+        "z",
+        "after_cycle",
+    ]
+    assert node_iterator.broken_cycles == [("x", ["z"])]
+    # iterating again yields the same order
+    assert list(node_iterator) == nodes
+    assert node_iterator.broken_cycles == [("x", ["z"])]
+
+
+def test_node_iterator_handles_large_chains():
+    G = nx.DiGraph()
+    nodes = [f"node_{i:05d}" for i in range(20000)]
+    G.add_edges_from(zip(nodes[1:], nodes[:-1]))
+    G.add_edge(nodes[0], nodes[-1])
+    assert len(list(NodeIterator(G))) == len(nodes)
+
+
+def test_node_iterator_yields_nodes_with_self_loops():
+    G = nx.DiGraph()
+    G.add_edges_from([("a", "b"), ("c", "c"), ("c", "d")])
+    node_iterator = NodeIterator(G)
+    assert list(node_iterator) == ["a", "b", "c", "d"]
+    assert node_iterator.broken_cycles == []
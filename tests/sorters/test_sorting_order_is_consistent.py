@@ -41,7 +41,7 @@ def test_sorting_order_is_consistent(config_llm_docstring_generator):  # noqa: F
         "".join([python_file.import_name for python_file in python_files]).encode()
     ).hexdigest()
     print(md5_python_file_hash)
-    assert md5_python_file_hash == "d57f29207c62f2b61c09a8993c00d338"
+    assert md5_python_file_hash == "7e1ae70e48951d39cd2e80afad4be3d0"
 
     imports = []
     for python_file in python_files:
@@ -65,16 +65,21 @@ def test_sorting_order_is_consistent(config_llm_docstring_generator):  # noqa: F
         "d41d8cd98f00b204e9800998ecf8427e",
         "d41d8cd98f00b204e9800998ecf8427e",
         "d41d8cd98f00b204e9800998ecf8427e",
-        "9cacfdcd49fb160141605c8f0ff431c0",
-        "ee0f610cab82b3a293af3bc669a05c5c",
+        "1a316cc7d2d58f747e974ce6002067a7",
+        "e3c320b5018d4e24022fa068a9ddc7a3",
+        "6bf6f6cc2be4c5df111b3d04043bf650",
+        "bb4cee195ce61c165f02ec77180e91ff",
+        "4a740cd04c82ad97af420a860121b803",
         "d41d8cd98f00b204e9800998ecf8427e",
+        "dab5df73bfad8c7da0517dfc860b997a",
+        "b8ab8cae8ffa52c191907fed66d7d3f7",
+        "b48d185cdaa566a5268b5514f8bc57b3",
         "d41d8cd98f00b204e9800998ecf8427e",
-        "b75bbba2572620ea4b0ba4ab79a7e6ee",
+        "a6c7378a04161953a1b1bacdba0d813d",
         "d41d8cd98f00b204e9800998ecf8427e",
         "d41d8cd98f00b204e9800998ecf8427e",
         "ccb5ae5c2759b9bd70fd4872bee7d1d8",
         "d41d8cd98f00b204e9800998ecf8427e",
-        "4fd0b11d7e9a065c0da7496471f6882f",
         "d41d8cd98f00b204e9800998ecf8427e",
         "94a26e027692cf3f67866ebb5cba516e",
         "d41d8cd98f00b204e9800998ecf8427e",
@@ -82,43 +87,82 @@ def test_sorting_order_is_consistent(config_llm_docstring_generator):  # noqa: F
         "d41d8cd98f00b204e9800998ecf8427e",
         "d41d8cd98f00b204e9800998ecf8427e",
         "d41d8cd98f00b204e9800998ecf8427e",
+        "d41d8cd98f00b204e9800998ecf8427e",
         "6966e621ba0fe3b0a17b86e1ddb719e0",
+        "4c97c38b200eec4eea8ed37e88812b8e",
         "d41d8cd98f00b204e9800998ecf8427e",
-        "c53f364553cbd11e5f0aff8e6ee68434",
-        "bbaa110be593cfe88c90405a929c7e9c",
+        "28c29b8e95a14898d635c207df7a4dfd",
+        "26fe0a5a4d67dd07f23406146b548bcb",
+        "440f7957b8b1045505a254fa59904555",
+        "e0ec4331c7eb159a69d259af8cd3d5cc",
+        "2b51b888d60e2857e47837fff12d5bc8",
+        "ee0f610cab82b3a293af3bc669a05c5c",
+        "12013df3188566d77b9fcd3b99ca2b01",
+        "b995dc1e8ea874f94e318e14347b98e0",
+        "111578946fcdbde7ab93306d5a50816f",
         "5e9411246cceef572a9f95de580ac74f",
         "2d58c9d4fe9683358de82732f9c7e569",
+        "fcc5e3cb4ed4a38f766eea61fc6b7ef9",
+        "0ba2b150b54ce19290f39ef11de98923",
         "c2170fa26819ca44cb6119c1a7b2e789",
-        "d9756b0b9edb67eadddf755a2c925cda",
-        "3deb05c02502d02136ed02cc0adeb144",
-        "734ef67ad2823f26abad7534ba9365c6",
+        "7925ab40e5b42b929992aa3fa1479910",
+        "9b77a4e51e0e553b00af779bbc7a9804",
+        "803fa617ec995424908da9aa4faf4f06",
+        "9aa63f23b66ac87d9979116b23b137fe",
+        "0205564d3e57199e9f394182190b4549",
+        "efed1b0b6af0ade0d176bcdf1da62832",
+        "f8dcb6e9582943d29153e660b7eed491",
         "5e6b2127a792b1b6caf8d7016b9dd0ea",
-        "bfac517d98812b4349d8becc709af97f",
-        "18a951d15288f1e829f0e3b6d90175d2",
-        "307b661d0e25ef18ce063c57c0a7d25e",
+        "d0a82c9e879875329871d40e4fe2d193",
+        "f31c140c06c7981012afb74a31f358a6",
+        "d8ba0d9554680faff7e672196e59aa81",
+        "d9d96b8c8b227cce23c333b1177254b2",
         "46980c744e193108abbabec3340649c1",
         "0e51173d4858288bc881a02c478b4a52",
-        "bd97ef3822ff31b6fdf5cde535b67aad",
-        "fe93656f7f25a524977483215159b6f9",
-        "c94c4b53547e7760187aa46fd425f92f",
-        "02ad2b7f9a0c62ae67c01b676f2ae6c2",
+        "28cffb1cebbaa8d90f8ae65448d48036",
+        "18924d762636b1bba13f8aece4dc610f",
         "ec9605b7a6a5706875a95a923c810d20",
-        "572593139d634449e70aac902d34daa4",
+        "fe93656f7f25a524977483215159b6f9",
+        "1c4600418fcf5ed1901f81e3177daa83",
+        "51657c53fcacdcddee71c9d5b1f121c3",
         "3aae08b83a89e2e40aa4a6e0cb6bacaf",
+        "aa94749763e412f63854640a36e632e5",
         "d41d8cd98f00b204e9800998ecf8427e",
         "d41d8cd98f00b204e9800998ecf8427e",
-        "9dc13da2c3f6b87e37770635eb9bfa27",
+        "d41d8cd98f00b204e9800998ecf8427e",
+        "b5308375a8e7fcc7077ad23b930d7796",
+        "1a5728d47faf3d473837d58e5f655c60",
+        "12057216a5d7db7751328f267a1b4419",
+        "d220a2c8b768575e4b5d71ab1e6d6d3b",
+        "29ddb681a41b3186bf5b90c3de57ba89",
+        "64ba336efd7c8d2b4a59c2f14d780eef",
+        "3f8c5a73aa923083d89c87f217926304",
+        "2259730545a952ff84d89f5c85129075",
         "c0f4642534df2d33043c5da1a733f0bf",
-        "7fb11c7d1018ac268ee8e01b80416914",
+        "6b6689557fecd409b77bd11eb3b5bd51",
+        "76d5cb4529941f5824f602f066d20193",
+        "c8785460d392fb4ea2d515eb87357b3f",
+        "4ae8326cd2e0fc46e05f494dbc778c83",
+        "b91e02ab70930ec8886d051a4403faf4",
+        "048a046496d1445fcdad97decf8dcbe8",
+        "a47d0830362c63dd03cc87138142fca9",
+        "247d47b3a42e1064acf549a1f596c40c",
+        "298f14a74d59c1735e9805cbc0bfb3f7",
+        "72cd43c8f52f9c35b110ae890af49151",
         "dc3974dc8c0ee9c3b0fe69906b7f6b5d",
         "be9e4a0292df289874f7fce5217f765a",
-        "d247d3c27f129bc72f66ab4499e34153",
+        "b810884846174fad895ed6086d1fa67d",
         "a8a53167ebfb9699cae5213ffd1f75a3",
         "c1517e5418f5cffab796a19fe20d9dda",
         "0cd7b3c798b631e2356dc4a504cfa6a2",
+        "151134e104c2ec65b6a2b2146a44e56c",
+        "3fb96f0f3610e45f84c95d5899fdf603",
+        "4a608a05dbaec2bb714201da303d6aeb",
         "2853512e6935915e7d8fdfa535c0cba5",
         "eef2dc371b3f71333ac91eb731cb2005",
+        "30bf50390dc8612830e4d39220ff9470",
         "069a93657344fc995a7d2e164593140c",
+        "2d47472b9bfeb85fa54d84ab6c130ae7",
         "367c8435bb127de082366f0b35ca3b9e",
         "22851deb3a2bca5a7e8af88b4c87f6f2",
         "c10551b502584201b859bf03a5e969ac",
@@ -152,41 +196,153 @@ def test_llm_is_sorted_correctly(config_llm_docstring_generator):  # noqa: F811
         function_and_classes, key=lambda x: x.complete_import_name
     )
     assert ([f.import_.complete_import_name for f in function_and_classes]) == [
+        "llm_docstring_generator.llm.llm.AsyncClientLLM",
+        "llm_docstring_generator.llm.llm.AsyncClientLLM.__init__",
+        "llm_docstring_generator.llm.llm.AsyncClientLLM.acall_llm",
+        "llm_docstring_generator.llm.llm.AsyncClientLLM.async_client",
+        "llm_docstring_generator.llm.llm.AsyncClientLLM.call_llm",
+        "llm_docstring_generator.llm.llm.AsyncClientLLM.close",
+        "llm_docstring_generator.llm.llm.AsyncClientLLM.close_async_client",
+        "llm_docstring_generator.llm.llm.AsyncClientLLM.create_async_client",
+        "llm_docstring_generator.llm.llm.AsyncClientLLM.generate",
+        "llm_docstring_generator.llm.llm.AsyncClientLLM.generate_with_timeout",
+        "llm_docstring_generator.llm.llm.AsyncClientLLM.is_retryable_error",
+        "llm_docstring_generator.llm.llm.AsyncClientLLM.max_connections",
         "llm_docstring_generator.llm.llm.BaseLLM",
         "llm_docstring_generator.llm.llm.BaseLLM.__call__",
         "llm_docstring_generator.llm.llm.BaseLLM.__init__",
+        "llm_docstring_generator.llm.llm.BaseLLM.acall",
+        "llm_docstring_generator.llm.llm.BaseLLM.acall_llm",
+        "llm_docstring_generator.llm.llm.BaseLLM.acall_llm_with_retries",
+        "llm_docstring_generator.llm.llm.BaseLLM.acquire_request_slot",
+        "llm_docstring_generator.llm.llm.BaseLLM.cache_stats",
         "llm_docstring_generator.llm.llm.BaseLLM.call_llm",
+        "llm_docstring_generator.llm.llm.BaseLLM.call_llm_with_retries",
+        "llm_docstring_generator.llm.llm.BaseLLM.close",
+        "llm_docstring_generator.llm.llm.BaseLLM.count_answer_tokens",
+        "llm_docstring_generator.llm.llm.BaseLLM.count_database_lookups",
+        "llm_docstring_generator.llm.llm.BaseLLM.generation_parameters",
+        "llm_docstring_generator.llm.llm.BaseLLM.get_cached_answer",
+        "llm_docstring_generator.llm.llm.BaseLLM.get_cached_answers",
+        "llm_docstring_generator.llm.llm.BaseLLM.get_database_answers",
         "llm_docstring_generator.llm.llm.BaseLLM.get_num_tokens",
+        "llm_docstring_generator.llm.llm.BaseLLM.get_prompt_cache_key",
+        "llm_docstring_generator.llm.llm.BaseLLM.get_truncated_prompt",
+        "llm_docstring_generator.llm.llm.BaseLLM.is_retryable_error",
+        "llm_docstring_generator.llm.llm.BaseLLM.memory_cache_stats",
+        "llm_docstring_generator.llm.llm.BaseLLM.raise_if_final_attempt",
+        "llm_docstring_generator.llm.llm.BaseLLM.raise_if_rate_limited_too_often",
+        "llm_docstring_generator.llm.llm.BaseLLM.release_if_acquired",
+        "llm_docstring_generator.llm.llm.BaseLLM.save_answer",
         "llm_docstring_generator.llm.llm.BaseLLM.token_count_stats",
+        "llm_docstring_generator.llm.llm.BaseLLM.truncate_prompt",
         "llm_docstring_generator.llm.llm.DebugLLM",
+        "llm_docstring_generator.llm.llm.DebugLLM.acall_llm",
         "llm_docstring_generator.llm.llm.DebugLLM.call_llm",
         "llm_docstring_generator.llm.llm.LocalTGILLM",
         "llm_docstring_generator.llm.llm.LocalTGILLM.__init__",
-        "llm_docstring_generator.llm.llm.LocalTGILLM.call_llm",
+        "llm_docstring_generator.llm.llm.LocalTGILLM.close_async_client",
+        "llm_docstring_generator.llm.llm.LocalTGILLM.create_async_client",
+        "llm_docstring_generator.llm.llm.LocalTGILLM.generate",
+        "llm_docstring_generator.llm.llm.LocalTGILLM.generation_parameters",
         "llm_docstring_generator.llm.llm.OpenAILLM",
         "llm_docstring_generator.llm.llm.OpenAILLM.__init__",
-        "llm_docstring_generator.llm.llm.OpenAILLM.call_llm",
+        "llm_docstring_generator.llm.llm.OpenAILLM.close_async_client",
+        "llm_docstring_generator.llm.llm.OpenAILLM.create_async_client",
+        "llm_docstring_generator.llm.llm.OpenAILLM.generate",
+        "llm_docstring_generator.llm.llm.OpenAILLM.generation_parameters",
+        "llm_docstring_generator.llm.llm.release_if_acquired",
     ]
 
     import_names = get_sorted_import_names(python_file)
     expected = [
-        "llm_docstring_generator.llm.cache_database.LLMCache.get_llm_answer",
-        "llm_docstring_generator.llm.cache_database.LLMCache.save_llm_answer",
-        "llm_docstring_generator.llm.cache_database.create_default_llm_cache",
+        "llm_docstring_generator.llm.event_loop_thread.EventLoopThread.__init__",
+        "llm_docstring_generator.llm.event_loop_thread.EventLoopThread.arun",
+        "llm_docstring_generator.llm.event_loop_thread.EventLoopThread.close",
+        "llm_docstring_generator.llm.event_loop_thread.EventLoopThread.run",
         "llm_docstring_generator.llm.llm_config.LLMConfig",
+        "llm_docstring_generator.llm.llm.AsyncClientLLM.create_async_client",
+        "llm_docstring_generator.llm.llm.AsyncClientLLM.close_async_client",
+        "llm_docstring_generator.llm.llm.AsyncClientLLM.generate",
+        "llm_docstring_generator.llm.llm.AsyncClientLLM.is_retryable_error",
+        "llm_docstring_generator.llm.llm.AsyncClientLLM.max_connections",
+        "llm_docstring_generator.llm.cache_backend.CacheBackend.flush",
+        "llm_docstring_generator.llm.cache_backend.CacheBackend.get_many",
+        "llm_docstring_generator.llm.cache_backend.CacheBackend.put_many",
+        "llm_docstring_generator.llm.cache_database.create_default_llm_cache",
+        "llm_docstring_generator.llm.cache_key.get_cache_key",
+        "llm_docstring_generator.llm.cache_key.get_legacy_cache_key",
+        "llm_docstring_generator.llm.memory_cache.MemoryCache.__init__",
+        "llm_docstring_generator.llm.memory_cache.MemoryCache.get_answer",
+        "llm_docstring_generator.llm.memory_cache.MemoryCache.set_answer",
+        "llm_docstring_generator.llm.rate_limiter.RateLimitExceeded",
+        "llm_docstring_generator.llm.rate_limiter.RateLimiter.__init__",
+        "llm_docstring_generator.llm.rate_limiter.RateLimiter.aacquire",
+        "llm_docstring_generator.llm.rate_limiter.RateLimiter.acquire",
+        "llm_docstring_generator.llm.rate_limiter.RateLimiter.record_tokens",
+        "llm_docstring_generator.llm.rate_limiter.RateLimiter.register_rate_limit_error",
+        "llm_docstring_generator.llm.resilience.CircuitBreaker.__init__",
+        "llm_docstring_generator.llm.resilience.CircuitBreaker.await_until_closed",
+        "llm_docstring_generator.llm.resilience.CircuitBreaker.record_failure",
+        "llm_docstring_generator.llm.resilience.CircuitBreaker.record_success",
+        "llm_docstring_generator.llm.resilience.CircuitBreaker.wait_until_closed",
+        "llm_docstring_generator.llm.resilience.ResilienceConfig.get_backoff",
+        "llm_docstring_generator.llm.tokenizer.Tokenizer.__init__",
+        "llm_docstring_generator.llm.tokenizer.Tokenizer.count_system_prompt_tokens",
+        "llm_docstring_generator.llm.tokenizer.Tokenizer.count_tokens",
+        "llm_docstring_generator.llm.tokenizer.Tokenizer.truncate",
+        "llm_docstring_generator.llm.llm.BaseLLM.acall_llm",
+        "llm_docstring_generator.llm.llm.BaseLLM.acquire_request_slot",
+        "llm_docstring_generator.llm.llm.BaseLLM.cache_stats",
         "llm_docstring_generator.llm.llm.BaseLLM.call_llm",
-        "llm_docstring_generator.llm.llm.BaseLLM.get_num_tokens",
+        "llm_docstring_generator.llm.llm.BaseLLM.count_database_lookups",
+        "llm_docstring_generator.llm.llm.BaseLLM.generation_parameters",
+        "llm_docstring_generator.llm.llm.BaseLLM.is_retryable_error",
+        "llm_docstring_generator.llm.llm.BaseLLM.memory_cache_stats",
+        "llm_docstring_generator.llm.llm.BaseLLM.release_if_acquired",
         "llm_docstring_generator.llm.llm.BaseLLM.token_count_stats",
         "llm_docstring_generator.llm.llm.DebugLLM",
+        "llm_docstring_generator.llm.llm.DebugLLM.acall_llm",
         "llm_docstring_generator.llm.llm.DebugLLM.call_llm",
-        "llm_docstring_generator.llm.llm.LocalTGILLM.call_llm",
-        "llm_docstring_generator.llm.llm.OpenAILLM.call_llm",
-        "llm_docstring_generator.llm.llm.BaseLLM",
+        "llm_docstring_generator.llm.rate_limiter.RateLimitExceeded.__init__",
+        "llm_docstring_generator.llm.rate_limiter.RateLimiter.update_from_headers",
+        "llm_docstring_generator.llm.llm.LocalTGILLM.close_async_client",
+        "llm_docstring_generator.llm.llm.LocalTGILLM.create_async_client",
+        "llm_docstring_generator.llm.llm.LocalTGILLM.generation_parameters",
+        "llm_docstring_generator.llm.llm.OpenAILLM.close_async_client",
+        "llm_docstring_generator.llm.llm.OpenAILLM.create_async_client",
+        "llm_docstring_generator.llm.llm.OpenAILLM.generation_parameters",
+        "llm_docstring_generator.llm.llm.release_if_acquired",
+        "llm_docstring_generator.llm.llm.AsyncClientLLM.async_client",
+        "llm_docstring_generator.llm.llm.AsyncClientLLM.generate_with_timeout",
+        "llm_docstring_generator.llm.llm.BaseLLM.close",
+        "llm_docstring_generator.llm.llm.BaseLLM.get_prompt_cache_key",
+        "llm_docstring_generator.llm.llm.BaseLLM.get_database_answers",
+        "llm_docstring_generator.llm.llm.BaseLLM.save_answer",
+        "llm_docstring_generator.llm.llm.BaseLLM.raise_if_rate_limited_too_often",
         "llm_docstring_generator.llm.llm.BaseLLM.__init__",
+        "llm_docstring_generator.llm.llm.BaseLLM.get_num_tokens",
+        "llm_docstring_generator.llm.llm.BaseLLM",
+        "llm_docstring_generator.llm.llm.BaseLLM.get_truncated_prompt",
+        "llm_docstring_generator.llm.llm.BaseLLM.raise_if_final_attempt",
+        "llm_docstring_generator.llm.llm.LocalTGILLM.generate",
+        "llm_docstring_generator.llm.llm.OpenAILLM.generate",
+        "llm_docstring_generator.llm.llm.AsyncClientLLM.acall_llm",
+        "llm_docstring_generator.llm.llm.AsyncClientLLM.call_llm",
+        "llm_docstring_generator.llm.llm.AsyncClientLLM.close",
+        "llm_docstring_generator.llm.llm.BaseLLM.get_cached_answer",
+        "llm_docstring_generator.llm.llm.AsyncClientLLM",
+        "llm_docstring_generator.llm.llm.AsyncClientLLM.__init__",
+        "llm_docstring_generator.llm.llm.BaseLLM.count_answer_tokens",
+        "llm_docstring_generator.llm.llm.BaseLLM.truncate_prompt",
         "llm_docstring_generator.llm.llm.LocalTGILLM",
         "llm_docstring_generator.llm.llm.LocalTGILLM.__init__",
         "llm_docstring_generator.llm.llm.OpenAILLM",
         "llm_docstring_generator.llm.llm.OpenAILLM.__init__",
+        "llm_docstring_generator.llm.llm.BaseLLM.acall_llm_with_retries",
+        "llm_docstring_generator.llm.llm.BaseLLM.call_llm_with_retries",
+        "llm_docstring_generator.llm.llm.BaseLLM.get_cached_answers",
+        "llm_docstring_generator.llm.llm.BaseLLM.acall",
         "llm_docstring_generator.llm.llm.BaseLLM.__call__",
     ]
     assert import_names == expected
@@ -0,0 +1,43 @@
+import subprocess
+import sys
+from pathlib import Path
+
+# dependencies that must only be imported when they are used
+HEAVY_MODULES = ["httpx", "networkx", "openai", "pyvis", "sqlalchemy", "tiktoken"]
+# seconds, the command line interface is called from hooks and must start fast
+IMPORT_TIME_BUDGET = 0.5
+
+
+def import_in_subprocess(module_name: str):
+    code = (
+        "import sys, time\n"
+        "start_time = time.perf_counter()\n"
+        f"import {module_name}\n"
+        "print(time.perf_counter() - start_time)\n"
+        "print(','.join(sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).parent.parent,
+    )
+    import_time, modules = result.stdout.strip().split("\n")
+    return float(import_time), set(modules.split(","))
+
+
+def test_command_line_interface_imports_are_within_budget():
+    for module_name in [
+        "llm_docstring_generator",
+        "llm_docstring_generator.pipelines.run_code_annotation_pipeline",
+        "llm_docstring_generator.pipelines.run_batch_annotation_pipeline",
+    ]:
+        import_time, modules = import_in_subprocess(module_name)
+        assert modules.isdisjoint(HEAVY_MODULES), module_name
+        assert import_time < IMPORT_TIME_BUDGET, module_name
+
+
+def test_llm_backends_are_imported_lazily():
+    _, modules = import_in_subprocess("llm_docstring_generator.llm.llm")
+    assert modules.isdisjoint(["httpx", "openai", "sqlalchemy", "tiktoken"])
@@ -21,7 +21,7 @@ def python_files(tmp_path):
         repository_name="llm_docstring_generator",
         repository_path=repository_path,
         remote_url="",
-        cache_path=root_path,
+        cache_path=tmp_path,
     )
     python_files = load_python_files(config)
     assert len(python_files) >= 25, f"len(python_files): {len(python_files)}"